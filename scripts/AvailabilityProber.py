@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import requests
+
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError, wait
+from urllib.parse import urlparse
+from HttpClient import MAX_PAGE_BYTES, SkippedResponse, read_page
+
+logger = logging.getLogger(__name__)
+
+ProbeResult = namedtuple('ProbeResult', ['url', 'available', 'error', 'response', 'elapsed', 'transient'],
+                         defaults=(False,))
+ProbeResult.__doc__ = """
+Outcome of probing one site. `response` is the fetched homepage when it came back with a
+2xx status, so the crawl can start from it instead of downloading it again. `transient` tells
+failures that may clear up on their own (timeouts and 5xx responses) from hard ones.
+"""
+
+class AvailabilityProber:
+    """
+    Pre-flight check of input sites: DNS resolution, a TCP connect and a GET of the homepage,
+    each with a tight timeout.
+
+    Hosts that fail are remembered for `negative_ttl` seconds and not probed again in that time.
+    Failures that may clear up on their own (timeouts and 5xx responses) are only remembered for
+    `transient_ttl` seconds. With `cache_file` set the negative cache of the other failures is kept
+    on disk between runs. The homepage is streamed and read with the crawl's checks, see
+    HttpClient.read_page, so its body is never larger than `max_page_bytes`. With `metrics` set
+    (a CrawlMetrics) the DNS and connect times of every probe are recorded as the 'dns' and
+    'connect' stages, which measure each host's connection setup cost; the crawl itself reuses
+    pooled keep-alive connections.
+    """
+
+    def __init__(self, session=None, dns_timeout=3, connect_timeout=3, read_timeout=5, max_workers=64,
+                 negative_ttl=6 * 3600, transient_ttl=300, cache_file=None, metrics=None, max_page_bytes=MAX_PAGE_BYTES):
+        self.session = session or requests.Session()
+        self.dns_timeout = dns_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_workers = max_workers
+        self.negative_ttl = negative_ttl
+        self.transient_ttl = transient_ttl
+        self.cache_file = cache_file
+        self.metrics = metrics
+        self.max_page_bytes = max_page_bytes
+        self._negative_cache = {}
+        self._lock = threading.Lock()
+        self._dns_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dns')
+
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file, encoding='utf-8') as f:
+                self._negative_cache = {host: (expires_at, error, False) for host, (expires_at, error, *_) in json.load(f).items()}
+
+    def _cached_failure(self, host):
+        with self._lock:
+            entry = self._negative_cache.get(host)
+            if entry is None:
+                return None
+            expires_at, error, transient = entry
+            if expires_at < time.time():
+                del self._negative_cache[host]
+                return None
+            return error, transient
+
+    def _remember_failure(self, host, error, transient):
+        ttl = self.transient_ttl if transient else self.negative_ttl
+        with self._lock:
+            self._negative_cache[host] = (time.time() + ttl, error, transient)
+
+    def _check_connectivity(self, parsed):
+        """
+        Resolves the host and opens a TCP connection to it.
+
+        Returns:
+            tuple: An error message or None, and whether the error is transient (a timeout).
+        """
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        dns_start = time.perf_counter()
+        try:
+            addresses = self._dns_executor.submit(socket.getaddrinfo, parsed.hostname, port, 0, socket.SOCK_STREAM).result(timeout=self.dns_timeout)
+        except TimeoutError:
+            return 'DNS lookup timed out', True
+        except socket.gaierror as e:
+            return f'DNS lookup failed: {e}', False
+        if self.metrics is not None:
+            self.metrics.observe('dns', time.perf_counter() - dns_start)
+
+        error, transient = None, False
+        for family, socktype, proto, _, address in addresses:
+            try:
+                with socket.socket(family, socktype, proto) as sock:
+                    sock.settimeout(self.connect_timeout)
+                    connect_start = time.perf_counter()
+                    sock.connect(address)
+                if self.metrics is not None:
+                    self.metrics.observe('connect', time.perf_counter() - connect_start)
+                return None, False
+            except OSError as e:
+                error, transient = f'TCP connect failed: {e}', isinstance(e, socket.timeout)
+        return error, transient
+
+    def _get_homepage(self, url):
+        """
+        Streams the homepage and reads its body the way the crawl does.
+
+        Returns:
+            tuple: The response if it can be reused by the crawl, an error message or None, and
+            whether the error is transient (a timeout or a 5xx response).
+        """
+        try:
+            response = self.session.get(url, timeout=(self.connect_timeout, self.read_timeout), stream=True)
+        except requests.Timeout as e:
+            return None, f'Request timed out: {e}', True
+        except requests.RequestException as e:
+            return None, f'Request failed: {e}', False
+        if response.status_code >= 500:
+            response.close()
+            return None, f'Server error {response.status_code}', True
+        if not response.ok:
+            # Blocked or missing homepages (4xx) still mean the host is up; the crawl refetches those
+            response.close()
+            return None, None, False
+        try:
+            return read_page(response, self.max_page_bytes), None, False
+        except SkippedResponse:
+            # Not a page or too large: the host is up, and the crawl skips the homepage the same way
+            return None, None, False
+        except requests.RequestException as e:
+            # The server answered, but the body stalled or broke off
+            return None, f'Reading the homepage failed: {e}', True
+
+    def probe(self, url):
+        """
+        Probes one site.
+
+        Args:
+            url (str): The site's input URL.
+
+        Returns:
+            ProbeResult: Whether the site is reachable, why not, and the homepage response.
+        """
+        start_time = time.time()
+        parsed = urlparse(url)
+        if not parsed.hostname:
+            return ProbeResult(url, False, 'Invalid URL', None, 0.0)
+
+        host = parsed.netloc.lower()
+        cached = self._cached_failure(host)
+        if cached is not None:
+            error, transient = cached
+            return ProbeResult(url, False, f'{error} (cached)', None, 0.0, transient)
+
+        error, transient = self._check_connectivity(parsed)
+        response = None
+        if error is None:
+            response, error, transient = self._get_homepage(url)
+
+        elapsed = time.time() - start_time
+        if error is not None:
+            self._remember_failure(host, error, transient)
+            logger.info("Probe of %s failed in %.2f seconds: %s", url, elapsed, error)
+            return ProbeResult(url, False, error, None, elapsed, transient)
+        return ProbeResult(url, True, None, response, elapsed)
+
+    def iter_probes(self, items, lookahead=None):
+        """
+        Probes many sites concurrently, running at most `lookahead` probes ahead of the consumer.
+
+        Args:
+            items (iterable): (key, url) pairs; the key is passed through untouched.
+            lookahead (int, optional): Maximum probes in flight. Defaults to max_workers.
+
+        Yields:
+            tuple: (key, url, ProbeResult) in completion order.
+        """
+        lookahead = lookahead or self.max_workers
+        items = iter(items)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='probe') as executor:
+            in_flight = {}
+            while True:
+                while len(in_flight) < lookahead:
+                    item = next(items, None)
+                    if item is None:
+                        break
+                    in_flight[executor.submit(self.probe, item[1])] = item
+                if not in_flight:
+                    return
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key, url = in_flight.pop(future)
+                    yield key, url, future.result()
+
+    def close(self):
+        """
+        Saves the negative cache (if a cache file is configured) and stops the DNS workers.
+        Transient failures are not saved.
+        """
+        self._dns_executor.shutdown(wait=False)
+        if self.cache_file:
+            now = time.time()
+            with self._lock:
+                entries = {host: (expires_at, error) for host, (expires_at, error, transient) in self._negative_cache.items()
+                           if expires_at >= now and not transient}
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
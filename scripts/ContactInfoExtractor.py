@@ -1,6 +1,4 @@
 import logging
-import random
-import re
 import json
 import time
 import os
@@ -8,23 +6,33 @@ import sys
 import pandas as pd
 import requests
 
-from collections import deque
-from urllib.parse import urljoin, urlparse
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dotenv import load_dotenv  # Import load_dotenv
-from datetime import datetime  # Import datetime
-from bs4 import BeautifulSoup
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from ContactMatcher import find_emails, find_mailto_emails, find_phones
+from AvailabilityProber import AvailabilityProber
+from CrawlFrontier import CrawlBudget, PriorityFrontier, is_page_url, url_priority
+from CrawlLogging import crawl_logging
+from CrawlMetrics import CrawlMetrics
+from CrawlPlan import fan_out, plan_sites
+from CrawlState import CrawlStateStore
+from HttpCache import HttpCache, content_hash
+from HttpClient import DEFAULT_TIMEOUT, MAX_PAGE_BYTES, HostLimiter, SkippedResponse, create_session, get_shared_session, read_page
+from PageArchive import PageArchive
+from PageParsers import parse_page
+from Politeness import PolitenessScheduler
+from ParsePool import ParsedPage, ParsePool, extractor_key, timed_extract_page
+from ProxyPool import ProxyPool
+from ResultWriters import export_excel, open_result_writer
+from SitemapReader import iter_sitemap_urls
+from UrlCollectorFromSheet import URL_COLUMN
+from UrlNormalizer import VisitedSet
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Generate log file name with current date and time
-current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-log_file_name = f'../logs/logs_{current_time}.log'
-
-# Configure logging to write to a .log file
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename=f'../logs/{log_file_name}', filemode='w')
+# Logging is configured by the script that runs the crawl, see CrawlLogging; importing this module leaves it alone
 logger = logging.getLogger(__name__)
 
 # Load credentials from environment variables
@@ -32,84 +40,70 @@ API_KEY = os.getenv('PROXYSCRAPE_API_KEY')
 UPTIMEROBOT_API_KEY = os.getenv('UPTIMEROBOT_API_KEY')
 SITERELIC_API_KEY = os.getenv('SITERELIC_API_KEY')
 
-# Function to get a list of proxies from ProxyScrape
-def get_proxies():
-    response = requests.get(f'https://api.proxyscrape.com/v2/?request=getproxies&protocol=http&timeout=10000&country=all&ssl=all&anonymity=all&apikey={API_KEY}')
-    proxies = response.text.split('\n')
-    return [proxy.strip() for proxy in proxies if proxy.strip()]
+# Long-lived pool of ProxyScrape proxies, refreshed and health-checked in the background
+proxy_pool = ProxyPool(f'https://api.proxyscrape.com/v2/?request=getproxies&protocol=http&timeout=10000&country=all&ssl=all&anonymity=all&apikey={API_KEY}')
 
-def fetch_with_proxy(session, url):
+def fetch_with_proxy(session, url, max_bytes=MAX_PAGE_BYTES):
     """
-    Fetches the content of the given URL using a proxy.
+    Fetches the content of the given URL through the healthiest proxy in the pool.
 
     Args:
         session (requests.Session): The session to use for making requests.
         url (str): The URL to fetch content from.
+        max_bytes (int, optional): Byte cap for the page, see HttpClient.read_page.
 
     Returns:
         requests.Response: The response object containing the content of the URL.
     """
-    logger.info(f"Fetching {url} with proxy...")
+    logger.info("Fetching %s with proxy...", url)
 
-    proxies_list = get_proxies()
-    if not proxies_list:
+    proxy_address = proxy_pool.get()
+    if proxy_address is None:
         logger.error("No proxies available")
-        raise Exception("No proxies available")
+        raise requests.exceptions.ProxyError("No proxies available")
 
-    proxy_address = random.choice(proxies_list)  # Select a random proxy from the list
     proxies = {
         'http': f'http://{proxy_address}',
-        'https': f'https://{proxy_address}'
+        'https': f'http://{proxy_address}'
     }
 
+    start_time = time.time()
     try:
-        response = session.get(url, proxies=proxies, timeout=10)
+        response = session.get(url, proxies=proxies, timeout=DEFAULT_TIMEOUT, stream=True)
         response.raise_for_status()
+        read_page(response, max_bytes)
+        proxy_pool.report_success(proxy_address, time.time() - start_time)
         return response
     except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching {url} with proxy: {proxy_address}, Error: {e}")
+        # A site's own 4xx error passed through the proxy does not count against the proxy
+        status_code = e.response.status_code if e.response is not None else None
+        if status_code is not None and status_code < 500 and status_code != 407:
+            proxy_pool.report_success(proxy_address, time.time() - start_time)
+        else:
+            proxy_pool.report_failure(proxy_address)
+        logger.error("Error fetching %s with proxy: %s, Error: %s", url, proxy_address, e)
         raise
 
-def create_session():
-    """
-    Creates a requests.Session with custom headers and retry logic.
-
-    Returns:
-        requests.Session: Configured session with user-agent header and retry logic.
-    """
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    })
-    retries = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-    adapter = HTTPAdapter(max_retries=retries)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
-    return session
-
-def extract_emails_from_text(text, domain):
+def extract_emails_from_text(text, domain, soup=None):
     """
     Extracts email addresses from the given text using regex and BeautifulSoup.
 
     Args:
         :param text: (str) The text content to search for email addresses.
         :param domain:
+        :param soup: (BeautifulSoup, optional) An already parsed document for `text`; parsed here if omitted.
 
     Returns:
         set: A set of extracted email addresses.
     """
-    email_pattern = re.compile(r'[a-zA-Z0-9._%+-]+@(?:' + re.escape(domain) + r'|gmail\.com|hotmail\.com|yahoo\.com|outlook\.com|aol\.com|icloud\.com|protonmail\.com|zoho\.com|mail\.com|gmx\.com)\b(?!\.png)')
-    emails = set(email_pattern.findall(text))
+    emails = find_emails(text, domain)
 
     # Extract emails from mailto links
-    soup = BeautifulSoup(text, 'html.parser')
-    for mailto in soup.find_all('a', href=True):
-        if 'mailto:' in mailto['href']:
-            email = mailto['href'].split('mailto:')[1]
-            if not email.endswith('.png') and (domain in email or any(provider in email for provider in ['gmail.com', 'hotmail.com', 'yahoo.com', 'outlook.com', 'aol.com', 'icloud.com', 'protonmail.com', 'zoho.com', 'mail.com', 'gmx.com'])):
-                emails.add(email)
-
-    logger.info(f"Extracted emails: {emails.__str__()}")
+    if soup is None:
+        soup = parse_page(text)
+    emails |= find_mailto_emails((link['href'] for link in soup.find_all('a', href=True)), domain)
+
+    logger.info("Extracted emails: %s", emails)
     return emails
 
 def extract_phone_numbers_from_text(text):
@@ -122,95 +116,157 @@ def extract_phone_numbers_from_text(text):
     Returns:
         set: A set of extracted phone numbers.
     """
-    phone_pattern = re.compile(
-        r'(\+1[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})|'  # US, Canada
-        r'(\+44[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'  # UK
-        r'(\+61[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'  # Australia
-        r'(\+49[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'  # Germany
-        r'(\+33[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'  # France
-        r'(\+91[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'  # India
-        r'(\+86[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'  # China
-        r'(\+55[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'  # Brazil
-        r'(\+81[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'  # Japan
-        r'(\+92[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'  # Pakistan
-        r'(\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4,9})'  # General valid-looking numbers
-    )
-    phone_numbers = set(phone_pattern.findall(text))
-
-    # Flatten the tuples and filter out empty strings
-    phone_numbers = {num for match in phone_numbers for num in match if num}
-
-    logger.info(f"Extracted phone numbers: {phone_numbers}")
+    phone_numbers = find_phones(text)
+
+    logger.info("Extracted phone numbers: %s", phone_numbers)
     return phone_numbers
 
-def extract_contact_info(url, session):
+def fetch_page(url, session, politeness=None, max_bytes=MAX_PAGE_BYTES, metrics=None):
     """
-    Fetches the content of the given URL and extracts emails and phone numbers.
+    Fetches the given URL once, falling back to a proxy if the direct request fails.
 
     Args:
         url (str): The URL to fetch content from.
         session (requests.Session): The session to use for making requests.
+        politeness (PolitenessScheduler, optional): Paces the request to the host's rate and waits
+            out 429/503 responses before the proxy fallback is tried.
+        max_bytes (int, optional): Byte cap for the page, see HttpClient.read_page.
+        metrics (CrawlMetrics, optional): Records the politeness wait, response and download times,
+            bytes, retries, failed requests by class and proxy fallbacks.
 
     Returns:
-        tuple: A tuple containing lists of emails, phone numbers, and an error message (if any).
+        requests.Response: The response object containing the content of the URL.
+
+    Raises:
+        SkippedResponse: If the URL is not an HTML page or is over the byte cap. Only the headers were downloaded.
     """
     try:
-        response = session.get(url, timeout=10)
+        # Streamed, so that non-pages and oversized bodies are dropped before their body is downloaded
+        if politeness is not None:
+            request_start = time.perf_counter()
+            response = politeness.get(session, url, timeout=DEFAULT_TIMEOUT, stream=True)
+            if metrics is not None:
+                metrics.observe('wait', max(0.0, time.perf_counter() - request_start - response.elapsed.total_seconds()))
+        else:
+            response = session.get(url, timeout=DEFAULT_TIMEOUT, stream=True)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        domain = urlparse(url).hostname
-
-        # Extract emails
-        emails = extract_emails_from_text(response.text, domain)
-        for mailto in soup.find_all('a', href=True):
-            if 'mailto:' in mailto['href']:
-                email = mailto['href'].split('mailto:')[1]
-                if not email.endswith('.png') and (domain in email or any(provider in email for provider in ['gmail.com', 'hotmail.com', 'yahoo.com', 'outlook.com', 'aol.com', 'icloud.com', 'protonmail.com', 'zoho.com', 'mail.com', 'gmx.com'])):
-                    emails.add(email)
-
-        # Extract phone numbers
-        phones = extract_phone_numbers_from_text(response.text)
-
-        return list(emails), list(phones), None
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching {url}: {e}")
-        return [], [], str(e)
-
-def get_sitemap_urls(url, session):
+        download_start = time.perf_counter()
+        read_page(response, max_bytes)
+        if metrics is not None:
+            metrics.record_response(url, response, time.perf_counter() - download_start)
+        logger.info("Fetched %s without proxy", url)
+    except SkippedResponse:
+        raise
+    except requests.RequestException as e:
+        if e.response is not None:
+            e.response.close()
+        logger.warning("Failed to fetch %s without proxy: %s", url, e)
+        if metrics is not None:
+            metrics.record_error(e)
+            metrics.count('proxy_fallbacks')
+        proxy_start = time.perf_counter()
+        try:
+            response = fetch_with_proxy(session, url, max_bytes)
+        except Exception as proxy_error:
+            if metrics is not None:
+                metrics.record_error(proxy_error)
+            raise
+        if metrics is not None:
+            metrics.observe('proxy', time.perf_counter() - proxy_start)
+        logger.info("Fetched %s with proxy", url)
+    return response
+
+PageResult = namedtuple('PageResult', ['emails', 'phones', 'links', 'error', 'size'])
+
+def process_page(url, session, response=None, parse_pool=None, politeness=None, http_cache=None, max_page_bytes=MAX_PAGE_BYTES,
+                 metrics=None, archive=None):
     """
-    Attempts to fetch a sitemap from the given URL and extracts URLs from it.
+    Fetches a page once, parses it once and runs every extractor over the parsed document.
 
     Args:
-        url (str): The base URL to fetch the sitemap from.
+        url (str): The URL to process.
         session (requests.Session): The session to use for making requests.
+        response (requests.Response, optional): An already fetched response for the URL; fetched here if omitted.
+        parse_pool (ParsePool, optional): Worker processes to parse the page on. Parsed in this thread if omitted.
+        politeness (PolitenessScheduler, optional): Per-host pacing for the fetch, see fetch_page.
+        http_cache (HttpCache, optional): Page cache holding the extraction results of earlier runs.
+            A page whose body has not changed since is not parsed again.
+        max_page_bytes (int, optional): Byte cap for the page, see HttpClient.read_page.
+        metrics (CrawlMetrics, optional): Records the fetch (see fetch_page), the parse and extract
+            times, and the pages crawled, skipped and reused from the cache.
+        archive (SiteArchive, optional): Keeps the raw page for offline re-extraction, see PageArchive.
 
     Returns:
-        set: A set of URLs found in the sitemap.
+        PageResult: Lists of emails, phone numbers and same-host links (see ParsePool.extract_links), an error
+        message (if any) and the number of body bytes downloaded.
     """
-    sitemap_urls = set()
-    sitemap_url = urljoin(url, '/sitemap.xml')  # Common sitemap URL
-    logger.info(f"Fetching sitemap from {sitemap_url}")
-
     try:
-        response = session.get(sitemap_url)
-        response.raise_for_status()
-
-        # Check if content is XML
-        if 'xml' in response.headers.get('Content-Type', ''):
-            soup = BeautifulSoup(response.content, 'lxml-xml')  # Use 'lxml-xml' parser for XML
-            for loc in soup.find_all('loc'):
-                sitemap_urls.add(loc.text.strip())
-            logger.info(f"Found {len(sitemap_urls)} URLs in sitemap")
+        if response is None:
+            response = fetch_page(url, session, politeness, max_page_bytes, metrics)
         else:
-            logger.warning("Sitemap is not in XML format")
-
+            read_page(response, max_page_bytes)
+            if metrics is not None and not getattr(response, 'from_cache', False):
+                metrics.count('bytes', len(response.content))
+        # Streamed responses, the probe's included, are only stored once their body has been read
+        if http_cache is not None and response.status_code == 200 and not getattr(response, 'from_cache', False):
+            http_cache.store(url, response)
+    except SkippedResponse as e:
+        logger.info("%s", e)
+        if metrics is not None:
+            metrics.count('skipped_pages')
+        return PageResult([], [], [], str(e), 0)
     except requests.RequestException as e:
-        logger.error(f"Error fetching sitemap: {e}")
+        logger.error("Error fetching %s: %s", url, e)
+        if metrics is not None:
+            metrics.count('failed_pages')
+        return PageResult([], [], [], str(e), 0)
+
+    if archive is not None and response.status_code == 200:
+        archive.append(url, response)
+
+    page = None
+    if http_cache is not None:
+        body_hash = content_hash(response.content)
+        extractor = extractor_key(parse_pool.backend if parse_pool is not None else None)
+        cached = http_cache.extraction(url, body_hash, extractor)
+        if cached is not None:
+            page = ParsedPage(*cached)
+    if page is not None:
+        logger.info("%s is unchanged since the last crawl, reusing its extraction", url)
+        if metrics is not None:
+            metrics.count('extractions_reused')
+    else:
+        if parse_pool is not None:
+            page, parse_seconds, extract_seconds = parse_pool.timed_extract(response.text, url)
+        else:
+            page, parse_seconds, extract_seconds = timed_extract_page(response.text, url)
+        if metrics is not None:
+            metrics.observe('parse', parse_seconds)
+            metrics.observe('extract', extract_seconds)
+        if http_cache is not None:
+            http_cache.store_extraction(url, body_hash, extractor, page)
+    if metrics is not None:
+        metrics.count('pages')
+    logger.info("Extracted emails: %s", page.emails)
+    logger.info("Extracted phone numbers: %s", page.phones)
+
+    # Bodies answered from the cache after a 304 were not downloaded
+    size = 0 if getattr(response, 'from_cache', False) else len(response.content)
+    return PageResult(page.emails, page.phones, page.links, None, size)
+
+def extract_contact_info(url, session):
+    """
+    Fetches the content of the given URL and extracts emails and phone numbers.
 
-    return sitemap_urls
+    Args:
+        url (str): The URL to fetch content from.
+        session (requests.Session): The session to use for making requests.
 
-import sys
+    Returns:
+        tuple: A tuple containing lists of emails, phone numbers, and an error message (if any).
+    """
+    result = process_page(url, session)
+    return result.emails, result.phones, result.error
 
 def is_site_down(url):
     api_url = "https://api.siterelic.com/up"
@@ -224,9 +280,9 @@ def is_site_down(url):
         "proxyCountry": "us"
     })
     try:
-        response = requests.post(api_url, headers=headers, data=payload)
+        response = get_shared_session().post(api_url, headers=headers, data=payload, timeout=DEFAULT_TIMEOUT)
         result = response.json()
-        logger.debug(f"SiteRelic API response: {result}")
+        logger.debug("SiteRelic API response: %s", result)
 
         if result.get('apiCode') == 200 and result.get('apiStatus') == 'success':
             return False
@@ -235,9 +291,9 @@ def is_site_down(url):
     except requests.exceptions.RequestException as e:
         error_message = str(e)
         if "Errno 11002" in error_message:
-            logger.error(f"Critical error: {error_message}")
+            logger.error("Critical error: %s", error_message)
             sys.exit("Halting script due to critical error in checking site status.")
-        logger.error(f"Error checking site status: {e}")
+        logger.error("Error checking site status: %s", e)
         return False
 
 def is_site_available(url, session):
@@ -252,158 +308,484 @@ def is_site_available(url, session):
         bool: True if the site is not available, False if it is available.
     """
     try:
-        response = session.get(url, timeout=10)
+        response = session.get(url, timeout=DEFAULT_TIMEOUT)
         response.raise_for_status()
         return False  # Site is available
     except requests.RequestException:
         # If the request fails, check if the site is down globally
         return is_site_down(url)
 
-def crawl_site(base_url, session):
+def crawl_site(base_url, session, seed_urls=None, checkpoint=None, budget=None, initial_response=None, parse_pool=None,
+               politeness=None, http_cache=None, metrics=None, archive=None, start_urls=None):
     """
     Crawls the given base URL and its internal links to extract emails and phone numbers.
 
+    Likely contact pages (contact, about, impressum and footer links) are crawled first, see
+    CrawlFrontier.url_priority.
+
+    With `budget.max_in_flight` above 1, that many pages are fetched and parsed concurrently on
+    worker threads. The frontier and visited set stay with the calling thread, which queues the
+    links of each page as it completes, so every page is still fetched at most once.
+
     Args:
         base_url (str): The base URL to start crawling from.
         session (requests.Session): The session to use for making requests.
+        seed_urls (iterable, optional): Extra start URLs, e.g. from the sitemap, that share the
+            frontier and visited set of the crawl so that every page is fetched at most once.
+            They are consumed lazily whenever the frontier runs dry.
+        checkpoint (SiteCheckpoint, optional): Saves the frontier, visited URLs and contacts after
+            every page and restores them when an interrupted crawl of the site is resumed.
+        budget (CrawlBudget, optional): Depth, page, time and byte limits for the site. Unlimited if omitted.
+        initial_response (requests.Response, optional): An already fetched response for base_url,
+            e.g. from the availability probe, used instead of downloading the page again.
+        parse_pool (ParsePool, optional): Worker processes that parse the fetched pages, see process_page.
+        politeness (PolitenessScheduler, optional): Skips URLs that robots.txt disallows and paces
+            requests to the host. Pages are fetched as fast as possible if omitted.
+        http_cache (HttpCache, optional): Skips parsing pages that are unchanged since the last run, see process_page.
+        metrics (CrawlMetrics, optional): Instrumentation of the page fetches and parses, see process_page.
+        archive (PageArchive, optional): Archives every fetched page, tagged with base_url as its site.
+        start_urls (iterable, optional): Further pages to crawl from, e.g. deep links of the same
+            domain from other input rows. Queued up front next to base_url, unlike seed_urls.
 
     Returns:
         tuple: A tuple containing lists of all unique emails and phone numbers found.
     """
 
-    visited_urls = set()
-    urls_to_visit = deque([base_url])
+    # Every URL is marked when it is queued, so equivalent links are neither queued nor fetched twice
+    seen_urls = VisitedSet([base_url])
+    urls_to_visit = PriorityFrontier()
+    urls_to_visit.push(base_url, 0, url_priority(base_url))
+    seed_urls = iter(seed_urls or ())
     all_emails = set()
     all_phones = set()
+    tracker = (budget or CrawlBudget()).tracker()
+    site_archive = archive.for_site(base_url) if archive is not None else None
+
+    if checkpoint is not None:
+        frontier, visited_urls, all_emails, all_phones = checkpoint.load()
+        if frontier or visited_urls:
+            # Depths are not checkpointed; resumed URLs count as one link away from the start
+            seen_urls = VisitedSet(visited_urls)
+            seen_urls.add(base_url)
+            urls_to_visit = PriorityFrontier()
+            for url in frontier:
+                if is_page_url(url) and seen_urls.add(url):
+                    urls_to_visit.push(url, 1, url_priority(url))
+            logger.info("Resuming crawl on %s with %d visited and %d queued URLs", base_url, len(visited_urls), len(frontier))
+
+    for url in start_urls or ():
+        if is_page_url(url) and seen_urls.add(url):
+            urls_to_visit.push(url, 0, url_priority(url))
+
+    logger.info("Starting crawl on %s", base_url)
+
+    def next_page():
+        # The next (url, depth) pair to fetch, or None once the frontier and the seed URLs are used up
+        while True:
+            if urls_to_visit:
+                url, depth = urls_to_visit.pop()
+            else:
+                url = next(seed_urls, None)
+                if url is None:
+                    return None
+                if not is_page_url(url) or not seen_urls.add(url):
+                    continue
+                depth = 1
+
+            if politeness is not None and not politeness.allowed(url):
+                logger.info("Skipping %s: disallowed by robots.txt", url)
+                if metrics is not None:
+                    metrics.count('robots_disallowed')
+                continue
+            return url, depth
+
+    def fetch(url):
+        response = initial_response if url == base_url else None
+        return process_page(url, session, response, parse_pool, politeness, http_cache, tracker.budget.max_page_bytes,
+                            metrics, site_archive)
+
+    def record(url, depth, result):
+        if result.error:
+            logger.error("Error fetching %s: %s", url, result.error)
+        tracker.record_page(result.size)
+        all_emails.update(result.emails)
+        all_phones.update(result.phones)
+
+        new_links = []
+        if tracker.allows_depth(depth + 1):
+            for link_url, anchor_text, in_footer in result.links:
+                # Documents, media and archives are never fetched; see CrawlFrontier.SKIPPED_EXTENSIONS
+                if is_page_url(link_url) and seen_urls.add(link_url):
+                    urls_to_visit.push(link_url, depth + 1, url_priority(link_url, anchor_text, in_footer))
+                    new_links.append(link_url)
+
+        if checkpoint is not None:
+            checkpoint.record_page(url, new_links, result.emails, result.phones)
+
+    max_in_flight = tracker.budget.max_in_flight
+    executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='page') if max_in_flight > 1 else None
+    in_flight = {}
+    stop_reason = None
+    try:
+        while True:
+            while not stop_reason and len(in_flight) < max_in_flight:
+                stop_reason = tracker.exhausted(all_emails, len(in_flight))
+                if stop_reason:
+                    logger.info("Stopping crawl on %s: %s", base_url, stop_reason)
+                    break
+                page = next_page()
+                if page is None:
+                    break
+                if executor is None:
+                    record(*page, fetch(page[0]))
+                else:
+                    in_flight[executor.submit(fetch, page[0])] = page
+
+            # Pages already being fetched are finished and counted even once the budget is used up
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                record(*in_flight.pop(future), future.result())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    logger.info("Crawl completed with %d unique emails and %d unique phones found", len(all_emails), len(all_phones))
+    return list(all_emails), list(all_phones)
+
+def process_site(url, session, checkpoint=None, budget=None, probe=None, parse_pool=None, politeness=None, http_cache=None,
+                 metrics=None, archive=None, start_urls=None):
+    """
+    Checks availability, reads the sitemap and crawls a single input site.
+
+    Args:
+        url (str): The input URL of the site.
+        session (requests.Session): The session to use for making requests.
+        checkpoint (SiteCheckpoint, optional): Crawl progress store for the site, see crawl_site.
+        budget (CrawlBudget, optional): Crawl limits for the site, see crawl_site.
+        probe (ProbeResult, optional): Pre-flight result from AvailabilityProber. Replaces the
+            availability check, and its homepage response is reused by the crawl. A site that failed
+            the probe is not crawled, unless the failure was transient and the global check finds
+            the site up for others.
+        parse_pool (ParsePool, optional): Worker processes that parse the fetched pages, see process_page.
+        politeness (PolitenessScheduler, optional): robots.txt rules and per-host pacing, see crawl_site.
+        http_cache (HttpCache, optional): Extraction results of earlier runs, see process_page.
+        metrics (CrawlMetrics, optional): Instrumentation of the crawl, see crawl_site.
+        archive (PageArchive, optional): Archive of the fetched pages, see crawl_site.
+        start_urls (iterable, optional): Further pages of the site to crawl from, see crawl_site.
 
-    logger.info(f"Starting crawl on {base_url}")
+    Returns:
+        dict: The result record of the site, with its url, emails, phones and error.
+    """
+    url = url.strip()  # Remove any leading/trailing whitespace
+    if not url.startswith(('http://', 'https://')):
+        return {
+            'url': url,
+            'emails': [],
+            'phones': [],
+            'error': 'Invalid URL'
+        }
+
+    # Check if the site is down
+    initial_response = None
+    if probe is not None:
+        if probe.available:
+            initial_response = probe.response
+        else:
+            logger.error("Site %s failed the availability probe: %s", url, probe.error)
+            # A timeout or 5xx may only be this vantage point; the crawl may still reach the site through a proxy
+            if not probe.transient or is_site_down(url):
+                return {
+                    'url': url,
+                    'emails': [],
+                    'phones': [],
+                    'error': f'Failed availability probe: {probe.error}'
+                }
+            logger.info("Site %s is up for others, crawling it anyway", url)
+    elif is_site_available(url, session):
+        logger.error("Site %s is down for everyone.", url)
+        return {
+            'url': url,
+            'emails': [],
+            'phones': [],
+            'error': 'Site is down globally'
+        }
+
+    # Seed the crawl with the sitemap URLs, streamed as the frontier needs them
+    urls_from_sitemap = iter_sitemap_urls(url, session, politeness=politeness)
+    emails, phones = crawl_site(url, session, seed_urls=urls_from_sitemap, checkpoint=checkpoint, budget=budget,
+                                initial_response=initial_response, parse_pool=parse_pool,
+                                politeness=politeness, http_cache=http_cache, metrics=metrics, archive=archive,
+                                start_urls=start_urls)
+    error = None
+    if not emails and not phones:
+        error = 'No contact info found' if probe is None or probe.available else f'Failed availability probe: {probe.error}'
+
+    return {
+        'url': url,
+        'emails': emails,
+        'phones': phones,
+        'error': error
+    }
 
-    while urls_to_visit:
-        current_url = urls_to_visit.popleft()
-        if current_url in visited_urls:
-            continue
+def iter_site_records(urls, max_workers=16, per_host_limit=2, state_store=None, budget=None, prober=None, session=None,
+                      parse_pool=None, politeness=None, http_cache=None, metrics=None, archive=None, start_urls=None):
+    """
+    Crawls many sites at once on a worker pool and yields each result as soon as its site finishes.
 
-        visited_urls.add(current_url)
-        emails, phones, error = extract_contact_info(current_url, session)
-        if error:
-            logger.error(f"Error fetching {current_url}: {error}")
-        all_emails.update(emails)
-        all_phones.update(phones)
+    At most twice `max_workers` sites are queued at a time, so finished records never pile up in memory.
 
-        # Fetch links from the current page
+    Args:
+        urls (iterable): The input URLs, one per site.
+        max_workers (int): Global limit on the number of sites crawled concurrently.
+        per_host_limit (int): Limit on concurrent requests to any single host across all workers.
+        state_store (CrawlStateStore, optional): Checkpoint store; finished sites are taken from it
+            instead of being crawled again, and partial crawls resume from their saved frontier.
+        budget (CrawlBudget, optional): Crawl limits applied to every site.
+        prober (AvailabilityProber, optional): Pre-flight stage that probes sites concurrently ahead
+            of the crawl workers. Unreachable sites are never crawled; only transient failures are
+            checked again globally, see process_site.
+        session (requests.Session, optional): Session shared by all sites, so connection pools and
+            keep-alive connections are reused across the run. Created with per_host_limit if omitted.
+        parse_pool (ParsePool, optional): Worker processes that parse pages for all crawl workers.
+            Pages are parsed on the crawl threads if omitted.
+        politeness (PolitenessScheduler, optional): robots.txt rules and per-host pacing shared by all workers.
+        http_cache (HttpCache, optional): Extraction results of earlier runs, see process_page. The
+            session should be created with the same cache so unchanged pages come back as cheap 304s.
+        metrics (CrawlMetrics, optional): Instrumentation shared by all workers; every finished site
+            is counted in it, see CrawlMetrics.site_finished.
+        archive (PageArchive, optional): Archive of the fetched pages shared by all workers, see crawl_site.
+        start_urls (list, optional): Further start pages of every site, by position in urls, see
+            CrawlPlan.SiteGroup.start_urls and crawl_site.
+
+    Yields:
+        tuple: The input position of the site and its result record, in completion order.
+    """
+    if session is None:
+        session = create_session(HostLimiter(per_host_limit), pool_maxsize=per_host_limit)
+    urls = list(urls)
+    total_sites = len(urls)
+
+    def run(i, url, probe):
+        checkpoint = state_store.checkpoint(url.strip()) if state_store is not None else None
+
+        logger.info("Processing site %d/%d: %s...", i + 1, total_sites, url)
+        site_start_time = time.time()
         try:
-            # Attempt to fetch without proxy first
-            try:
-                response = session.get(current_url, timeout=10)
-                response.raise_for_status()
-                logger.info(f"Fetched {current_url} without proxy")
-            except requests.RequestException as e:
-                logger.warning(f"Failed to fetch {current_url} without proxy: {e}")
-                response = fetch_with_proxy(session, current_url)
-                logger.info(f"Fetched {current_url} with proxy")
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            base_url = urlparse(current_url).scheme + "://" + urlparse(current_url).hostname
-
-            for link in soup.find_all('a', href=True):
-                link_url = urljoin(base_url, link['href'])
-                if urlparse(link_url).hostname == urlparse(base_url).hostname and link_url not in visited_urls:
-                    urls_to_visit.append(link_url)
-
-        except requests.RequestException as e:
-            logger.error(f"Error fetching links from {current_url}: {e}")
-
-    logger.info(f"Crawl completed with {len(all_emails)} unique emails and {len(all_phones)} unique phones found")
-    return list(all_emails), list(all_phones)
+            record = process_site(url, session, checkpoint, budget, probe, parse_pool, politeness, http_cache, metrics, archive,
+                                  start_urls[i] if start_urls is not None else None)
+            if state_store is not None:
+                state_store.finish_site(url.strip(), record)
+            if metrics is not None:
+                metrics.site_finished(record)
+            return record
+        finally:
+            time_consumed = time.time() - site_start_time
+            logger.info("Time consumed for site %d: %.2f seconds", i + 1, time_consumed)
+
+    # Sites finished in an earlier run come straight from the checkpoint store
+    pending_urls = []
+    for i, url in enumerate(urls):
+        record = state_store.finished_record(url.strip()) if state_store is not None else None
+        if record is not None:
+            logger.info("Skipping site %d/%d: %s (finished in an earlier run)", i + 1, total_sites, url)
+            if metrics is not None:
+                metrics.site_finished(record)
+            yield i, record
+        else:
+            pending_urls.append((i, url.strip()))
+
+    if prober is not None:
+        sites = prober.iter_probes(pending_urls)
+    else:
+        sites = ((i, url, None) for i, url in pending_urls)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = {}
+        while True:
+            while len(in_flight) < 2 * max_workers:
+                next_site = next(sites, None)
+                if next_site is None:
+                    break
+                in_flight[executor.submit(run, *next_site)] = next_site[0]
+            if not in_flight:
+                return
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield in_flight.pop(future), future.result()
+
+def crawl_sites(urls, max_workers=16, per_host_limit=2, state_store=None, budget=None, prober=None, session=None, parse_pool=None,
+                politeness=None, http_cache=None, metrics=None, archive=None):
+    """
+    Crawls many sites at once on a worker pool, see iter_site_records.
 
-def main(input_file, output_file, max_sites=None):
+    Returns:
+        list: The result record of every site, in input order.
     """
-    Main function to read URLs from an input file, extract contact information, and save results to an output file.
+    records = dict(iter_site_records(urls, max_workers, per_host_limit, state_store, budget, prober, session, parse_pool,
+                                     politeness, http_cache, metrics, archive))
+    return [records[i] for i in range(len(records))]
+
+def read_input_urls(input_file, max_sites=None):
+    """
+    Reads the site URLs from the first column of the input Excel or CSV file.
 
     Args:
-        input_file (str): Path to the input Excel file containing URLs.
-        output_file (str): Path to the output Excel file to save results.
-        max_sites (int, optional): Maximum number of sites to process. Defaults to None.
+        input_file (str): Path to the input file, one URL per row. The 'URLs' header written by
+            UrlCollectorFromSheet.save_urls is skipped, so the collector's output can be crawled as it is.
+        max_sites (int, optional): Keep only the first `max_sites` URLs. Defaults to None (all of them).
+
+    Returns:
+        list: The URLs in input order.
     """
-    df = pd.read_excel(input_file, header=None)
+    if input_file.lower().endswith('.csv'):
+        df = pd.read_csv(input_file, header=None, dtype=str)
+    else:
+        df = pd.read_excel(input_file, header=None, dtype=str)
     urls = df[0].dropna().tolist()  # Drop any NaN values
+    if urls and urls[0].strip() == URL_COLUMN:
+        urls = urls[1:]
     if max_sites is not None:
         urls = urls[:max_sites]  # Limit the number of sites to process
+    return urls
 
-    data = []
-    total_sites = len(urls)
-    start_time = time.time()
+@contextmanager
+def crawl_pipeline(per_host_limit=2, http2=False, parse_workers=None, parser_backend=None, host_rate=2.0, respect_robots=True,
+                   cache_file=None, cache_max_bytes=512 * 1024 * 1024, probe_cache_file=None, metrics=None,
+                   archive_file=None):
+    """
+    Starts the stages shared by all crawl workers of a run, and closes them when the block exits.
 
-    for i, url in enumerate(urls):
-        url = url.strip()  # Remove any leading/trailing whitespace
-        if not url.startswith(('http://', 'https://')):
-            data.append({
-                'url': url,
-                'emails': [],
-                'phones': [],
-                'error': 'Invalid URL'
-            })
-            continue
-
-        logger.info(f"Processing site {i + 1}/{total_sites}: {url}...")
-        site_start_time = time.time()
+    The arguments are those of main.
 
-        session = create_session()  # Create a session with retries and headers
-
-        # Check if the site is down
-        if is_site_available(url, session):
-            logger.error(f"Site {url} is down for everyone.")
-            data.append({
-                'url': url,
-                'emails': [],
-                'phones': [],
-                'error': 'Site is down globally'
-            })
-            continue
-
-        # First, try to get URLs from sitemap if available
-        urls_from_sitemap = get_sitemap_urls(url, session)
-        if urls_from_sitemap:
-            logger.info(f"URLs obtained from sitemap: {len(urls_from_sitemap)}")
-            for site_url in urls_from_sitemap:
-                emails, phones = crawl_site(site_url, session)
-                data.append({
-                    'url': site_url,
-                    'emails': emails,
-                    'phones': phones,
-                    'error': None
-                })
-        else:
-            emails, phones = crawl_site(url, session)
-            error = None
-            if not emails and not phones:
-                error = 'No contact info found'
-
-            data.append({
-                'url': url,
-                'emails': emails,
-                'phones': phones,
-                'error': error
-            })
-
-        site_end_time = time.time()
-        time_consumed = site_end_time - site_start_time
-        logger.info(f"Time consumed for site {i + 1}: {time_consumed:.2f} seconds")
-
-    end_time = time.time()
-    total_time = end_time - start_time
-    average_time_per_site = total_time / len(urls) if urls else 0
-    expected_completion_time = average_time_per_site * total_sites
-
-    logger.info(f"Total time consumed: {total_time:.2f} seconds")
-    logger.info(f"Estimated time to complete: {expected_completion_time:.2f} seconds")
-
-    output_df = pd.DataFrame(data)
-    output_df.to_excel(output_file, index=False)
-    logger.info(f"Results saved to {output_file}")
+    Yields:
+        dict: The session, prober, parse_pool, politeness, http_cache, metrics and archive arguments of iter_site_records.
+    """
+    # Parse workers are started before any crawl thread, so they fork from a quiet process
+    parse_pool = ParsePool(parse_workers, parser_backend)
+
+    # One connection pool for the whole run; the probe reuses it without retries
+    http_cache = HttpCache(cache_file, cache_max_bytes) if cache_file else None
+    host_limiter = HostLimiter(per_host_limit)
+    session = create_session(host_limiter, pool_maxsize=per_host_limit, http2=http2, cache=http_cache)
+    prober = AvailabilityProber(create_session(host_limiter, retries=False, share_pools_with=session, cache=http_cache),
+                                cache_file=probe_cache_file, metrics=metrics)
+    politeness = PolitenessScheduler(session, rate=host_rate, respect_robots=respect_robots)
+    archive = PageArchive(archive_file) if archive_file else None
+    try:
+        yield dict(session=session, prober=prober, parse_pool=parse_pool, politeness=politeness, http_cache=http_cache,
+                   metrics=metrics, archive=archive)
+    finally:
+        prober.close()
+        session.close()
+        parse_pool.close()
+        if http_cache is not None:
+            http_cache.close()
+        if archive is not None:
+            archive.close()
+
+def main(input_file, output_file, max_sites=None, max_workers=16, per_host_limit=2, state_file=None, results_file=None, budget=None,
+         probe_cache_file=None, http2=False, parse_workers=None, parser_backend=None, host_rate=2.0, respect_robots=True,
+         cache_file=None, cache_max_bytes=512 * 1024 * 1024, metrics_file=None, progress_interval=30,
+         archive_file=None, group_domains=True):
+    """
+    Main function to read URLs from an input file, extract contact information, and save results to an output file.
+
+    Args:
+        input_file (str): Path to the input Excel file containing URLs.
+        output_file (str): Path to the output file. A .csv, .jsonl or .parquet file is written as
+            results come in, in completion order; an .xlsx file is exported from the streamed results
+            at the end of the run, in input order.
+        max_sites (int, optional): Maximum number of sites to process. Defaults to None.
+        max_workers (int): Number of sites crawled concurrently. Defaults to 16.
+        per_host_limit (int): Maximum concurrent requests to a single host. Defaults to 2.
+        state_file (str, optional): SQLite file to checkpoint the run in. A run restarted with the same
+            file skips finished sites and resumes partial ones. Defaults to None (no checkpointing).
+        results_file (str, optional): Where results are streamed when output_file is an Excel file.
+            Defaults to output_file with a .jsonl extension.
+        budget (CrawlBudget, optional): Per-site depth, page, time and byte limits. Defaults to None (unlimited).
+        probe_cache_file (str, optional): JSON file that remembers unreachable hosts between runs. Defaults to None.
+        http2 (bool): Use HTTP/2 for HTTPS sites when httpx is installed. Defaults to False.
+        parse_workers (int, optional): Processes that parse pages. Defaults to None (one per CPU);
+            0 parses on the crawl threads.
+        parser_backend (str, optional): 'lxml', 'stream' or 'bs4', see PageParsers.get_backend.
+            Defaults to None (lxml when installed).
+        host_rate (float): Requests per second sent to a single host, lowered further by its
+            Crawl-delay and by 429/503 responses. Defaults to 2.0.
+        respect_robots (bool): Skip URLs that the site's robots.txt disallows. Defaults to True.
+        cache_file (str, optional): SQLite file caching pages between runs. Unchanged pages are then
+            revalidated with a conditional request and not parsed again. Defaults to None (no cache).
+        cache_max_bytes (int): Size limit of the page cache; least recently used pages are evicted first.
+        metrics_file (str, optional): Where to write the run's metrics at the end: a JSON snapshot
+            for a .json file, Prometheus text otherwise. Defaults to None (only logged).
+        progress_interval (float): Seconds between progress lines in the log. Defaults to 30.
+        archive_file (str, optional): WARC file (.warc.gz) to append every fetched page to, so that changed
+            extraction rules can be re-run offline with PageArchive.reextract_archive. Defaults to None (no archive).
+        group_domains (bool): Crawl every registrable domain once, however many input rows name it,
+            and write its result to each of those rows; the domains with the most rows are crawled
+            first. See CrawlPlan.plan_sites. Defaults to True.
+    """
+    urls = read_input_urls(input_file, max_sites)
+
+    excel_export = output_file.lower().endswith('.xlsx')
+    if not excel_export:
+        results_file = output_file
+    elif results_file is None:
+        results_file = os.path.splitext(output_file)[0] + '.jsonl'
+
+    if group_domains:
+        plan = plan_sites(urls)
+        logger.info("Planned %d domains for %d input rows", len(plan), len(urls))
+    else:
+        plan = None
+
+    metrics = CrawlMetrics(total_sites=len(plan) if plan is not None else len(urls))
+    state_store = CrawlStateStore(state_file) if state_file else None
+    metrics.start_progress(progress_interval)
+    try:
+        with crawl_pipeline(per_host_limit, http2, parse_workers, parser_backend, host_rate, respect_robots, cache_file,
+                            cache_max_bytes, probe_cache_file, metrics, archive_file) as stages, \
+                open_result_writer(results_file, keep_positions=excel_export) as writer:
+            if plan is None:
+                for i, record in iter_site_records(urls, max_workers=max_workers, per_host_limit=per_host_limit,
+                                                   state_store=state_store, budget=budget, **stages):
+                    writer.write(record, i)
+            else:
+                for i, record in iter_site_records([group.url for group in plan], max_workers=max_workers,
+                                                   per_host_limit=per_host_limit, state_store=state_store, budget=budget,
+                                                   start_urls=[group.start_urls for group in plan], **stages):
+                    for position, row_record in fan_out(plan[i], record):
+                        writer.write(row_record, position)
+    finally:
+        metrics.stop()
+        if state_store is not None:
+            state_store.close()
+    logger.info("Results streamed to %s", results_file)
+
+    logger.info("Finished: %s", metrics.progress_line())
+    logger.info("Metrics: %s", json.dumps(metrics.snapshot()['counters']))
+    if metrics_file:
+        metrics.export(metrics_file)
+        logger.info("Metrics saved to %s", metrics_file)
+
+    if excel_export:
+        export_excel(results_file, output_file)
+        logger.info("Results saved to %s", output_file)
 
 if __name__ == "__main__":
     input_file = '../resources/sheets/collected_urls-dev.xlsx'  # Replace with your input file path
-    output_file = '../resources/sheets/contact_details.xlsx'  # Replace with your desired output file path
+    output_file = '../resources/sheets/contact_details.xlsx'  # Replace with your desired output file path (.xlsx, .csv, .jsonl or .parquet)
     max_sites = 5  # Limit to processing 5 sites; set to None for no limit
-    main(input_file, output_file, max_sites)
\ No newline at end of file
+    max_workers = 16  # Number of sites crawled at once
+    per_host_limit = 2  # Concurrent requests allowed per host
+    state_file = '../resources/sheets/crawl_state.db'  # Checkpoint file; delete it to start a fresh run
+    budget = CrawlBudget(max_depth=5, max_pages=200, max_seconds=600, max_bytes=50 * 1024 * 1024)  # Per-site crawl limits
+    probe_cache_file = '../resources/sheets/unreachable_hosts.json'  # Hosts that failed the availability probe recently
+    parse_workers = None  # Processes parsing pages; None uses every core, 0 parses on the crawl threads
+    cache_file = '../resources/sheets/http_cache.db'  # Pages of earlier runs, revalidated instead of downloaded again
+    metrics_file = '../resources/sheets/crawl_metrics.prom'  # Timers and counters of the run; use .json for a JSON snapshot
+    # Log records are written to ../logs/logs_<time>.log on a background thread, with repetitive lines rate-limited
+    with crawl_logging(log_dir='../logs'):
+        main(input_file, output_file, max_sites, max_workers, per_host_limit, state_file, budget=budget, probe_cache_file=probe_cache_file,
+             parse_workers=parse_workers, cache_file=cache_file, metrics_file=metrics_file)
@@ -0,0 +1,133 @@
+import re
+
+# Free-mail providers whose addresses are accepted on any site. None is a prefix of another,
+# so the order of the alternatives built from this set does not matter.
+FREE_MAIL_PROVIDERS = frozenset({'gmail.com', 'hotmail.com', 'yahoo.com', 'outlook.com', 'aol.com', 'icloud.com',
+                                 'protonmail.com', 'zoho.com', 'mail.com', 'gmx.com'})
+
+# Everything up to and including the '@' of a candidate address; the domain is checked separately
+EMAIL_LOCAL_PART_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@')
+
+# A free-mail domain directly after the '@', not followed by more word characters or '.png'
+FREE_MAIL_DOMAIN_PATTERN = re.compile(r'(?:' + '|'.join(re.escape(provider) for provider in sorted(FREE_MAIL_PROVIDERS)) + r')\b(?!\.png)')
+
+# Any free-mail provider appearing anywhere in a string
+FREE_MAIL_ANYWHERE_PATTERN = re.compile('|'.join(re.escape(provider) for provider in sorted(FREE_MAIL_PROVIDERS)))
+
+PHONE_PATTERN = re.compile(
+    r'\+1[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}|'  # US, Canada
+    r'\+44[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4}|'  # UK
+    r'\+61[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4}|'  # Australia
+    r'\+49[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4}|'  # Germany
+    r'\+33[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4}|'  # France
+    r'\+91[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4}|'  # India
+    r'\+86[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4}|'  # China
+    r'\+55[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4}|'  # Brazil
+    r'\+81[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4}|'  # Japan
+    r'\+92[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4}|'  # Pakistan
+    r'\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4,9}'  # General valid-looking numbers
+)
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+def _site_domain_end(text, position, domain):
+    """
+    Returns where the site's own domain ends if it starts at `position` and is followed by a
+    word boundary and no '.png', otherwise None.
+    """
+    if not domain or not text.startswith(domain, position):
+        return None
+    end = position + len(domain)
+    followed_by_word_char = end < len(text) and _is_word_char(text[end])
+    if followed_by_word_char == _is_word_char(domain[-1]):
+        return None
+    if text.startswith('.png', end):
+        return None
+    return end
+
+def find_emails(text, domain):
+    """
+    Finds addresses at the site's own domain or a free-mail provider.
+
+    One precompiled pattern finds candidate local parts; the domain after each '@' is checked
+    afterwards, so no pattern has to be built per site.
+
+    Args:
+        text (str): The text content to search for email addresses.
+        domain (str): The site's hostname.
+
+    Returns:
+        set: The email addresses found.
+    """
+    emails = set()
+    position = 0
+    while True:
+        match = EMAIL_LOCAL_PART_PATTERN.search(text, position)
+        if match is None:
+            return emails
+
+        domain_start = match.end()
+        domain_end = _site_domain_end(text, domain_start, domain)
+        if domain_end is None:
+            provider_match = FREE_MAIL_DOMAIN_PATTERN.match(text, domain_start)
+            domain_end = provider_match.end() if provider_match else None
+
+        if domain_end is None:
+            position = domain_start
+        else:
+            emails.add(text[match.start():domain_end])
+            position = domain_end
+
+def is_wanted_mailto(email, domain):
+    """
+    Checks whether an address taken from a mailto: link belongs to the site or a free-mail provider.
+    """
+    return not email.endswith('.png') and ((domain is not None and domain in email) or FREE_MAIL_ANYWHERE_PATTERN.search(email) is not None)
+
+def find_mailto_emails(hrefs, domain):
+    """
+    Collects the wanted addresses from mailto: link targets.
+
+    Args:
+        hrefs (iterable): The href values of the page's links.
+        domain (str): The site's hostname.
+
+    Returns:
+        set: The email addresses found.
+    """
+    emails = set()
+    for href in hrefs:
+        if 'mailto:' in href:
+            email = href.split('mailto:')[1]
+            if is_wanted_mailto(email, domain):
+                emails.add(email)
+    return emails
+
+def find_phones(text):
+    """
+    Finds phone numbers with the precompiled phone pattern.
+
+    Args:
+        text (str): The text content to search for phone numbers.
+
+    Returns:
+        set: The phone numbers found.
+    """
+    return {match.group(0) for match in PHONE_PATTERN.finditer(text)}
+
+def extract_contacts(text, domain, hrefs=()):
+    """
+    Runs the email, mailto and phone extractors over one page.
+
+    Args:
+        text (str): The raw page content.
+        domain (str): The site's hostname.
+        hrefs (iterable, optional): The href values of the page's links, for mailto: addresses.
+
+    Returns:
+        tuple: Sets of email addresses and phone numbers.
+    """
+    emails = find_emails(text, domain)
+    emails |= find_mailto_emails(hrefs, domain)
+    return emails, find_phones(text)
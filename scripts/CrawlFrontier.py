@@ -0,0 +1,143 @@
+import heapq
+import itertools
+import posixpath
+import re
+import time
+
+from urllib.parse import urlparse
+from HttpClient import MAX_PAGE_BYTES
+
+# Paths and link texts that usually lead to contact details, best first
+CONTACT_HINTS = re.compile(r'contact|kontakt|contacto|impressum|imprint', re.IGNORECASE)
+ABOUT_HINTS = re.compile(r'about|team|staff|people|legal|company|office|location|support|help', re.IGNORECASE)
+
+# Paths that tend to fan out into endless near-duplicate pages
+LOW_VALUE_HINTS = re.compile(r'/(?:page|tag|category|calendar|events?|products?|shop|cart|search)\b|\d{4}/\d{2}', re.IGNORECASE)
+
+# File types that never hold contact details worth parsing; links to them are not fetched at all
+SKIPPED_EXTENSIONS = frozenset({
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.odt', '.ods', '.odp', '.rtf', '.epub',
+    '.zip', '.rar', '.7z', '.gz', '.tgz', '.tar', '.bz2', '.xz',
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg', '.webp', '.ico', '.tif', '.tiff', '.avif', '.heic',
+    '.mp3', '.wav', '.ogg', '.flac', '.m4a', '.aac', '.mp4', '.m4v', '.mov', '.avi', '.wmv', '.mkv', '.webm', '.flv', '.mpg', '.mpeg',
+    '.exe', '.msi', '.dmg', '.iso', '.apk', '.bin', '.deb', '.rpm',
+    '.css', '.js', '.json', '.xml', '.rss', '.atom', '.woff', '.woff2', '.ttf', '.otf', '.eot', '.csv',
+})
+
+def is_page_url(url):
+    """
+    Returns False for links whose file extension marks them as documents, media, archives or assets.
+    """
+    return posixpath.splitext(urlparse(url).path)[1].lower() not in SKIPPED_EXTENSIONS
+
+def url_priority(url, anchor_text='', in_footer=False):
+    """
+    Scores how likely a link is to lead to contact details. Lower scores are crawled first.
+
+    Args:
+        url (str): The link target.
+        anchor_text (str, optional): The visible text of the link.
+        in_footer (bool, optional): Whether the link sits in the page footer.
+
+    Returns:
+        int: 0 for contact pages, 1 for about/impressum-style pages, 2 for other footer links,
+        3 for ordinary pages and 4 for pagination, catalog and query-string variants.
+    """
+    path = urlparse(url).path
+    if CONTACT_HINTS.search(path) or CONTACT_HINTS.search(anchor_text):
+        return 0
+    if ABOUT_HINTS.search(path) or ABOUT_HINTS.search(anchor_text):
+        return 1
+    if in_footer:
+        return 2
+    if urlparse(url).query or LOW_VALUE_HINTS.search(path):
+        return 4
+    return 3
+
+class CrawlBudget:
+    """
+    Per-site crawl limits. Any limit left as None is not enforced.
+
+    Args:
+        max_depth (int, optional): Maximum link distance from the start URL.
+        max_pages (int, optional): Maximum number of pages fetched.
+        max_seconds (float, optional): Maximum wall time spent on the site.
+        max_bytes (int, optional): Maximum number of body bytes downloaded.
+        stop_when_found (bool): Stop as soon as at least one email address has been found.
+        max_page_bytes (int, optional): Largest single page read; bigger responses are dropped
+            as soon as they cross the cap. Defaults to HttpClient.MAX_PAGE_BYTES.
+        max_in_flight (int): Pages of the site fetched concurrently. Requests to one host are still
+            capped by the session's per-host limit and the politeness rate. Defaults to 1 (serial).
+    """
+
+    def __init__(self, max_depth=None, max_pages=None, max_seconds=None, max_bytes=None, stop_when_found=False,
+                 max_page_bytes=MAX_PAGE_BYTES, max_in_flight=1):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.stop_when_found = stop_when_found
+        self.max_page_bytes = max_page_bytes
+        self.max_in_flight = max(1, max_in_flight)
+
+    def tracker(self):
+        """
+        Returns a fresh BudgetTracker for one site crawl.
+        """
+        return BudgetTracker(self)
+
+class BudgetTracker:
+    """
+    Accounts the pages, bytes and time spent on one site against a CrawlBudget.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.started_at = time.time()
+        self.pages = 0
+        self.bytes = 0
+
+    def record_page(self, size):
+        self.pages += 1
+        self.bytes += size
+
+    def allows_depth(self, depth):
+        return self.budget.max_depth is None or depth <= self.budget.max_depth
+
+    def exhausted(self, emails=(), in_flight=0):
+        """
+        Returns the reason the crawl has to stop, or None if it may continue. Pages still being
+        fetched (`in_flight`) count against the page budget.
+        """
+        budget = self.budget
+        if budget.max_pages is not None and self.pages + in_flight >= budget.max_pages:
+            return f"page budget of {budget.max_pages} reached"
+        if budget.max_bytes is not None and self.bytes >= budget.max_bytes:
+            return f"byte budget of {budget.max_bytes} reached"
+        if budget.max_seconds is not None and time.time() - self.started_at >= budget.max_seconds:
+            return f"time budget of {budget.max_seconds} seconds reached"
+        if budget.stop_when_found and emails:
+            return "contacts found"
+        return None
+
+class PriorityFrontier:
+    """
+    Crawl frontier that hands out likely contact pages first, breadth-first within a priority.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+
+    def push(self, url, depth, priority=3):
+        heapq.heappush(self._heap, (priority, depth, next(self._counter), url))
+
+    def pop(self):
+        """
+        Returns the next (url, depth) pair to crawl.
+        """
+        _, depth, _, url = heapq.heappop(self._heap)
+        return url, depth
+
+    def __len__(self):
+        return len(self._heap)
@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_DIR = '../logs'
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Messages RateLimitFilter keeps a window for before it forgets the expired ones; f-string messages are all different
+MAX_TRACKED_MESSAGES = 10000
+
+logger = logging.getLogger(__name__)
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread as they are, so the message is formatted there and not on
+    the crawl thread that logged it.
+
+    The stock QueueHandler formats every record before queueing it, so that it can cross process
+    boundaries; the queue here stays within the process. Lists, sets and dicts passed as arguments
+    are copied, so a collection that changes after the call is still logged as it was.
+    """
+
+    def prepare(self, record):
+        if isinstance(record.args, tuple) and any(isinstance(arg, (list, set, dict)) for arg in record.args):
+            record.args = tuple(arg.copy() if isinstance(arg, (list, set, dict)) else arg for arg in record.args)
+        return record
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most `burst` records of each message every `interval` seconds and drops the rest.
+
+    Records count as the same message when they come from the same logger with the same format
+    string, e.g. every "Fetched %s without proxy" line. This is why the crawl logs with lazy
+    %-style arguments rather than f-strings. Warnings and errors are never dropped. Dropped records
+    are counted and reported by summary().
+    """
+
+    def __init__(self, burst=20, interval=10.0, max_level=logging.INFO):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.max_level = max_level
+        self._windows = {}  # (logger, format string) -> [window start, records in window]
+        self._levels = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        with self._lock:
+            self._levels[record.levelname] = self._levels.get(record.levelname, 0) + 1
+            if record.levelno > self.max_level:
+                return True
+            key = (record.name, str(record.msg))
+            now = time.monotonic()
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                if window is None and len(self._windows) >= MAX_TRACKED_MESSAGES:
+                    self._windows = {key: window for key, window in self._windows.items() if now - window[0] < self.interval}
+                window = self._windows[key] = [now, 0]
+            window[1] += 1
+            if window[1] <= self.burst:
+                return True
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return False
+
+    def summary(self, reset=True, top=10):
+        """
+        Returns the records logged per level and the most often dropped messages since the last reset.
+        """
+        with self._lock:
+            levels, suppressed = dict(self._levels), dict(self._suppressed)
+            if reset:
+                self._levels.clear()
+                self._suppressed.clear()
+        most_dropped = sorted(suppressed.items(), key=lambda item: -item[1])[:top]
+        return {
+            'records': levels,
+            'suppressed': sum(suppressed.values()),
+            'most_suppressed': {f'{name}: {message}': count for (name, message), count in most_dropped},
+        }
+
+class CrawlLogging:
+    """
+    Logging for a crawl run: records from every thread go through a queue to a background thread
+    that writes them to a file (and the console, if asked), so crawl threads never wait on log I/O.
+
+    Repetitive INFO messages are rate-limited by a RateLimitFilter before they are queued. Every
+    `summary_interval` seconds, and once more on stop(), a one-line JSON summary of the records
+    logged and dropped is written to the log.
+
+    Args:
+        log_dir (str): Directory of the log file, created if missing. Defaults to LOG_DIR.
+        level (int): Lowest level logged. Defaults to logging.INFO.
+        burst (int): Records of one message let through per `interval`, see RateLimitFilter.
+        interval (float): Length of the rate-limit window in seconds.
+        summary_interval (float): Seconds between summaries; 0 only writes the final one.
+        console (bool): Also write the records to stderr.
+    """
+
+    def __init__(self, log_dir=LOG_DIR, level=logging.INFO, burst=20, interval=10.0, summary_interval=60, console=False):
+        os.makedirs(log_dir, exist_ok=True)
+        self.log_file = os.path.join(log_dir, f'logs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log')
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers = [logging.FileHandler(self.log_file, mode='w', encoding='utf-8')]
+        if console:
+            handlers.append(logging.StreamHandler())
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        self.rate_limit = RateLimitFilter(burst, interval)
+        self._queue = queue.SimpleQueue()
+        self._handler = DeferredQueueHandler(self._queue)
+        self._handler.addFilter(self.rate_limit)
+        self._listener = QueueListener(self._queue, *handlers, respect_handler_level=True)
+        self._root = logging.getLogger()
+        self._previous_level = self._root.level
+        self._root.addHandler(self._handler)
+        self._root.setLevel(level)
+        self._listener.start()
+
+        self.summary_interval = summary_interval
+        self._stop = threading.Event()
+        self._thread = None
+        if summary_interval:
+            self._thread = threading.Thread(target=self._run, name='log-summary', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.summary_interval):
+            self.log_summary()
+
+    def log_summary(self):
+        logger.info("Log summary: %s", json.dumps(self.rate_limit.summary()))
+
+    def stop(self):
+        """
+        Writes the final summary, flushes every queued record and detaches from the root logger.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.log_summary()
+        self._root.removeHandler(self._handler)
+        self._root.setLevel(self._previous_level)
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+
+@contextmanager
+def crawl_logging(**options):
+    """
+    Sets up CrawlLogging for the duration of the block, see CrawlLogging for the options.
+
+    Yields:
+        CrawlLogging: The running setup; its log_file is the path written to.
+    """
+    setup = CrawlLogging(**options)
+    try:
+        yield setup
+    finally:
+        setup.stop()
@@ -0,0 +1,226 @@
+import json
+import logging
+import threading
+import time
+
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRIC_PREFIX = 'leadscrapper'
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus style.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        Returns (upper bound, observations at or below it) pairs, ending with ('+Inf', count).
+        """
+        total = 0
+        pairs = []
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def snapshot(self):
+        return {'count': self.count, 'sum': round(self.sum, 6), 'buckets': dict(self.cumulative())}
+
+def _labels(**labels):
+    pairs = ','.join(f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                     for name, value in labels.items())
+    return '{' + pairs + '}' if pairs else ''
+
+class CrawlMetrics:
+    """
+    Instrumentation of a crawl run, shared by all crawl threads.
+
+    Keeps per-stage timers (dns, connect, response, download, parse, extract), counters (pages,
+    bytes, retries, proxy fallbacks, cache hits, skips, errors by class) and a latency histogram per
+    host. Exports as Prometheus text or as a JSON snapshot, and reports progress with an ETA based
+    on the throughput measured so far.
+
+    Args:
+        total_sites (int, optional): Number of sites in the run, for the progress line and ETA.
+    """
+
+    def __init__(self, total_sites=None):
+        self.total_sites = total_sites
+        self.started_at = time.time()
+        self.sites_done = 0
+        self.counters = defaultdict(int)  # (name, label) -> value
+        self.stages = defaultdict(Histogram)
+        self.hosts = defaultdict(Histogram)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def count(self, name, amount=1, label=None):
+        """
+        Adds to a counter, e.g. count('errors', label='ConnectTimeout').
+        """
+        with self._lock:
+            self.counters[(name, label)] += amount
+
+    def observe(self, stage, seconds):
+        """
+        Records how long one pass through a stage took.
+        """
+        with self._lock:
+            self.stages[stage].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """
+        Times the body of a with-block as one pass through a stage.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start_time)
+
+    def record_response(self, url, response, download_seconds):
+        """
+        Records a fetched response: time to headers, download time, body bytes, retries (by urllib3
+        and by the politeness scheduler) and the request latency of its host. Bodies answered from
+        the page cache after a 304 count as cache hits instead of downloaded bytes.
+        """
+        response_seconds = response.elapsed.total_seconds()
+        retries = len(getattr(getattr(response.raw, 'retries', None), 'history', ())) + getattr(response, 'attempts', 1) - 1
+        with self._lock:
+            self.stages['response'].observe(response_seconds)
+            self.stages['download'].observe(download_seconds)
+            self.hosts[urlparse(url).netloc].observe(response_seconds + download_seconds)
+            self.counters[('responses', str(response.status_code))] += 1
+            if getattr(response, 'from_cache', False):
+                self.counters[('cache_hits', None)] += 1
+            else:
+                self.counters[('bytes', None)] += len(response.content)
+            if retries:
+                self.counters[('retries', None)] += retries
+
+    def record_error(self, error):
+        """
+        Counts a failed request by exception class, e.g. 'ConnectTimeout' or 'HTTPError'.
+        """
+        self.count('errors', label=type(error).__name__)
+
+    def site_finished(self, record):
+        """
+        Counts a finished site and the outcome of its result record.
+        """
+        with self._lock:
+            self.sites_done += 1
+            self.counters[('sites', record.get('error') or 'ok')] += 1
+
+    def progress_line(self):
+        """
+        Returns a one-line progress report with throughput and the estimated time left.
+        """
+        with self._lock:
+            elapsed = time.time() - self.started_at
+            sites_done = self.sites_done
+            pages = self.counters[('pages', None)]
+            megabytes = self.counters[('bytes', None)] / 1024 / 1024
+
+        line = f"{sites_done}"
+        if self.total_sites:
+            line += f"/{self.total_sites}"
+        line += (f" sites, {pages} pages, {megabytes:.1f} MiB in {elapsed:.0f} s "
+                 f"({sites_done / elapsed * 60 if elapsed else 0:.1f} sites/min, {pages / elapsed if elapsed else 0:.1f} pages/s)")
+        if self.total_sites and sites_done:
+            remaining = (self.total_sites - sites_done) * elapsed / sites_done
+            line += f", ETA {remaining:.0f} s"
+        return line
+
+    def snapshot(self):
+        """
+        Returns every metric as a JSON-serialisable dict.
+        """
+        with self._lock:
+            counters = defaultdict(dict)
+            for (name, label), value in sorted(self.counters.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+                if label is None:
+                    counters[name] = value
+                else:
+                    counters[name][label] = value
+            return {
+                'elapsed_seconds': round(time.time() - self.started_at, 3),
+                'sites_done': self.sites_done,
+                'total_sites': self.total_sites,
+                'counters': dict(counters),
+                'stages': {stage: histogram.snapshot() for stage, histogram in sorted(self.stages.items())},
+                'hosts': {host: histogram.snapshot() for host, histogram in sorted(self.hosts.items())},
+            }
+
+    def prometheus_text(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            lines.append(f'# TYPE {METRIC_PREFIX}_sites_done gauge')
+            lines.append(f'{METRIC_PREFIX}_sites_done {self.sites_done}')
+
+            by_name = defaultdict(list)
+            for (name, label), value in self.counters.items():
+                by_name[name].append((label, value))
+            for name, values in sorted(by_name.items()):
+                lines.append(f'# TYPE {METRIC_PREFIX}_{name}_total counter')
+                for label, value in sorted(values, key=lambda item: str(item[0])):
+                    lines.append(f'{METRIC_PREFIX}_{name}_total{_labels(**{"class": label}) if label is not None else ""} {value}')
+
+            for metric, label_name, histograms in (('stage_seconds', 'stage', self.stages), ('host_latency_seconds', 'host', self.hosts)):
+                lines.append(f'# TYPE {METRIC_PREFIX}_{metric} histogram')
+                for key, histogram in sorted(histograms.items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{METRIC_PREFIX}_{metric}_bucket{_labels(**{label_name: key, "le": bound})} {count}')
+                    lines.append(f'{METRIC_PREFIX}_{metric}_sum{_labels(**{label_name: key})} {histogram.sum:.6f}')
+                    lines.append(f'{METRIC_PREFIX}_{metric}_count{_labels(**{label_name: key})} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path):
+        """
+        Writes the metrics to a file: a JSON snapshot for .json files, Prometheus text otherwise.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.lower().endswith('.json'):
+                json.dump(self.snapshot(), f, indent=2)
+            else:
+                f.write(self.prometheus_text())
+
+    def start_progress(self, interval=10):
+        """
+        Logs the progress line every `interval` seconds from a background thread until stop() is called.
+        """
+        def run():
+            while not self._stop.wait(interval):
+                logger.info("Progress: %s", self.progress_line())
+
+        self._thread = threading.Thread(target=run, name='crawl-progress', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,75 @@
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+from UrlNormalizer import normalize_url, registrable_domain
+
+SiteGroup = namedtuple('SiteGroup', ['domain', 'url', 'start_urls', 'positions', 'row_urls'])
+SiteGroup.__doc__ = """
+The input rows of one registrable domain, crawled once: the domain, the URL the crawl starts from,
+the group's other distinct URLs (crawled as extra start pages), and the input positions and URLs of
+every row the result is written back to. The domain is None for a group of invalid rows.
+"""
+
+def _start_url_rank(url, domain):
+    # Homepages before deep links, the main host before subdomains, https before http
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').lower()
+    bare_domain = domain.split(':')[0]
+    return (
+        parts.path.strip('/') != '' or bool(parts.query),
+        host not in (bare_domain, f'www.{bare_domain}'),
+        parts.scheme.lower() != 'https',
+    )
+
+def plan_sites(urls):
+    """
+    Groups input rows by registrable domain, so that every domain is crawled once however many
+    rows name it ('www.' and bare hosts, http and https, deep links, and subdomains when tldextract
+    is installed, see UrlNormalizer.registrable_domain). Sites on shared platforms such as
+    'a.wordpress.com' and 'b.wordpress.com' belong to different businesses and are never grouped.
+
+    Each group starts its crawl from its best URL, preferring homepages, then the main host (bare
+    or 'www.'), then https; ties go to the earlier row. Its other distinct URLs become extra start
+    pages of the same crawl. Rows that are not http(s) URLs, such as a bare 'example.com', are never
+    grouped with a site: each distinct one forms a group of its own and gets the crawl's
+    'Invalid URL' result.
+
+    Args:
+        urls (iterable): The input URLs, one per row, e.g. from UrlCollectorFromSheet.collect_urls
+            or ContactInfoExtractor.read_input_urls.
+
+    Returns:
+        list: SiteGroup tuples, the domains with the most rows first (so the longest crawls start
+        early), ties in input order.
+    """
+    rows = {}
+    for position, url in enumerate(urls):
+        url = url.strip()
+        # The same check as ContactInfoExtractor.process_site, so invalid rows keep their own result
+        key = registrable_domain(url) if url.startswith(('http://', 'https://')) else (None, url)
+        rows.setdefault(key, []).append((position, url))
+
+    groups = []
+    for key, domain_rows in rows.items():
+        domain = key if isinstance(key, str) else None
+        # Distinct URLs by canonical form, in input order
+        distinct = {}
+        for _, url in domain_rows:
+            distinct.setdefault(normalize_url(url), url)
+        candidates = list(distinct.values())
+        start_url = min(candidates, key=lambda url: _start_url_rank(url, domain)) if domain is not None else candidates[0]
+        groups.append(SiteGroup(domain, start_url, [url for url in candidates if url != start_url],
+                                [position for position, _ in domain_rows], [url for _, url in domain_rows]))
+
+    groups.sort(key=lambda group: (-len(group.positions), group.positions[0]))
+    return groups
+
+def fan_out(group, record):
+    """
+    Copies the result record of a group's crawl to every row of the group.
+
+    Yields:
+        tuple: The input position of each row and its record, which carries the row's own URL.
+    """
+    for position, url in zip(group.positions, group.row_urls):
+        yield position, dict(record, url=url)
@@ -0,0 +1,124 @@
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sites (
+    site TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    record TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS frontier (
+    site TEXT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (site, url)
+);
+CREATE TABLE IF NOT EXISTS visited (
+    site TEXT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (site, url)
+);
+CREATE TABLE IF NOT EXISTS contacts (
+    site TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (site, kind, value)
+);
+'''
+
+class CrawlStateStore:
+    """
+    SQLite-backed record of a crawl run, so that a restarted run can pick up where the last one died.
+
+    Per input site it keeps a status ('in_progress' or 'done'), the finished result record, the
+    pending frontier, the visited URLs and the contacts found so far. One store may be shared by
+    all crawl threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def finished_record(self, site):
+        """
+        Returns the saved result record of a finished site, or None if the site still has to be crawled.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT record FROM sites WHERE site = ? AND status = 'done'", (site,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def checkpoint(self, site):
+        """
+        Returns the checkpoint handle that crawl_site uses to save and restore the progress of one site.
+        """
+        return SiteCheckpoint(self, site)
+
+    def finish_site(self, site, record):
+        """
+        Saves the result record of a site and drops its crawl progress, which is no longer needed.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sites (site, status, record, updated_at) VALUES (?, 'done', ?, ?)",
+                (site, json.dumps(record), time.time()))
+            for table in ('frontier', 'visited', 'contacts'):
+                self._connection.execute(f"DELETE FROM {table} WHERE site = ?", (site,))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+class SiteCheckpoint:
+    """
+    Saves and restores the crawl progress of a single site in a CrawlStateStore.
+    """
+
+    def __init__(self, store, site):
+        self.store = store
+        self.site = site
+
+    def load(self):
+        """
+        Marks the site as in progress and returns what earlier runs saved for it.
+
+        Returns:
+            tuple: The pending frontier (list, in insertion order), the visited URLs (set), and the
+            emails and phone numbers found so far (sets).
+        """
+        connection = self.store._connection
+        with self.store._lock, connection:
+            connection.execute(
+                "INSERT OR IGNORE INTO sites (site, status, updated_at) VALUES (?, 'in_progress', ?)",
+                (self.site, time.time()))
+            frontier = [row[0] for row in connection.execute("SELECT url FROM frontier WHERE site = ? ORDER BY rowid", (self.site,))]
+            visited = {row[0] for row in connection.execute("SELECT url FROM visited WHERE site = ?", (self.site,))}
+            contacts = connection.execute("SELECT kind, value FROM contacts WHERE site = ?", (self.site,)).fetchall()
+        emails = {value for kind, value in contacts if kind == 'email'}
+        phones = {value for kind, value in contacts if kind == 'phone'}
+        return frontier, visited, emails, phones
+
+    def record_page(self, url, new_links, emails, phones):
+        """
+        Saves the outcome of one crawled page in a single transaction.
+
+        Args:
+            url (str): The page that was crawled; it moves from the frontier to the visited set.
+            new_links (iterable): Links queued from the page.
+            emails (iterable): Emails found on the page.
+            phones (iterable): Phone numbers found on the page.
+        """
+        connection = self.store._connection
+        with self.store._lock, connection:
+            connection.execute("INSERT OR IGNORE INTO visited (site, url) VALUES (?, ?)", (self.site, url))
+            connection.execute("DELETE FROM frontier WHERE site = ? AND url = ?", (self.site, url))
+            connection.executemany("INSERT OR IGNORE INTO frontier (site, url) VALUES (?, ?)",
+                                   [(self.site, link) for link in new_links])
+            connection.executemany("INSERT OR IGNORE INTO contacts (site, kind, value) VALUES (?, ?, ?)",
+                                   [(self.site, 'email', email) for email in emails] +
+                                   [(self.site, 'phone', phone) for phone in phones])
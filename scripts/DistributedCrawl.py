@@ -0,0 +1,211 @@
+import logging
+import os
+import socket
+import sys
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from ContactInfoExtractor import crawl_pipeline, iter_site_records, read_input_urls
+from CrawlFrontier import CrawlBudget
+from CrawlLogging import crawl_logging
+from CrawlMetrics import CrawlMetrics
+from CrawlPlan import fan_out, plan_sites
+from CrawlState import CrawlStateStore
+from ResultWriters import export_excel, open_result_writer
+from WorkQueue import group_sites, open_work_queue
+
+logger = logging.getLogger(__name__)
+
+class LeaseKeeper:
+    """
+    Background thread that sends a heartbeat for every lease a worker holds, every `interval` seconds.
+    """
+
+    def __init__(self, queue, interval):
+        self.queue = queue
+        self.interval = interval
+        self.leases = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='lease-keeper', daemon=True)
+        self._thread.start()
+
+    def hold(self, lease):
+        with self._lock:
+            self.leases[lease.shard] = lease
+
+    def drop(self, lease):
+        with self._lock:
+            self.leases.pop(lease.shard, None)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                leases = list(self.leases.values())
+            for lease in leases:
+                if not self.queue.heartbeat(lease):
+                    logger.warning("Lost the lease on %s; another worker may crawl it again", lease.shard)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+def submit_sites(queue, input_file, max_sites=None):
+    """
+    Coordinator: reads the input file and queues its sites, one shard per registrable domain.
+
+    Returns:
+        int: The number of sites queued.
+    """
+    urls = read_input_urls(input_file, max_sites)
+    shards = group_sites(urls)
+    queue.submit(shards)
+    logger.info("Queued %d sites in %d shards", len(urls), len(shards))
+    return len(urls)
+
+def crawl_shard(queue, lease, budget=None, state_store=None, **stages):
+    """
+    Crawls the sites of one leased shard and stores their results in the queue.
+
+    A shard is one registrable domain, so it is crawled once however many input rows name it
+    (see CrawlPlan.plan_sites), and the result is fanned out to every row.
+
+    Returns:
+        bool: False if the lease was lost before the shard finished; its results were dropped.
+    """
+    plan = plan_sites([url for _, url in lease.sites])
+    records = {}
+    for i, record in iter_site_records([group.url for group in plan], max_workers=1, state_store=state_store, budget=budget,
+                                       start_urls=[group.start_urls for group in plan], **stages):
+        for k, row_record in fan_out(plan[i], record):
+            records[lease.sites[k][0]] = row_record
+    if not queue.complete(lease, records):
+        logger.warning("Lost the lease on %s before it finished; another worker crawls it", lease.shard)
+        return False
+    return True
+
+def run_worker(queue, worker_id=None, max_workers=16, per_host_limit=2, budget=None, state_file=None, poll_interval=5,
+               **pipeline_options):
+    """
+    Worker: leases shards from the queue, crawls their sites and stores the results, until every
+    shard of the run is done.
+
+    Each of `max_workers` crawl threads leases a shard, crawls it (see crawl_shard) and leases the
+    next one as soon as it is done, so a slow domain never holds up the others. The leases are kept
+    alive by heartbeats meanwhile. A worker that dies leaves its shards to expire and be picked up again.
+
+    Args:
+        queue: SqliteWorkQueue or RedisWorkQueue, see WorkQueue.open_work_queue.
+        worker_id (str, optional): Name of the worker in the queue. Defaults to host name and process id.
+        max_workers (int): Sites crawled concurrently, as in ContactInfoExtractor.main.
+        per_host_limit (int): Concurrent requests per host, as in ContactInfoExtractor.main.
+        budget (CrawlBudget, optional): Per-site crawl limits.
+        state_file (str, optional): SQLite checkpoint file of this worker, so a restarted worker
+            resumes partially crawled sites it leases again.
+        poll_interval (float): Seconds to wait before asking again while other workers hold the remaining shards.
+        **pipeline_options: Further options of ContactInfoExtractor.crawl_pipeline (http2, parse_workers,
+            parser_backend, host_rate, respect_robots, cache_file, cache_max_bytes, probe_cache_file,
+            archive_file). Give every worker its own archive_file.
+
+    Returns:
+        int: The number of sites this worker crawled.
+    """
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    metrics = CrawlMetrics()
+    state_store = CrawlStateStore(state_file) if state_file else None
+    keeper = LeaseKeeper(queue, max(1, queue.lease_ttl / 3))
+    stop = threading.Event()
+
+    def crawl_leases(stages):
+        crawled = 0
+        while not stop.is_set():
+            lease = queue.lease(worker_id)
+            if lease is None:
+                done, total = queue.progress()
+                if done == total:
+                    break
+                logger.info("Worker %s: %d shards are held by other workers or still crawling, waiting", worker_id, total - done)
+                stop.wait(poll_interval)
+                continue
+
+            keeper.hold(lease)
+            try:
+                crawl_shard(queue, lease, budget, state_store, **stages)
+            except BaseException:
+                # Back to the queue right away instead of waiting for the lease to run out
+                queue.release(lease)
+                raise
+            finally:
+                keeper.drop(lease)
+            crawled += len(lease.sites)
+            logger.info("Worker %s: %s", worker_id, metrics.progress_line())
+        return crawled
+
+    try:
+        with crawl_pipeline(per_host_limit, metrics=metrics, **pipeline_options) as stages, \
+                ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='shard') as executor:
+            futures = [executor.submit(crawl_leases, stages) for _ in range(max_workers)]
+            try:
+                return sum(future.result() for future in futures)
+            finally:
+                # After a failure (or an interrupt) the other threads finish their shard and lease no more
+                stop.set()
+    finally:
+        keeper.stop()
+        if state_store is not None:
+            state_store.close()
+
+def merge_results(queue, output_file, results_file=None):
+    """
+    Writes the results of every finished site in input order, in the output format of ContactInfoExtractor.main.
+
+    Args:
+        queue: The run's work queue.
+        output_file (str): A .csv, .jsonl, .parquet or .xlsx file.
+        results_file (str, optional): Intermediate .jsonl file for Excel output. Defaults to output_file with a .jsonl extension.
+
+    Returns:
+        int: The number of records written.
+    """
+    excel_export = output_file.lower().endswith('.xlsx')
+    if not excel_export:
+        results_file = output_file
+    elif results_file is None:
+        results_file = os.path.splitext(output_file)[0] + '.jsonl'
+
+    count = 0
+    with open_result_writer(results_file) as writer:
+        for _, record in queue.results():
+            writer.write(record)
+            count += 1
+    if excel_export:
+        export_excel(results_file, output_file)
+
+    done, total = queue.progress()
+    if done < total:
+        logger.warning("Merged the results of %d of %d shards; the rest are not finished yet", done, total)
+    logger.info("Merged %d results into %s", count, output_file)
+    return count
+
+if __name__ == "__main__":
+    # python DistributedCrawl.py coordinator|worker|merge
+    # Every node points at the same queue: a SQLite file on one box, or a redis:// URL for a fleet
+    queue_location = '../resources/sheets/work_queue.db'
+    input_file = '../resources/sheets/collected_urls-dev.xlsx'
+    output_file = '../resources/sheets/contact_details.xlsx'
+    budget = CrawlBudget(max_depth=5, max_pages=200, max_seconds=600, max_bytes=50 * 1024 * 1024)  # Per-site crawl limits
+
+    role = sys.argv[1] if len(sys.argv) > 1 else 'worker'
+    queue = open_work_queue(queue_location)
+    try:
+        with crawl_logging(log_dir='../logs'):
+            if role == 'coordinator':
+                submit_sites(queue, input_file)
+            elif role == 'worker':
+                run_worker(queue, budget=budget, probe_cache_file='../resources/sheets/unreachable_hosts.json')
+            elif role == 'merge':
+                merge_results(queue, output_file)
+            else:
+                sys.exit(f"Unknown role {role!r}; expected coordinator, worker or merge")
+    finally:
+        queue.close()
@@ -0,0 +1,217 @@
+import hashlib
+import io
+import json
+import logging
+import sqlite3
+import threading
+import time
+import requests
+
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3 import HTTPResponse
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at);
+CREATE TABLE IF NOT EXISTS extractions (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+'''
+
+# Headers that describe the transfer rather than the body, which is stored decoded
+TRANSFER_HEADERS = frozenset({'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive'})
+
+def content_hash(body):
+    """
+    Returns a short hex digest identifying a response body.
+    """
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+class HttpCache:
+    """
+    On-disk cache of crawled pages for repeated crawls of the same lead lists.
+
+    Keeps the body and the ETag/Last-Modified validators of every successful GET, so the next run can
+    ask the server whether the page changed and reuse the stored body on a 304. It also remembers the
+    extraction result of each page with the hash of the body it came from and the version of the
+    extraction rules, so an unchanged page is not parsed again until the rules change. The least
+    recently used pages are evicted once the bodies exceed `max_bytes`. One cache may be shared by
+    all crawl threads.
+
+    Args:
+        path (str): SQLite file to keep the cache in.
+        max_bytes (int): Upper bound on the total size of the stored bodies.
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        # Extraction results of caches written before they were keyed by extractor cannot be trusted
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(extractions)")]
+        if columns and 'extractor' not in columns:
+            self._connection.execute("DROP TABLE extractions")
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._total_bytes = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def lookup(self, url):
+        """
+        Returns the stored response for a URL as (etag, last_modified, headers, body), or None.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT etag, last_modified, headers, body FROM responses WHERE url = ?",
+                                           (url,)).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, headers, body = row
+        return etag, last_modified, json.loads(headers), body
+
+    def touch(self, url):
+        """
+        Marks a stored response as just used, so eviction keeps it.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("UPDATE responses SET used_at = ? WHERE url = ?", (time.time(), url))
+
+    def store(self, url, response):
+        """
+        Stores a successful response with its validators, evicting old pages if the cache is full.
+        """
+        body = response.content
+        if len(body) > self.max_bytes:
+            return
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in TRANSFER_HEADERS}
+        with self._lock, self._connection:
+            previous = self._connection.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, last_modified, headers, body, size, used_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, response.headers.get('ETag'), response.headers.get('Last-Modified'), json.dumps(headers), body,
+                 len(body), time.time()))
+            self._total_bytes += len(body) - (previous[0] if previous else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Evict down to 90% of the limit so that a full cache does not evict on every store
+        target = self.max_bytes * 0.9
+        rows = self._connection.execute("SELECT url, size FROM responses ORDER BY used_at").fetchall()
+        evicted = 0
+        for url, size in rows:
+            if self._total_bytes <= target:
+                break
+            self._connection.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self._connection.execute("DELETE FROM extractions WHERE url = ?", (url,))
+            self._total_bytes -= size
+            evicted += 1
+        logger.info("HTTP cache evicted %d pages, %d bytes left", evicted, self._total_bytes)
+
+    def extraction(self, url, body_hash, extractor):
+        """
+        Returns the stored extraction result of a page if it was made from a body with the given hash
+        by the same extractor.
+
+        Args:
+            url (str): The page URL.
+            body_hash (str): content_hash of the page body.
+            extractor (str): Version of the extraction rules and parser backend, see ParsePool.extractor_key.
+
+        Returns:
+            tuple: The stored (emails, phones, links) lists, or None if the page is new, has changed
+            or was extracted by other rules.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT result FROM extractions WHERE url = ? AND content_hash = ? AND extractor = ?",
+                                           (url, body_hash, extractor)).fetchone()
+        if row is None:
+            return None
+        emails, phones, links = json.loads(row[0])
+        return emails, phones, [tuple(link) for link in links]
+
+    def store_extraction(self, url, body_hash, extractor, result):
+        """
+        Stores the (emails, phones, links) extraction result of a page together with the hash of the
+        body and the extractor it was made by.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO extractions (url, content_hash, extractor, result) VALUES (?, ?, ?, ?)",
+                                     (url, body_hash, extractor, json.dumps(list(result))))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+class CachingAdapter(BaseAdapter):
+    """
+    Transport adapter that turns GET requests into conditional requests against an HttpCache.
+
+    Stored validators are sent as If-None-Match/If-Modified-Since; a 304 reply is answered with the
+    stored body as a regular 200 response that has `from_cache` set. Everything else goes through
+    `adapter`, the wrapped transport adapter, untouched. Streamed 200 responses are not stored here,
+    since their body is read later; the caller stores them with HttpCache.store once it has the body.
+    """
+
+    def __init__(self, adapter, cache):
+        super().__init__()
+        self.adapter = adapter
+        self.cache = cache
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if request.method != 'GET':
+            return self.adapter.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+
+        cached = self.cache.lookup(request.url)
+        if cached is not None:
+            etag, last_modified, _, _ = cached
+            if etag:
+                request.headers['If-None-Match'] = etag
+            if last_modified:
+                request.headers['If-Modified-Since'] = last_modified
+
+        response = self.adapter.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        response.from_cache = False
+        if response.status_code == 304 and cached is not None:
+            response.close()
+            self.cache.touch(request.url)
+            return self._cached_response(request, cached)
+        if response.status_code == 200 and not stream:
+            try:
+                self.cache.store(request.url, response)
+            except requests.RequestException as e:  # The body could not be read; the caller sees the same error
+                logger.debug("Not caching %s: %s", request.url, e)
+        return response
+
+    def _cached_response(self, request, cached):
+        _, _, headers, body = cached
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(headers)
+        response.raw = HTTPResponse(body=io.BytesIO(body), headers=headers, status=200, preload_content=False)
+        response._content = body
+        response._content_consumed = True
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.from_cache = True
+        return response
+
+    def close(self):
+        self.adapter.close()
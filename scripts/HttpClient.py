@@ -0,0 +1,390 @@
+import io
+import logging
+import threading
+import weakref
+import requests
+
+from collections import OrderedDict, defaultdict
+from urllib.parse import urlparse
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3 import HTTPResponse
+from urllib3.exceptions import MaxRetryError, ProtocolError
+from urllib3.util.retry import Retry
+from HttpCache import CachingAdapter
+
+try:
+    import httpx
+except ImportError:  # HTTP/2 support is optional
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Seconds to wait for a TCP/TLS connection and for the server to send data, kept separate so
+# dead hosts fail fast while slow pages still get time to arrive
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 10
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+# The one retry policy for every crawl request. 503 (like 429) is left to Politeness.PolitenessScheduler,
+# which backs off per host instead of sleeping out Retry-After inside a single request
+RETRY_POLICY = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 504])
+NO_RETRIES = Retry(total=0, read=False)
+
+# Responses worth reading as pages; anything else (PDFs, images, archives, video) is dropped after the headers
+PAGE_CONTENT_TYPES = frozenset({'text/html', 'application/xhtml+xml', 'text/plain'})
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+# Number of hosts whose connection pools are kept, and idle keep-alive connections kept per host
+POOL_CONNECTIONS = 256
+POOL_MAXSIZE = 4
+
+class SkippedResponse(requests.RequestException):
+    """
+    Raised for a response that is not a page or is too large to read. Not a network error, so it
+    must not send the crawler into retries or the proxy fallback.
+    """
+
+def read_page(response, max_bytes=MAX_PAGE_BYTES):
+    """
+    Reads the body of a response fetched with stream=True, checking its headers first.
+
+    Responses whose Content-Type is not a page, or whose Content-Length is over `max_bytes`, are
+    closed before any of the body is read. A body without Content-Length stops downloading as soon
+    as it goes over `max_bytes`. Responses without a Content-Type are read.
+
+    Args:
+        response (requests.Response): A streamed (or already read) response.
+        max_bytes (int, optional): Byte cap for the body; None reads any size.
+
+    Returns:
+        requests.Response: The same response, with its body read.
+
+    Raises:
+        SkippedResponse: If the response was dropped by one of the checks.
+    """
+    content_type = response.headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+    if content_type and content_type not in PAGE_CONTENT_TYPES:
+        response.close()
+        raise SkippedResponse(f"Skipped {content_type} response from {response.url}", response=response)
+
+    content_length = response.headers.get('Content-Length', '')
+    if max_bytes is not None and content_length.isdigit() and int(content_length) > max_bytes:
+        response.close()
+        raise SkippedResponse(f"Skipped {content_length} byte response from {response.url}, over the {max_bytes} byte cap",
+                              response=response)
+
+    if response._content is not False:  # Already read, e.g. the probe's response or a cache hit
+        if max_bytes is not None and len(response._content) > max_bytes:
+            raise SkippedResponse(f"Skipped {len(response._content)} byte response from {response.url}, over the {max_bytes} byte cap",
+                                  response=response)
+        return response
+
+    chunks = []
+    size = 0
+    try:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if max_bytes is not None and size > max_bytes:
+                raise SkippedResponse(f"Stopped reading {response.url} after {size} bytes, over the {max_bytes} byte cap",
+                                      response=response)
+    finally:
+        response.close()
+    response._content = b''.join(chunks)
+    response._content_consumed = True
+    return response
+
+class HostLimiter:
+    """
+    Caps the number of requests in flight to any single host, shared by every session it is given to.
+    """
+
+    def __init__(self, per_host_limit):
+        self.per_host_limit = per_host_limit
+        self._semaphores = defaultdict(lambda: threading.BoundedSemaphore(self.per_host_limit))
+        self._lock = threading.Lock()
+
+    def semaphore(self, url):
+        """
+        Returns the semaphore guarding the host (and port) of the given URL.
+        """
+        with self._lock:
+            return self._semaphores[urlparse(url).netloc]
+
+    def acquire(self, url):
+        """
+        Waits for a free slot on the host of the given URL.
+
+        Returns:
+            HostSlot: The slot, to be released once the response body has been read or closed.
+        """
+        semaphore = self.semaphore(url)
+        semaphore.acquire()
+        return HostSlot(semaphore)
+
+class HostSlot:
+    """
+    A slot taken from a HostLimiter. Only the first release() gives it back, so the body being read
+    to the end, the response being closed and the response being garbage collected can all release it.
+    """
+
+    def __init__(self, semaphore):
+        self._semaphore = semaphore
+        self._lock = threading.Lock()
+        self._held = True
+
+    def release(self):
+        with self._lock:
+            if not self._held:
+                return
+            self._held = False
+        self._semaphore.release()
+
+def hold_until_read(response, slot):
+    """
+    Keeps a host slot taken for a streamed response until its body is read to the end or the
+    response is closed. urllib3 releases the connection in both cases, and so the slot is
+    released with it. A response that is dropped without either gives its slot back when collected.
+    """
+    raw = response.raw
+    if hasattr(raw, 'release_conn'):
+        # A weak reference, so the response is not kept in a cycle and is freed (and finalized) at once
+        raw_ref = weakref.ref(raw)
+
+        def release():
+            # The connection goes back to the pool first, so the next request on the slot can reuse it
+            current = raw_ref()
+            if current is not None:
+                type(current).release_conn(current)
+            slot.release()
+
+        raw.release_conn = release
+    weakref.finalize(response, slot.release)
+    return response
+
+class HostLimitedAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that holds a per-host slot from a HostLimiter while each request is sent and its
+    body is downloaded, see hold_until_read.
+    """
+
+    def __init__(self, host_limiter, *args, **kwargs):
+        self.host_limiter = host_limiter
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, *args, **kwargs):
+        if self.host_limiter is None:
+            return super().send(request, *args, **kwargs)
+        slot = self.host_limiter.acquire(request.url)
+        try:
+            response = super().send(request, *args, **kwargs)
+        except BaseException:
+            slot.release()
+            raise
+        return hold_until_read(response, slot)
+
+class _HttpxBodyStream(io.RawIOBase):
+    """
+    File object over the decoded body of a streamed httpx response, read as it arrives. `on_done` is
+    called once, when the body has been read to the end or the stream is closed.
+    """
+
+    def __init__(self, reply, on_done):
+        super().__init__()
+        self.reply = reply
+        self.on_done = on_done
+        self._chunks = reply.iter_bytes(CHUNK_SIZE)
+        self._buffer = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._buffer and not self.closed:
+            try:
+                self._buffer = next(self._chunks, b'')
+            except httpx.HTTPError as e:
+                # Surfaces from requests as the ConnectionError or ChunkedEncodingError a broken HTTP/1.1 body gives
+                self.close()
+                raise ProtocolError(f"Reading {self.reply.url} failed: {e}", e)
+            if not self._buffer:
+                self.close()
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self.reply.close()
+            self.on_done()
+        super().close()
+
+class Http2Adapter(BaseAdapter):
+    """
+    Sends HTTPS requests over HTTP/2 through httpx, negotiating down to HTTP/1.1 with servers that
+    do not offer h2. Requests that need a proxy go through `fallback`, the regular adapter.
+
+    Bodies are streamed like those of the regular adapter, so read_page's checks and byte cap apply
+    before they are downloaded, and the host slot is held until the body is read or closed. Error
+    statuses are retried with the fallback's retry policy, backoff included.
+
+    Like the connection pools of the regular adapter, one httpx client is kept per host, holding at
+    most `pool_maxsize` idle connections, for up to `pool_connections` hosts; the least recently used
+    one is closed beyond that. httpx fixes TLS settings per client, so the verify/cert combination is
+    part of the key.
+    """
+
+    def __init__(self, fallback, host_limiter=None, pool_maxsize=POOL_MAXSIZE, pool_connections=POOL_CONNECTIONS):
+        super().__init__()
+        self.fallback = fallback
+        self.host_limiter = host_limiter
+        self.max_retries = fallback.max_retries
+        self.pool_connections = pool_connections
+        self.limits = httpx.Limits(max_connections=None, max_keepalive_connections=pool_maxsize)
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _client(self, url, verify, cert):
+        key = (urlparse(url).netloc.lower(), verify, tuple(cert) if isinstance(cert, list) else cert)
+        evicted = None
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                return client
+            # httpx only retries failed connects itself; error statuses are retried in send
+            connect_retries = self.max_retries.connect if self.max_retries.connect is not None else self.max_retries.total
+            # TLS settings belong to the transport; httpx ignores those of the client when one is given
+            transport = httpx.HTTPTransport(http2=True, retries=connect_retries or 0, limits=self.limits, verify=verify,
+                                            cert=key[2])
+            client = self._clients[key] = httpx.Client(follow_redirects=False, transport=transport)
+            if len(self._clients) > self.pool_connections:
+                _, evicted = self._clients.popitem(last=False)
+        if evicted is not None:
+            evicted.close()
+        return client
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if proxies and any(proxies.values()):
+            return self.fallback.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+
+        connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        # As in HostLimitedAdapter, the slot is held through the retries and their backoff
+        slot = self.host_limiter.acquire(request.url) if self.host_limiter is not None else None
+        release = slot.release if slot is not None else (lambda: None)
+        retries = self.max_retries
+        try:
+            client = self._client(request.url, verify, cert)
+            while True:
+                reply = client.send(client.build_request(request.method, request.url, headers=dict(request.headers),
+                                                         content=request.body,
+                                                         timeout=httpx.Timeout(read_timeout, connect=connect_timeout)),
+                                    stream=True)
+                if not retries.is_retry(request.method, reply.status_code, 'retry-after' in reply.headers):
+                    break
+                status = HTTPResponse(headers=dict(reply.headers), status=reply.status_code, preload_content=False)
+                try:
+                    retries = retries.increment(request.method, request.url, response=status)
+                except MaxRetryError:
+                    if retries.raise_on_status:
+                        reply.close()
+                        raise
+                    break  # Hand the last error response to the caller, as urllib3 does
+                reply.close()
+                logger.debug("Retrying %s after status %d: %s", request.url, reply.status_code, retries)
+                retries.sleep(status)
+        except BaseException as e:
+            release()
+            if isinstance(e, MaxRetryError):
+                raise requests.exceptions.RetryError(e, request=request)
+            if isinstance(e, httpx.ConnectTimeout):
+                raise requests.exceptions.ConnectTimeout(e, request=request)
+            if isinstance(e, httpx.TimeoutException):
+                raise requests.exceptions.ReadTimeout(e, request=request)
+            if isinstance(e, httpx.HTTPError):
+                raise requests.exceptions.ConnectionError(e, request=request)
+            raise
+        response = self._build_response(request, reply, release)
+        # A response dropped unread gives its slot back when collected
+        weakref.finalize(response, release)
+        return response
+
+    def _build_response(self, request, reply, on_done):
+        # The body is decoded while it is read, so the encoding header and the encoded length no longer apply
+        encoded = 'content-encoding' in reply.headers
+        headers = {key: value for key, value in reply.headers.items()
+                   if key.lower() != 'content-encoding' and not (encoded and key.lower() == 'content-length')}
+        response = requests.Response()
+        response.status_code = reply.status_code
+        response.headers = CaseInsensitiveDict(headers)
+        response.raw = HTTPResponse(body=_HttpxBodyStream(reply, on_done), headers=headers, status=reply.status_code,
+                                    preload_content=False, decode_content=False)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.reason = reply.reason_phrase
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
+        self.fallback.close()
+
+def create_session(host_limiter=None, retries=True, pool_maxsize=POOL_MAXSIZE, http2=False, share_pools_with=None, cache=None):
+    """
+    Creates a requests.Session with custom headers, pooled keep-alive connections and the shared retry policy.
+
+    Args:
+        host_limiter (HostLimiter, optional): Per-host concurrency limit applied to every request of the session.
+        retries (bool): Whether to retry failed requests with RETRY_POLICY. Probes turn this off to keep their timeouts tight.
+        pool_maxsize (int): Keep-alive connections kept open per host.
+        http2 (bool): Send HTTPS requests over HTTP/2 when httpx (with h2) is installed.
+        share_pools_with (requests.Session, optional): Another session created here whose connection
+            pools this session reuses, e.g. to probe without retries over the crawl's connections.
+        cache (HttpCache, optional): On-disk page cache; GET requests become conditional requests against it.
+
+    Returns:
+        requests.Session: Configured session with user-agent header and retry logic.
+    """
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': USER_AGENT
+    })
+    adapter = HostLimitedAdapter(host_limiter, pool_connections=POOL_CONNECTIONS, pool_maxsize=pool_maxsize,
+                                 max_retries=RETRY_POLICY if retries else NO_RETRIES)
+    if share_pools_with is not None:
+        shared = share_pools_with.get_adapter('http://')
+        adapter.poolmanager = getattr(shared, 'adapter', shared).poolmanager
+    https_adapter = adapter
+
+    if http2 and httpx is None:
+        logger.warning("HTTP/2 requested but httpx is not installed (pip install httpx[http2]); using HTTP/1.1")
+    if http2 and httpx is not None:
+        https_adapter = Http2Adapter(adapter, host_limiter, pool_maxsize, POOL_CONNECTIONS)
+
+    if cache is not None:
+        adapter, https_adapter = CachingAdapter(adapter, cache), CachingAdapter(https_adapter, cache)
+    session.mount('http://', adapter)
+    session.mount('https://', https_adapter)
+    return session
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+def get_shared_session():
+    """
+    Returns the process-wide session used by helpers that are not handed one (proxy list, status APIs).
+    """
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
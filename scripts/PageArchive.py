@@ -0,0 +1,294 @@
+import gzip
+import logging
+import mmap
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from CrawlLogging import crawl_logging
+from CrawlPlan import SiteGroup, fan_out, plan_sites
+from HttpCache import TRANSFER_HEADERS, content_hash
+from ParsePool import extract_page
+from ResultWriters import open_result_writer
+
+logger = logging.getLogger(__name__)
+
+INDEX_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS records (
+    site TEXT NOT NULL,
+    url TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    archived_at REAL NOT NULL,
+    PRIMARY KEY (site, url)
+);
+CREATE INDEX IF NOT EXISTS records_by_url ON records (url, content_hash);
+'''
+
+# Records handed to a re-extraction worker at a time
+CHUNK_RECORDS = 256
+
+def index_path(path):
+    return path + '.idx'
+
+def _warc_record(url, site, response):
+    """
+    Builds one gzip-compressed WARC/1.0 response record. The body is stored decoded, so the
+    headers that describe the transfer encoding are dropped.
+    """
+    body = response.content
+    status_line = f'HTTP/1.1 {response.status_code} {response.reason or ""}'.rstrip()
+    headers = ''.join(f'{name}: {value}\r\n' for name, value in response.headers.items() if name.lower() not in TRANSFER_HEADERS)
+    http_block = f'{status_line}\r\n{headers}Content-Length: {len(body)}\r\n\r\n'.encode('latin-1', 'replace') + body
+
+    warc_headers = [
+        'WARC/1.0',
+        'WARC-Type: response',
+        f'WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>',
+        f'WARC-Date: {datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}',
+        f'WARC-Target-URI: {url}',
+        'Content-Type: application/http; msgtype=response',
+        f'Content-Length: {len(http_block)}',
+    ]
+    if site:
+        warc_headers.append(f'LeadScrapper-Site: {site}')
+    # The encoding requests decoded the page with, so offline extraction sees the same text
+    warc_headers.append(f'LeadScrapper-Encoding: {response.encoding or response.apparent_encoding or "utf-8"}')
+    record = ('\r\n'.join(warc_headers) + '\r\n\r\n').encode('utf-8') + http_block + b'\r\n\r\n'
+    return gzip.compress(record, compresslevel=6)
+
+def parse_warc_record(data):
+    """
+    Parses one decompressed WARC response record.
+
+    Returns:
+        tuple: The WARC headers (dict), the HTTP headers (dict, lowercase names) and the body (bytes).
+    """
+    warc_head, _, rest = data.partition(b'\r\n\r\n')
+    warc_headers = dict(line.split(': ', 1) for line in warc_head.decode('utf-8').split('\r\n')[1:])
+    http_block = rest[:int(warc_headers['Content-Length'])]
+    http_head, _, body = http_block.partition(b'\r\n\r\n')
+    http_headers = {}
+    for line in http_head.decode('latin-1').split('\r\n')[1:]:
+        name, _, value = line.partition(':')
+        http_headers[name.strip().lower()] = value.strip()
+    return warc_headers, http_headers, body
+
+class PageArchive:
+    """
+    Append-only archive of crawled pages in the WARC format, one gzip member per record (a standard
+    .warc.gz that WARC tools can read), with a SQLite index by URL next to it (`path` + '.idx').
+
+    The index points at the latest record of every URL for every input site that crawled it and
+    remembers its content hash. A page that is crawled again unchanged is not archived twice, and a
+    page that several sites crawled with the same body is stored once and indexed for each of them.
+    One archive may be shared by all crawl threads of a process; give every process its own file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'ab')
+        self._index = sqlite3.connect(index_path(path), check_same_thread=False)
+        self._index.execute('PRAGMA journal_mode=WAL')
+        self._index.execute('PRAGMA synchronous=NORMAL')
+        self._migrate_index()
+        self._index.executescript(INDEX_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _migrate_index(self):
+        # Indexes written before pages were keyed by site and URL held one site per URL
+        key = [row[1] for row in sorted(self._index.execute("PRAGMA table_info(records)"), key=lambda row: row[5]) if row[5]]
+        if key and key != ['site', 'url']:
+            with self._index:
+                self._index.execute("ALTER TABLE records RENAME TO records_by_url_only")
+                self._index.executescript(INDEX_SCHEMA)
+                self._index.execute("INSERT INTO records SELECT COALESCE(site, ''), url, offset, length, content_hash, archived_at "
+                                    "FROM records_by_url_only")
+                self._index.execute("DROP TABLE records_by_url_only")
+
+    def append(self, url, response, site=None):
+        """
+        Archives a fetched page unless the archive already holds the same body for the URL. If it
+        holds it for another site only, the stored record is indexed for this site as well.
+
+        Args:
+            url (str): The URL the page was fetched from.
+            response (requests.Response): The response, with its body read.
+            site (str, optional): The input site the page was crawled for, used to rebuild per-site results offline.
+        """
+        body_hash = content_hash(response.content)
+        site = site or ''
+        with self._lock:
+            row = self._index.execute("SELECT content_hash FROM records WHERE site = ? AND url = ?", (site, url)).fetchone()
+            if row is not None and row[0] == body_hash:
+                return
+            stored = self._index.execute("SELECT offset, length FROM records WHERE url = ? AND content_hash = ? LIMIT 1",
+                                         (url, body_hash)).fetchone()
+            if stored is not None:
+                offset, length = stored
+            else:
+                record = _warc_record(url, site, response)
+                offset, length = self._file.tell(), len(record)
+                self._file.write(record)
+                self._file.flush()
+            with self._index:
+                self._index.execute(
+                    "INSERT OR REPLACE INTO records (site, url, offset, length, content_hash, archived_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (site, url, offset, length, body_hash, time.time()))
+
+    def for_site(self, site):
+        """
+        Returns a view of the archive that tags every page appended through it with the given input site.
+        """
+        return SiteArchive(self, site)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._index.close()
+
+class SiteArchive:
+    """
+    A PageArchive bound to one input site, see PageArchive.for_site.
+    """
+
+    def __init__(self, archive, site):
+        self.archive = archive
+        self.site = site
+
+    def append(self, url, response):
+        self.archive.append(url, response, self.site)
+
+def read_index(path):
+    """
+    Returns the (url, site, offset, length) entries of an archive's index in file order. A record
+    crawled by several sites has an entry for each; pages archived without a site have None.
+    """
+    index = sqlite3.connect(index_path(path))
+    try:
+        return index.execute("SELECT url, NULLIF(site, ''), offset, length FROM records ORDER BY offset, site").fetchall()
+    finally:
+        index.close()
+
+def _extract_chunk(path, entries, backend):
+    """
+    Re-extracts a chunk of archived pages in a worker process. The archive is memory-mapped, so
+    each record is decompressed straight from the page cache without copying the file.
+
+    Args:
+        entries (list): (url, offset, length) of the records to extract.
+
+    Returns:
+        list: (offset, emails, phones) tuples.
+    """
+    results = []
+    with open(path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):  # Empty file, or a file system that cannot be mapped
+            data = None
+        try:
+            for url, offset, length in entries:
+                if data is not None:
+                    compressed = data[offset:offset + length]
+                else:
+                    f.seek(offset)
+                    compressed = f.read(length)
+                warc_headers, _, body = parse_warc_record(zlib.decompress(compressed, wbits=31))
+                try:
+                    text = body.decode(warc_headers.get('LeadScrapper-Encoding', 'utf-8'), errors='replace')
+                except LookupError:  # An encoding name this Python does not know
+                    text = body.decode('utf-8', errors='replace')
+                page = extract_page(text, url, backend)
+                results.append((offset, page.emails, page.phones))
+        finally:
+            if data is not None:
+                data.close()
+    return results
+
+def _site_record(site, contacts):
+    emails, phones = contacts
+    return {
+        'url': site,
+        'emails': list(emails),
+        'phones': list(phones),
+        'error': None if emails or phones else 'No contact info found'
+    }
+
+def reextract_archive(path, output_file, workers=None, backend=None, urls=None, group_domains=True):
+    """
+    Runs the current extraction rules over every page of an archive, in parallel across cores,
+    and writes the result records the crawl would have written.
+
+    Args:
+        path (str): The archive file written by PageArchive.
+        output_file (str): A .csv, .jsonl or .parquet results file.
+        workers (int, optional): Worker processes. Defaults to the number of CPUs; 0 runs in this process.
+        backend (str, optional): Parser backend, see PageParsers.get_backend.
+        urls (list, optional): The input rows of the crawl. Given, one record is written per row in
+            input order, fanned out from the site crawled for it (see CrawlPlan.fan_out). Rows whose
+            site has no archived pages get an error. Without it, one record is written per archived site.
+        group_domains (bool): Whether the crawl grouped the rows by domain, as ContactInfoExtractor.main.
+
+    Returns:
+        int: The number of pages re-extracted.
+    """
+    # Every stored record is extracted once, however many sites it is indexed for
+    pages = {}
+    for url, site, offset, length in read_index(path):
+        pages.setdefault(offset, (url, length, []))[2].append(site or url)
+    entries = [(url, offset, length) for offset, (url, length, _) in pages.items()]
+    chunks = [entries[i:i + CHUNK_RECORDS] for i in range(0, len(entries), CHUNK_RECORDS)]
+    workers = os.cpu_count() if workers is None else workers
+
+    # Sites in the order their first page was archived; pages archived without a site form their own record
+    sites = {}
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    try:
+        run = executor.map if executor is not None else map
+        for results in run(_extract_chunk, [path] * len(chunks), chunks, [backend] * len(chunks)):
+            for offset, emails, phones in results:
+                for site in pages[offset][2]:
+                    contacts = sites.setdefault(site, (set(), set()))
+                    contacts[0].update(emails)
+                    contacts[1].update(phones)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    with open_result_writer(output_file) as writer:
+        if urls is None:
+            for site, contacts in sites.items():
+                writer.write(_site_record(site, contacts))
+        else:
+            if group_domains:
+                plan = plan_sites(urls)
+            else:
+                plan = [SiteGroup(url.strip(), url.strip(), [], [position], [url]) for position, url in enumerate(urls)]
+            records = {}
+            for group in plan:
+                if group.url in sites:
+                    record = _site_record(group.url, sites[group.url])
+                else:
+                    record = {'url': group.url, 'emails': [], 'phones': [], 'error': 'No archived pages'}
+                records.update(fan_out(group, record))
+            for position in sorted(records):
+                writer.write(records[position])
+    logger.info("Re-extracted %d archived pages of %d sites into %s", len(entries), len(sites), output_file)
+    return len(entries)
+
+if __name__ == "__main__":
+    from ContactInfoExtractor import read_input_urls
+
+    archive_file = '../resources/sheets/pages.warc.gz'  # Written by ContactInfoExtractor.main with archive_file set
+    input_file = '../resources/sheets/collected_urls-dev.xlsx'  # The input file of the crawl, for one record per row
+    output_file = '../resources/sheets/contact_details_reextracted.jsonl'
+    max_sites = 5  # As in the crawl
+    with crawl_logging(log_dir='../logs'):
+        reextract_archive(archive_file, output_file, urls=read_input_urls(input_file, max_sites))
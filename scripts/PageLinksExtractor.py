@@ -1,92 +1,72 @@
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urldefrag, urljoin, urlparse
 from collections import deque
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-def get_sitemap_urls(url):
-    sitemap_urls = set()
-    sitemap_url = urljoin(url, '/sitemap.xml')  # Common sitemap URL
-    logger.info(f"Fetching sitemap from {sitemap_url}")
-
-    try:
-        response = requests.get(sitemap_url)
-        response.raise_for_status()
+from CrawlFrontier import is_page_url
+from HttpClient import DEFAULT_TIMEOUT, get_shared_session, read_page
+from PageParsers import extract_anchors
+from Politeness import PolitenessScheduler
+from SitemapReader import iter_sitemap_urls
+from UrlNormalizer import VisitedSet
 
-        # Check if content is XML
-        if 'xml' in response.headers.get('Content-Type', ''):
-            soup = BeautifulSoup(response.content, 'lxml-xml')  # Use 'lxml-xml' parser for XML
-            for loc in soup.find_all('loc'):
-                sitemap_urls.add(loc.text.strip())
-            logger.info(f"Found {len(sitemap_urls)} URLs in sitemap")
-        else:
-            logger.warning("Sitemap is not in XML format")
-
-    except requests.RequestException as e:
-        logger.error(f"Error fetching sitemap: {e}")
-
-    return sitemap_urls
+logger = logging.getLogger(__name__)
 
-def crawl_website(start_url):
-    visited_urls = set()
+def crawl_website(start_url, parser_backend=None, politeness=None):
+    # Links are marked when first queued; equivalent URLs (scheme, trailing slash, fragment,
+    # tracking parameters) are only queued and reported once
+    session = get_shared_session()
+    politeness = politeness or PolitenessScheduler(session)
+    seen_urls = VisitedSet([start_url])
     urls_to_visit = deque([start_url])
     all_links = set()
 
-    logger.info(f"Starting crawl on {start_url}")
+    logger.info("Starting crawl on %s", start_url)
 
     while urls_to_visit:
         url = urls_to_visit.popleft()
-
-        if url in visited_urls:
+        if not politeness.allowed(url):
+            logger.info("Skipping %s: disallowed by robots.txt", url)
             continue
-
-        visited_urls.add(url)
-        logger.info(f"Visiting {url}")
+        logger.info("Visiting %s", url)
 
         try:
-            response = requests.get(url)
+            response = politeness.get(session, url, timeout=DEFAULT_TIMEOUT, stream=True)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            base_url = urlparse(url).scheme + "://" + urlparse(url).hostname
+            read_page(response)
 
-            for a_tag in soup.find_all('a', href=True):
-                href = a_tag['href']
-                full_url = urljoin(base_url, href)
+            for href, _, _ in extract_anchors(response.text, parser_backend):
+                full_url, _ = urldefrag(urljoin(url, href))
                 parsed_url = urlparse(full_url)
 
-                # Filter out fragment-only URLs and ensure the URL is within the same domain
-                if parsed_url.fragment:
-                    continue
-
-                if parsed_url.netloc == urlparse(start_url).netloc:
-                    if full_url not in visited_urls and full_url not in urls_to_visit:
-                        urls_to_visit.append(full_url)
+                # Ensure the URL is within the same domain; documents and media are listed but not fetched
+                if parsed_url.netloc == urlparse(start_url).netloc and seen_urls.add(full_url):
                     all_links.add(full_url)
+                    if is_page_url(full_url):
+                        urls_to_visit.append(full_url)
 
         except requests.RequestException as e:
-            logger.error(f"Error fetching {url}: {e}")
+            logger.error("Error fetching %s: %s", url, e)
 
-    logger.info(f"Crawl completed with {len(all_links)} unique URLs found")
+    logger.info("Crawl completed with %d unique URLs found", len(all_links))
     return all_links
 
 def main(start_url):
-    urls = get_sitemap_urls(start_url)
+    politeness = PolitenessScheduler()
+    urls = set(iter_sitemap_urls(start_url, politeness=politeness))
     # urls = None
 
     if not urls:
         logger.info("Sitemap not found or empty. Crawling website...")
-        urls = crawl_website(start_url)
+        urls = crawl_website(start_url, politeness=politeness)
 
     for url in sorted(urls):
         print(url)
     logger.info("Processing completed")
 
 if __name__ == "__main__":
+    # Configure logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     # Replace this URL with the website you want to scrape
     website_url = "https://www.opendining.net/"
     main(website_url)
@@ -0,0 +1,160 @@
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:  # The lxml backend is optional
+    lxml = None
+
+# Elements that never have content, so a start tag never needs a matching end tag
+VOID_ELEMENTS = frozenset({'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed', 'frame', 'hr', 'image',
+                           'img', 'input', 'isindex', 'keygen', 'link', 'menuitem', 'meta', 'nextid', 'param', 'source',
+                           'spacer', 'track', 'wbr'})
+
+def parse_page(html):
+    """
+    Parses an HTML document into a full BeautifulSoup tree.
+
+    Args:
+        html (str): The HTML content to parse.
+
+    Returns:
+        BeautifulSoup: The parsed document.
+    """
+    return BeautifulSoup(html, 'html.parser')
+
+def _anchor_text(strings):
+    return ' '.join(text for text in (string.strip() for string in strings) if text)
+
+def bs4_anchors(html):
+    """
+    Extracts the anchors of a page from a full BeautifulSoup tree. The slowest backend, kept as
+    the reference the others are checked against.
+
+    Args:
+        html (str): The HTML content of the page.
+
+    Returns:
+        list: (href, anchor text, in footer) tuples for every <a href>, in document order.
+    """
+    soup = parse_page(html)
+    footer_links = {id(link) for footer in soup.find_all('footer') for link in footer.find_all('a', href=True)}
+    return [(link['href'], link.get_text(' ', strip=True), id(link) in footer_links) for link in soup.find_all('a', href=True)]
+
+def lxml_anchors(html):
+    """
+    Extracts the anchors of a page with lxml's C parser. See bs4_anchors.
+
+    libxml2 repairs broken markup its own way: an <a> opened inside another one closes it, and
+    of duplicate href attributes the first one wins.
+    """
+    try:
+        root = lxml.html.fromstring(html)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        root = lxml.html.fromstring(html.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+    except lxml.etree.ParserError:  # Empty or whitespace-only document
+        return []
+
+    footer_links = {link for footer in root.iter('footer') for link in footer.iter('a')}
+    return [(link.get('href'), _anchor_text(link.itertext()), link in footer_links)
+            for link in root.iter('a') if link.get('href') is not None]
+
+class _AnchorTokenizer(HTMLParser):
+    """
+    Streams through a page and collects its anchors without building a tree. Only the stack of
+    open tags is kept, so end tags close elements the same way BeautifulSoup's html.parser tree does.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.anchors = []
+        self._open_tags = []  # (tag, index into anchors or None)
+        self._open_anchors = []  # Indexes of the anchors currently open
+        self._footer_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        index = None
+        if tag == 'a':
+            href = None
+            for name, value in attrs:
+                if name == 'href':
+                    href = value or ''  # The last duplicate wins, as in BeautifulSoup
+            if href is not None:
+                index = len(self.anchors)
+                self.anchors.append((href, [], self._footer_depth > 0))
+                self._open_anchors.append(index)
+        elif tag == 'footer':
+            self._footer_depth += 1
+        self._open_tags.append((tag, index))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        # An end tag closes everything opened after its start tag; stray end tags are ignored
+        for position in range(len(self._open_tags) - 1, -1, -1):
+            if self._open_tags[position][0] == tag:
+                break
+        else:
+            return
+        while len(self._open_tags) > position:
+            self._close(*self._open_tags.pop())
+
+    def _close(self, tag, index):
+        if index is not None:
+            self._open_anchors.remove(index)
+        elif tag == 'footer':
+            self._footer_depth -= 1
+
+    def handle_data(self, data):
+        for index in self._open_anchors:
+            self.anchors[index][1].append(data)
+
+def stream_anchors(html):
+    """
+    Extracts the anchors of a page with a streaming tokenizer from the standard library. See bs4_anchors.
+    """
+    tokenizer = _AnchorTokenizer()
+    tokenizer.feed(html)
+    tokenizer.close()
+    return [(href, _anchor_text(parts), in_footer) for href, parts, in_footer in tokenizer.anchors]
+
+BACKENDS = {
+    'bs4': bs4_anchors,
+    'lxml': lxml_anchors,
+    'stream': stream_anchors,
+}
+
+DEFAULT_BACKEND = 'lxml' if lxml is not None else 'stream'
+
+def get_backend(name=None):
+    """
+    Returns the anchor extractor of a parser backend.
+
+    Args:
+        name (str, optional): 'lxml', 'stream' or 'bs4'. Defaults to DEFAULT_BACKEND.
+
+    Returns:
+        function: Takes the HTML of a page and returns its (href, anchor text, in footer) tuples.
+    """
+    name = name or DEFAULT_BACKEND
+    if name == 'lxml' and lxml is None:
+        raise ValueError("The lxml parser backend requires lxml (pip install lxml)")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown parser backend: {name} (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name]
+
+def extract_anchors(html, backend=None):
+    """
+    Extracts every <a href> of a page with the given parser backend, see get_backend.
+
+    Returns:
+        list: (href, anchor text, in footer) tuples, in document order.
+    """
+    return get_backend(backend)(html)
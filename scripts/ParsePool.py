@@ -0,0 +1,146 @@
+import hashlib
+import os
+import time
+
+import ContactMatcher
+import PageParsers
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin, urlparse
+from ContactMatcher import find_emails, find_mailto_emails, find_phones
+from PageParsers import DEFAULT_BACKEND, extract_anchors, get_backend
+
+ParsedPage = namedtuple('ParsedPage', ['emails', 'phones', 'links'])
+ParsedPage.__doc__ = """
+Everything the crawl needs from one page: lists of emails and phone numbers, and the same-host
+links as (url, anchor text, in footer) tuples. Small enough to send back from a worker process.
+"""
+
+def _source_digest(*paths):
+    digest = hashlib.blake2b(digest_size=8)
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+# Identifies the extraction rules: a digest of the matchers, the parsers and the link filtering below,
+# so results stored by an older version of any of them (see HttpCache.extraction) are never reused
+EXTRACTOR_VERSION = _source_digest(ContactMatcher.__file__, PageParsers.__file__, __file__)
+
+def extractor_key(backend=None):
+    """
+    Returns the key that identifies what extract_page yields with the given parser backend.
+    """
+    return f'{EXTRACTOR_VERSION}/{backend or DEFAULT_BACKEND}'
+
+def extract_links(anchors, page_url):
+    """
+    Resolves the anchors of a page and keeps the links that stay on the page's host.
+
+    Args:
+        anchors (list): (href, anchor text, in footer) tuples, see PageParsers.extract_anchors.
+        page_url (str): The URL the page was fetched from, used to resolve relative links.
+
+    Returns:
+        list: (url, anchor text, in footer) tuples for the same-host links, in document order.
+    """
+    hostname = urlparse(page_url).hostname
+    links = []
+    for href, anchor_text, in_footer in anchors:
+        link_url = urljoin(page_url, href)
+        if urlparse(link_url).hostname == hostname:
+            links.append((link_url, anchor_text, in_footer))
+    return links
+
+def extract_page(html, page_url, backend=None):
+    """
+    Parses a page once and runs every extractor over it.
+
+    Args:
+        html (str): The HTML content of the page.
+        page_url (str): The URL the page was fetched from.
+        backend (str, optional): Parser backend, see PageParsers.get_backend.
+
+    Returns:
+        ParsedPage: The emails, phone numbers and same-host links of the page.
+    """
+    return timed_extract_page(html, page_url, backend)[0]
+
+def timed_extract_page(html, page_url, backend=None):
+    """
+    Like extract_page, but also reports where the time went.
+
+    Returns:
+        tuple: The ParsedPage, the seconds spent parsing the document and the seconds spent
+        running the extractors and resolving the links.
+    """
+    start_time = time.perf_counter()
+    anchors = extract_anchors(html, backend)
+    parsed_at = time.perf_counter()
+    domain = urlparse(page_url).hostname
+
+    emails = find_emails(html, domain)
+    emails |= find_mailto_emails((href for href, _, _ in anchors), domain)
+    phones = find_phones(html)
+
+    page = ParsedPage(list(emails), list(phones), extract_links(anchors, page_url))
+    return page, parsed_at - start_time, time.perf_counter() - parsed_at
+
+class ParsePool:
+    """
+    Pipeline stage that parses pages and extracts contacts on a pool of worker processes.
+
+    Fetching stays on the crawl threads; each thread hands the downloaded HTML to `extract` and
+    blocks until a worker returns the compact ParsedPage, so parsing uses every core instead of
+    competing for the GIL with the crawl threads.
+
+    Args:
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs;
+            0 parses in the calling thread without starting any processes.
+        backend (str, optional): Parser backend, see PageParsers.get_backend.
+    """
+
+    def __init__(self, workers=None, backend=None):
+        get_backend(backend)  # Fail on an unknown or missing backend before any page is fetched
+        self.workers = os.cpu_count() if workers is None else workers
+        self.backend = backend
+        self._executor = None
+        if self.workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            # Start the workers now, before the crawl threads, rather than on the first page
+            self._executor.submit(int).result()
+
+    def extract(self, html, page_url):
+        """
+        Parses a page on the pool, see extract_page.
+
+        Returns:
+            ParsedPage: The emails, phone numbers and same-host links of the page.
+        """
+        return self.timed_extract(html, page_url)[0]
+
+    def timed_extract(self, html, page_url):
+        """
+        Parses a page on the pool, see timed_extract_page.
+
+        Returns:
+            tuple: The ParsedPage, and the seconds the worker spent parsing and extracting.
+        """
+        if self._executor is None:
+            return timed_extract_page(html, page_url, self.backend)
+        return self._executor.submit(timed_extract_page, html, page_url, self.backend).result()
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,291 @@
+import logging
+import threading
+import time
+import requests
+
+from collections import OrderedDict, defaultdict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+from HttpClient import DEFAULT_TIMEOUT, USER_AGENT, get_shared_session
+
+logger = logging.getLogger(__name__)
+
+# Responses that tell the crawler to slow down
+THROTTLE_STATUSES = frozenset({429, 503})
+
+def parse_retry_after(value, now=None):
+    """
+    Parses a Retry-After header, given either as seconds or as an HTTP date.
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - (now or time.time()))
+
+class RobotsCache:
+    """
+    Fetches, parses and caches the robots.txt of every host the crawl touches.
+
+    Status codes are read as urllib.robotparser reads them: a robots.txt answered with 401 or 403
+    disallows the whole site, and one that is missing (any other 4xx) or cannot be fetched allows
+    everything. A 5xx answer is a temporary failure: the host's previous rules stay in force, or the
+    whole site is disallowed if there are none, and the file is fetched again after `error_ttl`
+    seconds. Each host's file is fetched once per `ttl` seconds even when many threads ask for it at
+    the same time, and at most `max_hosts` parsed files are kept.
+    """
+
+    def __init__(self, session=None, user_agent=USER_AGENT, ttl=24 * 3600, max_hosts=10000, error_ttl=300):
+        self.session = session or get_shared_session()
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.max_hosts = max_hosts
+        self._entries = OrderedDict()  # host -> (expires at, RobotFileParser)
+        self._lock = threading.Lock()
+        self._host_locks = defaultdict(threading.Lock)
+
+    def _fetch(self, robots_url, previous=None):
+        """
+        Fetches and parses one robots.txt.
+
+        Returns:
+            tuple: The RobotFileParser and the seconds it is valid for.
+        """
+        parser = RobotFileParser(robots_url)
+        try:
+            response = self.session.get(robots_url, timeout=DEFAULT_TIMEOUT)
+            status = response.status_code
+        except requests.exceptions.RetryError:  # The retry policy gave up on 5xx answers
+            status = 500
+        except requests.RequestException as e:
+            logger.info("No robots.txt at %s: %s", robots_url, e)
+            parser.allow_all = True
+            return parser, self.ttl
+
+        if status >= 500:
+            logger.warning("robots.txt at %s failed with status %s, %s until it is fetched again in %g seconds",
+                           robots_url, status, 'keeping the previous rules' if previous else 'disallowing the site',
+                           self.error_ttl)
+            if previous is not None:
+                return previous, self.error_ttl
+            parser.disallow_all = True
+            return parser, self.error_ttl
+        if status in (401, 403):
+            logger.info("robots.txt at %s is forbidden (status %s), disallowing the site", robots_url, status)
+            parser.disallow_all = True
+        elif status >= 400:
+            logger.info("No robots.txt at %s: status %s", robots_url, status)
+            parser.allow_all = True
+        else:
+            parser.parse(response.text.splitlines())
+        return parser, self.ttl
+
+    def rules(self, url):
+        """
+        Returns the parsed robots.txt for the host of the given URL, fetching it if needed.
+
+        Returns:
+            RobotFileParser: The host's rules.
+        """
+        parsed = urlparse(url)
+        host = f'{parsed.scheme}://{parsed.netloc}'
+        with self._lock:
+            host_lock = self._host_locks[host]
+
+        with host_lock:
+            with self._lock:
+                entry = self._entries.get(host)
+                if entry is not None and time.time() < entry[0]:
+                    self._entries.move_to_end(host)
+                    return entry[1]
+
+            parser, ttl = self._fetch(urljoin(host, '/robots.txt'), entry[1] if entry is not None else None)
+
+            with self._lock:
+                self._entries[host] = (time.time() + ttl, parser)
+                self._entries.move_to_end(host)
+                while len(self._entries) > self.max_hosts:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._host_locks.pop(evicted, None)
+            return parser
+
+    def allowed(self, url):
+        """
+        Returns whether robots.txt lets the crawler fetch the given URL.
+        """
+        return self.rules(url).can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url):
+        """
+        Returns the seconds to wait between requests asked for by the host's robots.txt, or None.
+        """
+        rules = self.rules(url)
+        delay = rules.crawl_delay(self.user_agent)
+        if delay is not None:
+            return float(delay)
+        rate = rules.request_rate(self.user_agent)
+        if rate is not None and rate.requests:
+            return rate.seconds / rate.requests
+        return None
+
+    def sitemaps(self, url):
+        """
+        Returns the sitemap URLs declared in the host's robots.txt, in file order.
+        """
+        robots_url = urljoin(url, '/robots.txt')
+        return [urljoin(robots_url, sitemap) for sitemap in self.rules(url).site_maps() or []]
+
+class HostThrottle:
+    """
+    Token bucket for one host with additive-increase, multiplicative-decrease rate control.
+
+    Every request takes a token; tokens refill at `rate` per second up to `burst`. A throttling
+    response halves the rate and blocks the host for the Retry-After time (or an exponential
+    backoff), and every normal response nudges the rate back up towards `max_rate`.
+    """
+
+    def __init__(self, max_rate, burst, min_rate, backoff_base, max_backoff):
+        self.max_rate = max_rate
+        self.rate = max_rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.consecutive_throttles = 0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Takes a token and returns the seconds the caller must sleep before sending its request.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            # Tokens may go negative; the debt is what later callers wait for
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(delay, self.blocked_until - now)
+
+    def throttled(self, retry_after=None):
+        with self.lock:
+            self.consecutive_throttles += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after is None:
+                retry_after = self.backoff_base * 2 ** (self.consecutive_throttles - 1)
+            backoff = min(retry_after, self.max_backoff)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + backoff)
+            self.tokens = min(self.tokens, 0)
+            return backoff
+
+    def succeeded(self):
+        with self.lock:
+            self.consecutive_throttles = 0
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+class PolitenessScheduler:
+    """
+    Per-host politeness for the crawlers: robots.txt rules, Crawl-delay, a token bucket per host
+    and adaptive backoff on 429/503 responses.
+
+    Requests to different hosts never wait on each other, so throughput grows with the number of
+    hosts crawled at once while every single host sees a steady request rate.
+
+    Args:
+        session (requests.Session, optional): Session used to fetch robots.txt files.
+        rate (float): Requests per second sent to a host that sets no Crawl-delay.
+        burst (int): Requests a host may receive back to back before the rate applies.
+        min_rate (float): Lowest rate adaptive backoff slows a host down to.
+        backoff_base (float): First backoff in seconds after a throttling response without Retry-After.
+        max_backoff (float): Upper bound in seconds on any single backoff, Retry-After included.
+        max_attempts (int): Attempts per page while the host keeps answering 429/503.
+        respect_robots (bool): Whether to skip URLs that robots.txt disallows.
+    """
+
+    def __init__(self, session=None, rate=2.0, burst=2, min_rate=1 / 60, backoff_base=5.0, max_backoff=300.0,
+                 max_attempts=3, respect_robots=True):
+        self.robots = RobotsCache(session)
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.respect_robots = respect_robots
+        self._throttles = {}
+        self._lock = threading.Lock()
+
+    def _throttle(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            throttle = self._throttles.get(host)
+        if throttle is not None:
+            return throttle
+
+        # Crawl-delay caps the rate and rules out bursts; looked up outside the lock since it may fetch robots.txt
+        max_rate, burst = self.rate, self.burst
+        delay = self.robots.crawl_delay(url) if self.respect_robots else None
+        if delay:
+            max_rate, burst = min(max_rate, 1 / delay), 1
+        with self._lock:
+            return self._throttles.setdefault(host, HostThrottle(max_rate, burst, min(self.min_rate, max_rate),
+                                                                 self.backoff_base, self.max_backoff))
+
+    def allowed(self, url):
+        """
+        Returns whether robots.txt lets the crawler fetch the given URL.
+        """
+        return not self.respect_robots or self.robots.allowed(url)
+
+    def wait(self, url):
+        """
+        Blocks until the URL's host may receive another request.
+        """
+        delay = self._throttle(url).reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, url, response):
+        """
+        Feeds a response back into the host's rate.
+
+        Returns:
+            bool: True if the host asked the crawler to slow down (429 or 503).
+        """
+        throttle = self._throttle(url)
+        if response.status_code not in THROTTLE_STATUSES:
+            throttle.succeeded()
+            return False
+
+        backoff = throttle.throttled(parse_retry_after(response.headers.get('Retry-After')))
+        logger.warning("%s answered %d; backing off for %.1f seconds and slowing to %.2f requests per second",
+                       urlparse(url).netloc, response.status_code, backoff, throttle.rate)
+        return True
+
+    def get(self, session, url, **kwargs):
+        """
+        Sends a GET request at the host's pace, retrying while the host answers 429/503.
+
+        Returns:
+            requests.Response: The last response received, with the number of requests sent in `attempts`.
+        """
+        for attempt in range(self.max_attempts):
+            self.wait(url)
+            response = session.get(url, **kwargs)
+            response.attempts = attempt + 1
+            if not self.record(url, response) or attempt == self.max_attempts - 1:
+                return response
+            response.close()
@@ -0,0 +1,213 @@
+import logging
+import random
+import threading
+import time
+import requests
+
+from concurrent.futures import ThreadPoolExecutor
+from HttpClient import DEFAULT_TIMEOUT, create_session
+
+logger = logging.getLogger(__name__)
+
+def check_proxy(proxy, test_url, timeout=5, session=requests):
+    """
+    Tests a single proxy by making a request to a test URL through it.
+
+    Args:
+        proxy (str): The proxy address (host:port).
+        test_url (str): The URL to request through the proxy.
+        timeout (int): Timeout for the test request in seconds.
+        session (requests.Session, optional): The session to use for making requests.
+
+    Returns:
+        float: The request latency in seconds, or None if the proxy failed.
+    """
+    proxy_url = f'http://{proxy}'
+    proxies_dict = {
+        'http': proxy_url,
+        'https': proxy_url,
+    }
+    start_time = time.time()
+    try:
+        response = session.get(test_url, proxies=proxies_dict, timeout=timeout)
+        if response.status_code == 200:
+            return time.time() - start_time
+        logger.debug("Proxy %s failed with status code %s", proxy, response.status_code)
+    except requests.RequestException as e:
+        logger.debug("Proxy %s failed: %s", proxy, e)
+    return None
+
+class ProxyStats:
+    """
+    Running success and latency figures for one proxy.
+    """
+
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency = None  # Exponentially weighted moving average, in seconds
+        self.quarantined_until = 0
+
+    @property
+    def success_rate(self):
+        # Laplace smoothing so that untested proxies rank between good and bad ones
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    def sort_key(self):
+        return (-self.success_rate, self.latency if self.latency is not None else float('inf'))
+
+class ProxyPool:
+    """
+    Long-lived pool of proxies fetched from a proxy-list endpoint.
+
+    The list is refreshed when it is older than `ttl` seconds. Every proxy keeps a success rate
+    and latency. `get` spreads requests over the proxies within `latency_band` seconds of the fastest
+    one, weighted by success rate, so no single proxy takes all the traffic. Proxies that fail
+    `quarantine_after` times in a row are left out for `quarantine_time` seconds. A background
+    thread re-checks the whole list concurrently every `check_interval` seconds.
+    """
+
+    def __init__(self, list_url, test_url='http://www.google.com', ttl=600, check_interval=120,
+                 check_workers=20, check_timeout=5, quarantine_after=3, quarantine_time=300, session=None, latency_band=0.2):
+        self.list_url = list_url
+        # Health checks must fail fast, so the pool's own requests are never retried
+        self.session = session or create_session(retries=False, pool_maxsize=check_workers)
+        self.test_url = test_url
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.check_workers = check_workers
+        self.check_timeout = check_timeout
+        self.quarantine_after = quarantine_after
+        self.quarantine_time = quarantine_time
+        self.latency_band = latency_band
+
+        self.stats = {}
+        self.fetched_at = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def fetch_proxy_list(self):
+        """
+        Fetches the current proxy list from the list endpoint.
+
+        Returns:
+            list: Proxy addresses (host:port).
+        """
+        response = self.session.get(self.list_url, timeout=DEFAULT_TIMEOUT)
+        response.raise_for_status()
+        return [proxy.strip() for proxy in response.text.split('\n') if proxy.strip()]
+
+    def refresh(self, force=False):
+        """
+        Re-fetches the proxy list if it is older than the TTL. Stats of proxies that stay on the list are kept.
+        """
+        with self._refresh_lock:
+            if not force and self.fetched_at is not None and time.time() - self.fetched_at < self.ttl:
+                return
+            try:
+                proxies = self.fetch_proxy_list()
+            except requests.RequestException as e:
+                logger.error("Error fetching proxy list: %s", e)
+                return
+            with self._lock:
+                self.stats = {proxy: self.stats.get(proxy) or ProxyStats() for proxy in proxies}
+                self.fetched_at = time.time()
+            logger.info("Proxy pool refreshed with %d proxies", len(proxies))
+
+    def check_health(self):
+        """
+        Tests every proxy in the pool concurrently and records the outcome.
+        """
+        with self._lock:
+            proxies = list(self.stats)
+        if not proxies:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.check_workers) as executor:
+            latencies = executor.map(lambda proxy: check_proxy(proxy, self.test_url, self.check_timeout, self.session), proxies)
+            for proxy, latency in zip(proxies, latencies):
+                if latency is None:
+                    self.report_failure(proxy)
+                else:
+                    self.report_success(proxy, latency)
+
+        logger.info("Proxy health check finished: %d/%d proxies usable", len(self.healthy_proxies()), len(proxies))
+
+    def healthy_proxies(self):
+        """
+        Returns the proxies that are not quarantined, healthiest first.
+        """
+        now = time.time()
+        with self._lock:
+            available = [(stats.sort_key(), proxy) for proxy, stats in self.stats.items() if stats.quarantined_until <= now]
+        return [proxy for _, proxy in sorted(available)]
+
+    def get(self):
+        """
+        Returns one of the fastest available proxies, refreshing the list first if needed.
+
+        The proxy is picked at random among those within `latency_band` seconds of the fastest one,
+        weighted by success rate. Before any proxy has been measured, all available proxies are candidates.
+
+        Returns:
+            str: A proxy address, or None if no proxy is available.
+        """
+        self.start()
+        self.refresh()
+        now = time.time()
+        with self._lock:
+            available = [(proxy, stats.success_rate, stats.latency) for proxy, stats in self.stats.items()
+                         if stats.quarantined_until <= now]
+        if not available:
+            return None
+        measured = [latency for _, _, latency in available if latency is not None]
+        if measured:
+            fastest = min(measured)
+            available = [entry for entry in available if entry[2] is not None and entry[2] <= fastest + self.latency_band]
+        proxies, weights, _ = zip(*available)
+        return random.choices(proxies, weights)[0]
+
+    def report_success(self, proxy, latency):
+        with self._lock:
+            stats = self.stats.get(proxy)
+            if stats is None:
+                return
+            stats.successes += 1
+            stats.consecutive_failures = 0
+            stats.latency = latency if stats.latency is None else 0.7 * stats.latency + 0.3 * latency
+
+    def report_failure(self, proxy):
+        with self._lock:
+            stats = self.stats.get(proxy)
+            if stats is None:
+                return
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= self.quarantine_after:
+                stats.quarantined_until = time.time() + self.quarantine_time
+                stats.consecutive_failures = 0
+                logger.info("Proxy %s quarantined for %s seconds", proxy, self.quarantine_time)
+
+    def start(self):
+        """
+        Starts the background refresh and health-check thread if it is not running yet.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='proxy-pool', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self.check_health()
+            self._stop.wait(self.check_interval)
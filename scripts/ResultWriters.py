@@ -0,0 +1,186 @@
+import csv
+import json
+import os
+import time
+
+FIELDS = ['url', 'emails', 'phones', 'error']
+LIST_FIELDS = ('emails', 'phones')
+
+class ResultWriter:
+    """
+    Appends result records to a file as they are produced, flushing every `flush_every` records
+    or `flush_interval` seconds, whichever comes first. With `keep_positions` set, the input
+    position passed with each record is stored as well (JSON lines only), so that export_excel can
+    put records that arrive in completion order back in input order.
+
+    Subclasses implement `_write` and `_flush`; use as a context manager or call `close`.
+    """
+
+    def __init__(self, path, flush_every=50, flush_interval=10, keep_positions=False):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.keep_positions = keep_positions
+        self.records_written = 0
+        self._pending = 0
+        self._last_flush = time.time()
+
+    def write(self, record, position=None):
+        if self.keep_positions and position is not None:
+            record = dict(record, position=position)
+        self._write(record)
+        self.records_written += 1
+        self._pending += 1
+        if self._pending >= self.flush_every or time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._flush()
+        self._pending = 0
+        self._last_flush = time.time()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class CsvResultWriter(ResultWriter):
+    """
+    Writes records as CSV rows. Email and phone lists are stored as JSON arrays.
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDS)
+        self._writer.writeheader()
+
+    def _write(self, record):
+        row = {field: record.get(field) for field in FIELDS}
+        for field in LIST_FIELDS:
+            row[field] = json.dumps(row[field] or [])
+        self._writer.writerow(row)
+
+    def _flush(self):
+        self._file.flush()
+
+    def close(self):
+        super().close()
+        self._file.close()
+
+class JsonLinesResultWriter(ResultWriter):
+    """
+    Writes one JSON object per line, with the record's input position when one is kept.
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def _write(self, record):
+        line = {field: record.get(field) for field in FIELDS}
+        if 'position' in record:
+            line['position'] = record['position']
+        self._file.write(json.dumps(line) + '\n')
+
+    def _flush(self):
+        self._file.flush()
+
+    def close(self):
+        super().close()
+        self._file.close()
+
+class ParquetResultWriter(ResultWriter):
+    """
+    Writes records to a Parquet file, one row group per flush. Requires pyarrow.
+    """
+
+    def __init__(self, path, **kwargs):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow: pip install pyarrow")
+
+        super().__init__(path, **kwargs)
+        self._pa = pa
+        self._schema = pa.schema([
+            ('url', pa.string()),
+            ('emails', pa.list_(pa.string())),
+            ('phones', pa.list_(pa.string())),
+            ('error', pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._rows = []
+
+    def _write(self, record):
+        self._rows.append({field: record.get(field) for field in FIELDS})
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        super().close()
+        self._writer.close()
+
+WRITERS = {
+    '.csv': CsvResultWriter,
+    '.jsonl': JsonLinesResultWriter,
+    '.parquet': ParquetResultWriter,
+}
+
+def open_result_writer(path, **kwargs):
+    """
+    Opens the streaming writer matching the file extension of `path` (.csv, .jsonl or .parquet).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"Unsupported results format '{extension}', expected one of {', '.join(WRITERS)}")
+    return WRITERS[extension](path, **kwargs)
+
+def read_records(path):
+    """
+    Streams the records back from a file written by one of the result writers.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                for field in LIST_FIELDS:
+                    row[field] = json.loads(row[field])
+                row['error'] = row['error'] or None
+                yield row
+    elif extension == '.jsonl':
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif extension == '.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unsupported results format '{extension}'")
+
+def export_excel(results_path, excel_path):
+    """
+    Converts a streamed results file into the contact_details.xlsx layout.
+
+    Records that carry their input position (see ResultWriter) are written in input order, so the
+    rows line up with the input sheet however the crawl finished; the others keep the file's order.
+    Lists are written the way pandas wrote them before, e.g. "['a@b.com']".
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(FIELDS)
+    for record in sorted(read_records(results_path), key=lambda record: record.get('position', 0)):
+        sheet.append([str(record[field]) if field in LIST_FIELDS else record[field] for field in FIELDS])
+    workbook.save(excel_path)
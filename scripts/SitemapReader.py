@@ -0,0 +1,152 @@
+import gzip
+import logging
+import requests
+import urllib3
+
+from collections import deque
+from urllib.parse import urljoin
+from xml.etree.ElementTree import ParseError, iterparse
+from HttpClient import DEFAULT_TIMEOUT, get_shared_session
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+def _local_name(tag):
+    """
+    Strips the XML namespace from an element tag, e.g. '{http://...}loc' -> 'loc'.
+    """
+    return tag.rsplit('}', 1)[-1]
+
+def get_robots_sitemaps(url, session=None):
+    """
+    Reads the `Sitemap:` lines of the site's robots.txt.
+
+    Args:
+        url (str): Any URL on the site.
+        session (requests.Session, optional): The session to use for making requests.
+
+    Returns:
+        list: The sitemap URLs declared in robots.txt, in file order.
+    """
+    session = session or get_shared_session()
+    robots_url = urljoin(url, '/robots.txt')
+    try:
+        response = session.get(robots_url, timeout=DEFAULT_TIMEOUT)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logger.info("No robots.txt at %s: %s", robots_url, e)
+        return []
+
+    sitemaps = []
+    for line in response.text.splitlines():
+        key, _, value = line.partition(':')
+        if key.strip().lower() == 'sitemap' and value.strip():
+            sitemaps.append(urljoin(url, value.strip()))
+    return sitemaps
+
+class _PrefixedStream:
+    """
+    Read-only file object that replays a few already-consumed bytes before the rest of a stream.
+    """
+
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def read(self, size=-1):
+        if not self.prefix:
+            return self.stream.read(size)
+        if size is None or size < 0:
+            data, self.prefix = self.prefix + self.stream.read(), b''
+            return data
+        data, self.prefix = self.prefix[:size], self.prefix[size:]
+        if len(data) < size:
+            data += self.stream.read(size - len(data))
+        return data
+
+def _open_sitemap_stream(response):
+    """
+    Wraps a streamed sitemap response in a file object, decompressing gzip on the fly.
+
+    Content-Encoding is undone by urllib3; `.xml.gz` files served as plain bytes are
+    recognised by their magic number.
+    """
+    response.raw.decode_content = True
+    stream = _PrefixedStream(response.raw.read(len(GZIP_MAGIC)), response.raw)
+    if stream.prefix == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+def _iter_sitemap_file(sitemap_url, session, politeness=None):
+    """
+    Streams one sitemap file and yields ('url' | 'sitemap', location) pairs for its entries.
+
+    Elements are discarded as soon as they are read, so memory stays flat however large the file is.
+    With `politeness` set the request goes through PolitenessScheduler.get, so a 429 or 503 answer
+    slows the host down for the crawl as well.
+    """
+    if politeness is not None:
+        response = politeness.get(session, sitemap_url, timeout=DEFAULT_TIMEOUT, stream=True)
+    else:
+        response = session.get(sitemap_url, timeout=DEFAULT_TIMEOUT, stream=True)
+    with response:
+        response.raise_for_status()
+        root = None
+        kind = None
+        for event, element in iterparse(_open_sitemap_stream(response), events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = element
+                    kind = 'sitemap' if _local_name(element.tag) == 'sitemapindex' else 'url'
+                continue
+
+            name = _local_name(element.tag)
+            if name == 'loc' and element.text and element.text.strip():
+                yield kind, element.text.strip()
+            elif name in ('url', 'sitemap'):
+                root.clear()
+
+def iter_sitemap_urls(url, session=None, max_sitemaps=1000, politeness=None):
+    """
+    Yields the page URLs listed in a site's sitemaps.
+
+    Sitemaps are taken from robots.txt, falling back to /sitemap.xml. Sitemap index files
+    are followed recursively and gzip-compressed sitemaps are decompressed while streaming.
+
+    Args:
+        url (str): The base URL of the site.
+        session (requests.Session, optional): The session to use for making requests.
+        max_sitemaps (int): Upper bound on the number of sitemap files read for one site.
+        politeness (Politeness.PolitenessScheduler, optional): Paces sitemap downloads with the rest of
+            the crawl and backs off when they are answered with 429/503, and supplies the cached
+            robots.txt so it is not downloaded a second time.
+
+    Yields:
+        str: Page URLs in sitemap order. URLs listed in several sitemaps may repeat.
+    """
+    session = session or get_shared_session()
+    robots_sitemaps = politeness.robots.sitemaps(url) if politeness is not None else get_robots_sitemaps(url, session)
+    sitemaps_to_read = deque(robots_sitemaps or [urljoin(url, '/sitemap.xml')])
+    seen_sitemaps = set()
+
+    while sitemaps_to_read and len(seen_sitemaps) < max_sitemaps:
+        sitemap_url = sitemaps_to_read.popleft()
+        if sitemap_url in seen_sitemaps:
+            continue
+        seen_sitemaps.add(sitemap_url)
+
+        logger.info("Fetching sitemap from %s", sitemap_url)
+        found = 0
+        try:
+            for kind, location in _iter_sitemap_file(sitemap_url, session, politeness):
+                if kind == 'sitemap':
+                    sitemaps_to_read.append(urljoin(sitemap_url, location))
+                else:
+                    found += 1
+                    yield location
+        except (requests.RequestException, urllib3.exceptions.HTTPError) as e:
+            logger.error("Error fetching sitemap: %s", e)
+        except (ParseError, OSError, EOFError) as e:
+            logger.warning("Sitemap %s is not valid XML: %s", sitemap_url, e)
+        logger.info("Found %d URLs in sitemap %s", found, sitemap_url)
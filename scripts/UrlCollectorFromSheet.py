@@ -1,48 +1,126 @@
 import pandas as pd
 import re
 
+from UrlNormalizer import normalize_url
+
+try:
+    import python_calamine  # noqa: F401  Rust workbook reader, several times faster than openpyxl
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = 'openpyxl'  # pandas opens the workbook in openpyxl's streaming read-only mode
+
+# Header of the column save_urls writes, which ContactInfoExtractor.read_input_urls reads back
+URL_COLUMN = 'URLs'
+
+# A basic URL pattern, you can use more complex patterns if needed
+URL_PATTERN = re.compile(
+    r'^(?:http|ftp)s?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|'  # ...or ipv4
+    r'\[?[A-F0-9]*:[A-F0-9:]+\]?)'  # ...or ipv6
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+
 
 # Function to check if a string is a valid URL
 def is_valid_url(url):
-    # A basic URL pattern, you can use more complex patterns if needed
-    pattern = re.compile(
-        r'^(?:http|ftp)s?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|'  # ...or ipv4
-        r'\[?[A-F0-9]*:[A-F0-9:]+\]?)'  # ...or ipv6
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-    return re.match(pattern, url) is not None
+    return URL_PATTERN.match(url) is not None
 
 
-# Path to the Excel file
-file_path = '../resources/sheets/websites_list.xlsx'
+def read_sheets(file_path, sheets=None):
+    """
+    Reads every cell of a workbook or CSV file as text.
 
-try:
-    # Read the Excel file
-    df = pd.read_excel(file_path, engine='openpyxl')
+    Args:
+        file_path (str): Path to an .xlsx/.xls workbook or a .csv file.
+        sheets (str, int or list, optional): Sheet names or positions to read. Defaults to None (every sheet).
+
+    Returns:
+        list: One DataFrame per sheet, in workbook order, without a header row.
+    """
+    if file_path.lower().endswith('.csv'):
+        return [pd.read_csv(file_path, header=None, dtype=str, keep_default_na=False, na_values=[''])]
+    frames = pd.read_excel(file_path, sheet_name=sheets, header=None, dtype=str, engine=EXCEL_ENGINE)
+    return list(frames.values()) if isinstance(frames, dict) else [frames]
+
+
+# scheme://host/path without credentials, port, query or fragment: the usual shape of a site URL in a sheet
+SIMPLE_URL_PATTERN = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*://([^/?#:@\s]+)(/[^?#]*)?$')
+
+
+def _canonical_keys(urls):
+    """
+    Returns the UrlNormalizer.normalize_url key of every URL in a Series.
+
+    Simple URLs are keyed with vectorized string operations; only URLs with a port, query,
+    fragment or credentials go through normalize_url one at a time.
+    """
+    parts = urls.str.extract(SIMPLE_URL_PATTERN)
+    simple = parts[0].notna()
+    paths = parts[1].fillna('/').str.rstrip('/').replace('', '/')
+    keys = parts[0].str.lower() + paths
+    keys[~simple] = urls[~simple].map(normalize_url)
+    return keys
+
+
+def collect_urls(frames):
+    """
+    Collects the valid URLs from the cells of the given sheets, one column at a time.
+
+    Cells are stripped of surrounding whitespace and checked with URL_PATTERN using pandas string
+    operations. URLs are deduplicated by their canonical form (see UrlNormalizer.normalize_url), so
+    'http://example.com' and 'https://example.com/' count once. The first spelling is kept, in the
+    order the cells appear: sheet by sheet, column by column, top to bottom.
+
+    Args:
+        frames (iterable): DataFrames to search, see read_sheets.
+
+    Returns:
+        list: The unique URLs in order of first appearance.
+    """
+    matches = []
+    for frame in frames:
+        for column in frame.columns:
+            cells = frame[column].dropna().astype(str)
+            # Cheap substring test first, so stripping and the regex only run on cells that can be URLs
+            cells = cells[cells.str.contains('://', regex=False)].str.strip()
+            matches.append(cells[cells.str.match(URL_PATTERN)])
+
+    if not matches:
+        return []
+    # Exact repeats go first, so only distinct spellings are normalized
+    urls = pd.concat(matches, ignore_index=True).drop_duplicates()
+    return urls[~_canonical_keys(urls).duplicated()].tolist()
+
+
+def save_urls(urls, output_path):
+    """
+    Writes the URLs to an .xlsx or .csv file, one per row under a 'URLs' header, ready to be
+    crawled by ContactInfoExtractor.main.
+    """
+    urls_df = pd.DataFrame(urls, columns=[URL_COLUMN])
+    if output_path.lower().endswith('.csv'):
+        urls_df.to_csv(output_path, index=False)
+    else:
+        urls_df.to_excel(output_path, index=False)
 
-    # Create an empty list to store URLs
-    urls = []
 
-    # Iterate through each cell in the dataframe
-    for column in df.columns:
-        for cell in df[column]:
-            if pd.notna(cell) and isinstance(cell, str) and is_valid_url(cell):
-                urls.append(cell)
+if __name__ == "__main__":
+    # Path to the Excel (or CSV) file
+    file_path = '../resources/sheets/websites_list.xlsx'
+    sheets = None  # Sheet names or positions to read; None reads every sheet
 
-    # Remove duplicates if necessary
-    urls = list(set(urls))
+    try:
+        urls = collect_urls(read_sheets(file_path, sheets))
 
-    # Print or save the collected URLs
-    print("Collected URLs:")
-    for url in urls:
-        print(url)
+        # Print or save the collected URLs
+        print("Collected URLs:")
+        for url in urls:
+            print(url)
 
-    # Optionally, save URLs to a new Excel file
-    urls_df = pd.DataFrame(urls, columns=['URLs'])
-    urls_df.to_excel('collected_urls.xlsx', index=False)
+        # Optionally, save URLs to a new Excel file
+        save_urls(urls, 'collected_urls.xlsx')
 
-except Exception as e:
-    print(f"An error occurred: {e}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
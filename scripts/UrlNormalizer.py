@@ -0,0 +1,174 @@
+import hashlib
+import ipaddress
+import math
+import threading
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+try:
+    import tldextract
+    # The Public Suffix List snapshot bundled with tldextract, never fetched at run time. Its private
+    # section makes hosts of shared platforms (a.wordpress.com, b.github.io) separate domains
+    _extract_domain = tldextract.TLDExtract(suffix_list_urls=(), include_psl_private_domains=True)
+except ImportError:
+    _extract_domain = None
+
+# Query parameters that only track the visitor and never change the page content
+TRACKING_PARAMETERS = frozenset({'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'utm_id',
+                                 'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+                                 'ref', 'ref_src', 'igshid', 'spm'})
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def normalize_url(url):
+    """
+    Returns the canonical form of a URL used to decide whether two links point at the same page.
+
+    The scheme is dropped (http and https count as the same page), the host is lowercased and
+    default ports removed, the fragment and tracking parameters are stripped, the remaining query
+    parameters are sorted, and a trailing slash is removed from the path.
+
+    The result is only a dedup key; crawlers keep fetching the URL as it was linked. A URL that
+    cannot be parsed, such as one with a port that is not a number, is its own key, so it is left
+    to the fetch to reject.
+
+    Args:
+        url (str): An absolute URL.
+
+    Returns:
+        str: The canonical key, e.g. 'example.com/contact?lang=en'.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:  # A port that is not a number or a malformed IPv6 host
+        return url.strip()
+    host = (parts.hostname or '').lower()
+    if port and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f'{host}:{port}'
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = ''
+    if parts.query:
+        parameters = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                      if key.lower() not in TRACKING_PARAMETERS]
+        query = urlencode(sorted(parameters))
+
+    return urlunsplit(('', host, path, query, '')).lstrip('/')
+
+def registrable_domain(url):
+    """
+    Returns the registrable domain of a URL, the part a company registers: 'shop.example.co.uk'
+    and 'www.example.co.uk' both give 'example.co.uk'.
+
+    Uses the Public Suffix List, including its private section, through tldextract when it is
+    installed, so the blogs and shops of shared platforms ('a.wordpress.com', 'b.myshopify.com') stay
+    apart. Without tldextract there is no safe way to tell 'shop.example.com' from 'a.wordpress.com',
+    so the host itself is returned, only without a leading 'www.'. IP addresses are returned as they
+    are. A non-default port is kept, since it usually means a different site.
+
+    Args:
+        url (str): An absolute URL.
+
+    Returns:
+        str: The domain, e.g. 'example.com' or '127.0.0.1:8080', or the stripped input if it has no host.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:  # A malformed IPv6 host
+        return url.strip()
+    host = (parts.hostname or '').lower().rstrip('.')
+    if not host:
+        return url.strip()
+
+    try:
+        ipaddress.ip_address(host)
+        domain = host
+    except ValueError:
+        domain = None
+    if domain is None and _extract_domain is not None:
+        extracted = _extract_domain(host)
+        domain = getattr(extracted, 'top_domain_under_public_suffix', None) or extracted.registered_domain or host
+    if domain is None:
+        domain = host[4:] if host.startswith('www.') and host.count('.') > 1 else host
+
+    try:
+        port = parts.port
+    except ValueError:  # A port that is not a number
+        port = None
+    if port and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        domain = f'{domain}:{port}'
+    return domain
+
+def url_fingerprint(url):
+    """
+    Returns a 64-bit fingerprint of the canonical form of a URL.
+    """
+    return int.from_bytes(hashlib.blake2b(normalize_url(url).encode('utf-8'), digest_size=8).digest(), 'big')
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set of 64-bit fingerprints. May report false positives at roughly
+    `error_rate` once `capacity` items were added; never reports false negatives.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, fingerprint):
+        # Double hashing over the two 32-bit halves of the fingerprint
+        first, second = fingerprint >> 32, (fingerprint & 0xFFFFFFFF) | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, fingerprint):
+        for position in self._positions(fingerprint):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, fingerprint):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(fingerprint))
+
+class VisitedSet:
+    """
+    Set of seen pages keyed by canonical URL fingerprint, with O(1) membership checks.
+
+    Stores one 64-bit integer per URL instead of the URL string. With `bloom_capacity` set it keeps
+    only a Bloom filter of that capacity, trading a small false-positive rate (a page wrongly
+    treated as seen) for constant memory on very large sites. Safe to share between threads.
+
+    Args:
+        urls (iterable, optional): URLs to mark as seen straight away.
+        bloom_capacity (int, optional): Expected number of URLs; switches to Bloom filter storage.
+    """
+
+    def __init__(self, urls=(), bloom_capacity=None):
+        self._fingerprints = BloomFilter(bloom_capacity) if bloom_capacity else set()
+        self._count = 0
+        self._lock = threading.Lock()
+        for url in urls:
+            self.add(url)
+
+    def add(self, url):
+        """
+        Marks a URL as seen.
+
+        Returns:
+            bool: True if the URL was new, False if it (or an equivalent URL) was seen before.
+        """
+        fingerprint = url_fingerprint(url)
+        with self._lock:
+            if fingerprint in self._fingerprints:
+                return False
+            self._fingerprints.add(fingerprint)
+            self._count += 1
+            return True
+
+    def __contains__(self, url):
+        return url_fingerprint(url) in self._fingerprints
+
+    def __len__(self):
+        return self._count
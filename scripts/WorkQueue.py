@@ -0,0 +1,304 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+from collections import namedtuple
+from UrlNormalizer import registrable_domain
+
+try:
+    from redis.exceptions import WatchError
+except ImportError:  # redis-py is only needed for the Redis work queue
+    class WatchError(Exception):
+        """
+        Raised by a transaction whose watched keys changed before it ran.
+        """
+
+logger = logging.getLogger(__name__)
+
+Lease = namedtuple('Lease', ['shard', 'sites', 'token'])
+Lease.__doc__ = """
+A shard handed to one worker: the shard name, its sites as (input position, url) pairs, and the
+token that proves the lease is still held by that worker.
+"""
+
+def site_shard(url):
+    """
+    Returns the shard a site belongs to: its registrable domain (see UrlNormalizer.registrable_domain),
+    so all input rows of a domain end up with the same worker, which crawls the domain once. URLs
+    without a host are their own shard.
+    """
+    return registrable_domain(url)
+
+def group_sites(urls):
+    """
+    Groups input URLs by shard.
+
+    Args:
+        urls (iterable): The input URLs, one per site, in input order.
+
+    Returns:
+        dict: Shard name -> list of (input position, url) pairs, in input order.
+    """
+    shards = {}
+    for position, url in enumerate(urls):
+        shards.setdefault(site_shard(url), []).append((position, url))
+    return shards
+
+class SqliteWorkQueue:
+    """
+    Work queue for the crawlers on a single box, kept in a SQLite file that every worker process opens.
+
+    Work is handed out a shard (domain) at a time, so a domain is only ever crawled by one worker. A
+    lease lasts `lease_ttl` seconds unless the worker renews it with heartbeat(); shards whose lease
+    ran out, e.g. because their worker died, are handed out again. Finished result records are kept
+    by input position so they can be merged in input order.
+    """
+
+    SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS shards (
+        shard TEXT PRIMARY KEY,
+        sites TEXT NOT NULL,
+        status TEXT NOT NULL,
+        token TEXT,
+        worker TEXT,
+        expires_at REAL,
+        attempts INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS results (
+        position INTEGER PRIMARY KEY,
+        record TEXT NOT NULL
+    );
+    '''
+
+    def __init__(self, path, lease_ttl=120):
+        self.path = path
+        self.lease_ttl = lease_ttl
+        # Autocommit mode, so that leasing can take the write lock up front with BEGIN IMMEDIATE
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    def _transaction(self, statements):
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                result = statements(self._connection)
+                self._connection.execute('COMMIT')
+                return result
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+
+    def submit(self, shards):
+        """
+        Adds shards of work, see group_sites. Shards submitted before keep their progress.
+        """
+        self._transaction(lambda connection: connection.executemany(
+            "INSERT OR IGNORE INTO shards (shard, sites, status) VALUES (?, ?, 'pending')",
+            [(shard, json.dumps(sites)) for shard, sites in shards.items()]))
+
+    def lease(self, worker):
+        """
+        Hands the next pending or abandoned shard to a worker.
+
+        Returns:
+            Lease: The shard and its sites, or None if there is nothing to hand out right now.
+        """
+        def take(connection):
+            now = time.time()
+            row = connection.execute(
+                "SELECT shard, sites, status FROM shards WHERE status = 'pending' OR (status = 'leased' AND expires_at < ?) "
+                "ORDER BY rowid LIMIT 1", (now,)).fetchone()
+            if row is None:
+                return None
+            shard, sites, status = row
+            if status == 'leased':
+                logger.warning("Lease on %s expired, handing it to %s", shard, worker)
+            token = uuid.uuid4().hex
+            connection.execute("UPDATE shards SET status = 'leased', token = ?, worker = ?, expires_at = ?, attempts = attempts + 1 "
+                               "WHERE shard = ?", (token, worker, now + self.lease_ttl, shard))
+            return Lease(shard, [tuple(site) for site in json.loads(sites)], token)
+
+        return self._transaction(take)
+
+    def heartbeat(self, lease):
+        """
+        Extends a lease by another `lease_ttl` seconds.
+
+        Returns:
+            bool: False if the lease ran out and the shard was handed to another worker.
+        """
+        with self._lock:
+            cursor = self._connection.execute("UPDATE shards SET expires_at = ? WHERE shard = ? AND token = ? AND status = 'leased'",
+                                              (time.time() + self.lease_ttl, lease.shard, lease.token))
+        return cursor.rowcount == 1
+
+    def complete(self, lease, records):
+        """
+        Stores the result records of a leased shard and marks it done, unless the lease has been
+        handed to another worker meanwhile; the shard then belongs to that worker and nothing is stored.
+
+        Args:
+            lease (Lease): The lease of the shard.
+            records (dict): Input position -> result record for every site of the shard.
+
+        Returns:
+            bool: False if the lease was no longer held.
+        """
+        def finish(connection):
+            cursor = connection.execute("UPDATE shards SET status = 'done', token = NULL WHERE shard = ? AND token = ? AND status = 'leased'",
+                                        (lease.shard, lease.token))
+            if cursor.rowcount != 1:
+                return False
+            connection.executemany("INSERT OR REPLACE INTO results (position, record) VALUES (?, ?)",
+                                   [(position, json.dumps(record)) for position, record in records.items()])
+            return True
+
+        return self._transaction(finish)
+
+    def release(self, lease):
+        """
+        Gives a shard back unfinished, so another worker can take it right away.
+        """
+        with self._lock:
+            self._connection.execute("UPDATE shards SET status = 'pending', token = NULL WHERE shard = ? AND token = ?",
+                                     (lease.shard, lease.token))
+
+    def progress(self):
+        """
+        Returns the number of finished shards and of all shards.
+        """
+        with self._lock:
+            done, total = self._connection.execute(
+                "SELECT COALESCE(SUM(status = 'done'), 0), COUNT(*) FROM shards").fetchone()
+        return done, total
+
+    def results(self):
+        """
+        Yields (input position, result record) pairs of the finished sites in input order.
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT position, record FROM results ORDER BY position").fetchall()
+        for position, record in rows:
+            yield position, json.loads(record)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+class RedisWorkQueue:
+    """
+    Work queue shared by crawlers on many machines through Redis, with the same interface and
+    lease semantics as SqliteWorkQueue.
+
+    Every shard name stays on the `pending` list until it is done; leasing rotates the list and
+    claims a shard with SET NX on its lease key, which expires after `lease_ttl` seconds unless the
+    worker sends heartbeats. A dead worker's shard is therefore claimable again as soon as its lease
+    key expires, and a shard is never held by two workers at once. Heartbeats, completions and
+    releases WATCH the lease key and write in a MULTI/EXEC transaction, so nothing is written once
+    the lease has expired or passed to another worker, even between the token check and the writes.
+
+    Args:
+        client (redis.Redis, optional): A client created with decode_responses=True, or any object
+            with the same methods (e.g. a local stand-in in tests).
+        url (str, optional): Redis URL to connect to when no client is given. Requires redis-py.
+        prefix (str): Prefix of every key, so several runs can share one Redis.
+        lease_ttl (int): Seconds a lease lasts without a heartbeat.
+    """
+
+    def __init__(self, client=None, url='redis://localhost:6379/0', prefix='leadscrapper', lease_ttl=120):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError("The Redis work queue requires redis-py: pip install redis")
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+        self.lease_ttl = lease_ttl
+
+    def _key(self, name):
+        return f'{self.prefix}:{name}'
+
+    def submit(self, shards):
+        for shard, sites in shards.items():
+            if self.client.hsetnx(self._key('sites'), shard, json.dumps(sites)):
+                self.client.rpush(self._key('pending'), shard)
+
+    def lease(self, worker):
+        pending = self._key('pending')
+        for _ in range(self.client.llen(pending)):
+            shard = self.client.rpoplpush(pending, pending)
+            if shard is None:
+                return None
+            token = uuid.uuid4().hex
+            if not self.client.set(self._key(f'lease:{shard}'), token, nx=True, ex=self.lease_ttl):
+                continue  # Held by a live worker
+            if self.client.sismember(self._key('done'), shard):
+                # Finished by a worker that died before taking it off the list
+                self.client.lrem(pending, 0, shard)
+                self.client.delete(self._key(f'lease:{shard}'))
+                continue
+            self.client.hset(self._key('workers'), shard, worker)
+            return Lease(shard, [tuple(site) for site in json.loads(self.client.hget(self._key('sites'), shard))], token)
+        return None
+
+    def _while_held(self, lease, write):
+        """
+        Runs `write(pipeline)` as one transaction, provided the lease is still held when it commits.
+
+        Returns:
+            bool: False if the lease was no longer held, or changed hands before the transaction ran.
+        """
+        lease_key = self._key(f'lease:{lease.shard}')
+        with self.client.pipeline() as pipeline:
+            try:
+                pipeline.watch(lease_key)
+                if pipeline.get(lease_key) != lease.token:
+                    return False
+                pipeline.multi()
+                write(pipeline)
+                pipeline.execute()
+                return True
+            except WatchError:
+                return False
+
+    def heartbeat(self, lease):
+        return self._while_held(lease, lambda pipeline: pipeline.expire(self._key(f'lease:{lease.shard}'), self.lease_ttl))
+
+    def complete(self, lease, records):
+        def finish(pipeline):
+            for position, record in records.items():
+                pipeline.hset(self._key('results'), str(position), json.dumps(record))
+            pipeline.sadd(self._key('done'), lease.shard)
+            pipeline.lrem(self._key('pending'), 0, lease.shard)
+            pipeline.delete(self._key(f'lease:{lease.shard}'))
+
+        return self._while_held(lease, finish)
+
+    def release(self, lease):
+        self._while_held(lease, lambda pipeline: pipeline.delete(self._key(f'lease:{lease.shard}')))
+
+    def progress(self):
+        return self.client.scard(self._key('done')), self.client.hlen(self._key('sites'))
+
+    def results(self):
+        records = self.client.hgetall(self._key('results'))
+        for position in sorted(records, key=int):
+            yield int(position), json.loads(records[position])
+
+    def close(self):
+        pass
+
+def open_work_queue(location, lease_ttl=120):
+    """
+    Opens the work queue at a location: a redis:// or rediss:// URL, or the path of a SQLite file.
+    """
+    if location.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisWorkQueue(url=location, lease_ttl=lease_ttl)
+    return SqliteWorkQueue(location, lease_ttl=lease_ttl)
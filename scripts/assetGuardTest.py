@@ -0,0 +1,129 @@
+import threading
+import time
+
+import requests
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import ContactInfoExtractor as cie
+from CrawlFrontier import CrawlBudget
+from ParsePool import extract_page
+
+ASSET_BYTES = 4 * 1024 * 1024
+PAGE_CAP = 1024 * 1024
+EMAIL = 'owner.assets@gmail.com'
+
+HOME = f'''<!DOCTYPE html><html><body>
+<a href="/brochure.pdf">Brochure</a> <a href="/team-photo.jpg">Team</a> <a href="/price-list.zip">Prices</a>
+<a href="/download?id=1">Download the catalogue</a> <a href="/endless-feed">Feed</a>
+<a href="/contact.html">Contact</a>
+</body></html>'''
+CONTACT = f'<!DOCTYPE html><html><body><a href="mailto:{EMAIL}">{EMAIL}</a></body></html>'
+
+# path -> (content type, whether the response has a Content-Length)
+ASSETS = {
+    '/brochure.pdf': ('application/pdf', True),
+    '/team-photo.jpg': ('image/jpeg', True),
+    '/price-list.zip': ('application/zip', True),
+    '/download?id=1': ('application/pdf', True),  # No telltale extension
+    '/endless-feed': ('text/html', False),  # A page, but far over the cap and without Content-Length
+}
+
+class AssetSiteHandler(BaseHTTPRequestHandler):
+    """
+    Serves a home page that links to large documents and media files.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requested.append(self.path)
+        if self.path in ('/', '/contact.html'):
+            payload = (HOME if self.path == '/' else CONTACT).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        elif self.path in ASSETS:
+            content_type, has_length = ASSETS[self.path]
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            if has_length:
+                self.send_header('Content-Length', str(ASSET_BYTES))
+            else:
+                self.send_header('Connection', 'close')
+                self.close_connection = True
+            self.end_headers()
+            try:
+                for _ in range(ASSET_BYTES // 65536):
+                    self.wfile.write(b'\x00' * 65536)
+            except (BrokenPipeError, ConnectionResetError):  # The crawler hung up early
+                self.close_connection = True
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def serve():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), AssetSiteHandler)
+    server.daemon_threads = True
+    server.requested = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/'
+
+class ReceivedBytes:
+    """
+    Counts the body bytes the client actually reads, by wrapping requests.Response.iter_content.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self._iter_content = requests.Response.iter_content
+        counter = self
+
+        def iter_content(response, *args, **kwargs):
+            for chunk in counter._iter_content(response, *args, **kwargs):
+                counter.total += len(chunk)
+                yield chunk
+
+        requests.Response.iter_content = iter_content
+
+def unguarded_crawl(base_url):
+    """
+    What crawl_site used to do with this site: download every linked URL in full and parse it.
+    """
+    with requests.Session() as session:
+        page = extract_page(session.get(base_url).text, base_url)
+        emails = set(page.emails)
+        for link_url, _, _ in page.links:
+            emails.update(extract_page(session.get(link_url).text, link_url).emails)
+    return emails
+
+def main():
+    cie.logger.disabled = True
+    received = ReceivedBytes()
+
+    for label, crawl in [('unguarded', unguarded_crawl),
+                         ('guarded', lambda url: cie.crawl_site(url, cie.create_session(), budget=CrawlBudget(max_page_bytes=PAGE_CAP))[0])]:
+        server, base_url = serve()
+        received.total = 0
+        start_time = time.time()
+        emails = crawl(base_url)
+        elapsed = time.time() - start_time
+        server.shutdown()
+        server.server_close()
+
+        print(f"{label:>9}: {received.total / 1024 / 1024:6.2f} MiB downloaded in {elapsed:5.2f} s, "
+              f"requested {sorted(set(server.requested))}")
+        assert EMAIL in emails, emails
+
+    # The guarded crawl never requests links with document or media extensions
+    assert not {'/brochure.pdf', '/team-photo.jpg', '/price-list.zip'} & set(server.requested)
+    assert received.total < 2 * PAGE_CAP
+
+if __name__ == "__main__":
+    main()
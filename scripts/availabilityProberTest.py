@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import ContactInfoExtractor as cie
+from AvailabilityProber import AvailabilityProber
+from syntheticWeb import SyntheticSiteHandler, SyntheticWeb
+
+class CountingSiteHandler(SyntheticSiteHandler):
+    """
+    Synthetic site handler that counts requests per path.
+    """
+
+    def do_GET(self):
+        counts = self.server.request_counts
+        counts[self.path] = counts.get(self.path, 0) + 1
+        super().do_GET()
+
+class SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(3)
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+class ServerErrorHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(503)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(handler):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}/'
+
+def main():
+    cie.logger.disabled = True
+
+    # Bind and close a socket to get a port nobody listens on
+    closed = ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+    unreachable_url = f'http://127.0.0.1:{closed.server_port}/'
+    closed.server_close()
+
+    web = SyntheticWeb(sites=1, pages=3, latency=0)
+    web.start()
+    web.servers[0].RequestHandlerClass = CountingSiteHandler
+    web.servers[0].request_counts = {}
+
+    urls = [web.urls[0], serve(SlowHandler), serve(ServerErrorHandler), unreachable_url, 'http://no-such-host.invalid/']
+    labels = ['healthy', 'slow', '5xx', 'unreachable', 'unresolvable']
+
+    directory = tempfile.TemporaryDirectory()
+    cache_file = os.path.join(directory.name, 'unreachable_hosts.json')
+    prober = AvailabilityProber(cie.create_session(retries=False), connect_timeout=1, read_timeout=1, cache_file=cache_file)
+    for label, url in zip(labels, urls):
+        result = prober.probe(url)
+        print(f"{label:>12}: available={result.available} in {result.elapsed:.2f} s  {result.error or ''}")
+
+    start_time = time.time()
+    cached = prober.probe(urls[1])
+    print(f"{'slow again':>12}: available={cached.available} in {time.time() - start_time:.3f} s  {cached.error}")
+
+    # End to end: the healthy site's homepage is downloaded once, by the probe, and reused by the crawl
+    request_counts = web.servers[0].request_counts
+    request_counts.clear()
+    # Only transient failures ask the global check; here it finds them down for everyone too
+    global_checks = []
+    cie.is_site_down = lambda url: global_checks.append(url) or True
+    records = cie.crawl_sites(urls, max_workers=4, prober=prober)
+    prober.close()
+    web.stop()
+
+    for label, record in zip(labels, records):
+        print(f"{label:>12}: {record}")
+    print(f"Homepage requests to the healthy site during the run: {request_counts.get('/', 0)}")
+    assert request_counts.get('/', 0) == 1
+    assert all(record['error'].startswith('Failed availability probe: ') for record in records[1:]), records
+    print(f"Global checks: {global_checks}")
+    assert sorted(global_checks) == sorted(urls[1:3]), global_checks
+
+    # Timeouts and 5xx responses may clear up by the next run, so only the other failures are saved
+    with open(cache_file, encoding='utf-8') as f:
+        saved_hosts = set(json.load(f))
+    directory.cleanup()
+    print(f"Saved as unreachable: {sorted(saved_hosts)}")
+    assert saved_hosts == {urlparse(url).netloc for url in urls[3:]}, saved_hosts
+
+if __name__ == "__main__":
+    main()
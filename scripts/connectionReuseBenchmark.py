@@ -0,0 +1,79 @@
+import time
+
+import ContactInfoExtractor as cie
+from AvailabilityProber import AvailabilityProber
+from HttpClient import HostLimiter, create_session
+from syntheticWeb import SyntheticSiteHandler, SyntheticWeb
+
+SITES = 30
+PAGES_PER_SITE = 8
+LATENCY = 0.02  # Seconds added to every response
+MAX_WORKERS = 8
+PER_HOST_LIMIT = 2
+
+class CountingSiteHandler(SyntheticSiteHandler):
+    """
+    Synthetic site handler that also counts requests, so handshakes can be reported per request.
+    """
+
+    def do_GET(self):
+        with self.server.connections_lock:
+            self.server.requests += 1
+        super().do_GET()
+
+def start_web():
+    web = SyntheticWeb(sites=SITES, pages=PAGES_PER_SITE, latency=LATENCY).start()
+    for server in web.servers:
+        server.RequestHandlerClass = CountingSiteHandler
+        server.requests = 0
+    return web
+
+def per_site_sessions(urls):
+    """
+    The previous behaviour: one session per site, and a probe session with pools of its own.
+    """
+    host_limiter = HostLimiter(PER_HOST_LIMIT)
+    prober = AvailabilityProber(create_session(retries=False))
+    records = []
+    for url in urls:
+        session = create_session(host_limiter)
+        try:
+            records.append(cie.process_site(url, session, probe=prober.probe(url)))
+        finally:
+            session.close()
+    prober.close()
+    return records
+
+def shared_session(urls):
+    """
+    One session for the whole run, with the probe reusing its connection pools.
+    """
+    host_limiter = HostLimiter(PER_HOST_LIMIT)
+    session = create_session(host_limiter, pool_maxsize=PER_HOST_LIMIT)
+    prober = AvailabilityProber(create_session(host_limiter, retries=False, share_pools_with=session))
+    try:
+        return cie.crawl_sites(urls, max_workers=1, per_host_limit=PER_HOST_LIMIT, prober=prober, session=session)
+    finally:
+        prober.close()
+        session.close()
+
+def main():
+    cie.logger.disabled = True
+
+    for label, crawl in [('per-site sessions', per_site_sessions), ('shared session', shared_session)]:
+        web = start_web()
+        start_time = time.time()
+        records = crawl(web.urls)
+        elapsed = time.time() - start_time
+        connections = web.connection_count()
+        requests_served = sum(server.requests for server in web.servers)
+        web.stop()
+
+        for site, record in zip(web.sites, records):
+            assert record['emails'] == [site.email] and record['phones'] == [site.phone], record
+
+        print(f"{label:>18}: {requests_served} requests over {connections} connections "
+              f"= {connections / requests_served:.2f} handshakes per request, {elapsed:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+import re
+import timeit
+
+from bs4 import BeautifulSoup
+from ContactMatcher import extract_contacts
+
+FIXTURES_DIR = '../resources/fixtures/html'
+DOMAIN = 'www.brightsmile.test'
+ROUNDS = 200
+
+def legacy_extract_emails_from_text(text, domain):
+    # The per-call implementation ContactMatcher replaced, kept for comparison
+    email_pattern = re.compile(r'[a-zA-Z0-9._%+-]+@(?:' + re.escape(domain) + r'|gmail\.com|hotmail\.com|yahoo\.com|outlook\.com|aol\.com|icloud\.com|protonmail\.com|zoho\.com|mail\.com|gmx\.com)\b(?!\.png)')
+    emails = set(email_pattern.findall(text))
+
+    soup = BeautifulSoup(text, 'html.parser')
+    for mailto in soup.find_all('a', href=True):
+        if 'mailto:' in mailto['href']:
+            email = mailto['href'].split('mailto:')[1]
+            if not email.endswith('.png') and (domain in email or any(provider in email for provider in ['gmail.com', 'hotmail.com', 'yahoo.com', 'outlook.com', 'aol.com', 'icloud.com', 'protonmail.com', 'zoho.com', 'mail.com', 'gmx.com'])):
+                emails.add(email)
+    return emails
+
+def legacy_extract_phone_numbers_from_text(text):
+    # The per-call implementation ContactMatcher replaced, kept for comparison
+    phone_pattern = re.compile(
+        r'(\+1[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})|'
+        r'(\+44[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'
+        r'(\+61[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'
+        r'(\+49[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'
+        r'(\+33[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'
+        r'(\+91[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'
+        r'(\+86[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'
+        r'(\+55[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'
+        r'(\+81[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'
+        r'(\+92[-.\s]?\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4})|'
+        r'(\(?\d{2,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{4,9})'
+    )
+    phone_numbers = set(phone_pattern.findall(text))
+    return {num for match in phone_numbers for num in match if num}
+
+def load_corpus():
+    corpus = []
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+            html = f.read()
+        hrefs = [link['href'] for link in BeautifulSoup(html, 'html.parser').find_all('a', href=True)]
+        corpus.append((name, html, hrefs))
+    return corpus
+
+def legacy_regex_only(corpus):
+    # Legacy regex work without its internal BeautifulSoup parse, for a like-for-like timing
+    for _, html, _ in corpus:
+        re.compile(r'[a-zA-Z0-9._%+-]+@(?:' + re.escape(DOMAIN) + r'|gmail\.com|hotmail\.com|yahoo\.com|outlook\.com|aol\.com|icloud\.com|protonmail\.com|zoho\.com|mail\.com|gmx\.com)\b(?!\.png)').findall(html)
+        legacy_extract_phone_numbers_from_text(html)
+
+def main():
+    corpus = load_corpus()
+
+    for name, html, hrefs in corpus:
+        emails, phones = extract_contacts(html, DOMAIN, hrefs)
+        assert emails == legacy_extract_emails_from_text(html, DOMAIN), name
+        assert phones == legacy_extract_phone_numbers_from_text(html), name
+    print(f"Identical emails and phones on all {len(corpus)} corpus pages")
+
+    # re keeps a cache of compiled patterns; the cold run purges it to show the cost of the
+    # per-call build once many site domains have pushed the patterns out of the cache
+    def legacy_cold():
+        re.purge()
+        legacy_regex_only(corpus)
+
+    def legacy_warm():
+        legacy_regex_only(corpus)
+
+    def engine():
+        for _, html, hrefs in corpus:
+            extract_contacts(html, DOMAIN, hrefs)
+
+    engine_time = timeit.timeit(engine, number=ROUNDS) / ROUNDS
+    for label, function in (('Legacy, cold re cache', legacy_cold), ('Legacy, warm re cache', legacy_warm)):
+        legacy_time = timeit.timeit(function, number=ROUNDS) / ROUNDS
+        print(f"{label}:  {legacy_time * 1000:.3f} ms per corpus pass ({legacy_time / engine_time:.1f}x ContactMatcher)")
+    print(f"ContactMatcher:         {engine_time * 1000:.3f} ms per corpus pass")
+
+if __name__ == "__main__":
+    main()
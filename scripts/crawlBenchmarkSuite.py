@@ -0,0 +1,162 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from urllib.parse import urlparse
+from syntheticWeb import SyntheticWeb
+
+# Every scenario is a SyntheticWeb configuration; sites are generated from the seed, so runs are comparable
+SCENARIOS = {
+    'nav': dict(sites=20, pages=10, latency=0.01),
+    'deep-chain': dict(sites=8, pages=30, latency=0.005, link_graph='chain', contacts=4),
+    'deep-chain-sitemap': dict(sites=8, pages=30, latency=0.005, link_graph='chain', contacts=4, sitemap=True),
+    'random-broken-links': dict(sites=10, pages=25, latency=0.01, link_graph='random', error_rate=0.1, contacts=5),
+    'heavy-pages': dict(sites=10, pages=10, latency=0.01, page_bytes=200 * 1024),
+}
+DRIVERS = ('crawl_site', 'crawl_website', 'main')
+SEED = 0
+
+# Shown when a report is compared with a baseline; True if higher is better
+COMPARED = {'pages_per_second': True, 'cpu_seconds': False, 'peak_rss_mib': False, 'recall': True}
+
+def run_driver(driver, urls, directory):
+    """
+    Runs one crawler entry point over the sites, in the benchmark's child process.
+
+    Returns:
+        dict: The emails found per site URL (crawl_site and main) or the links found (crawl_website).
+    """
+    import ContactInfoExtractor as cie
+    import PageLinksExtractor
+    from CrawlFrontier import CrawlBudget
+    from HttpClient import create_session
+    from Politeness import PolitenessScheduler
+    from SitemapReader import iter_sitemap_urls
+
+    # The suite is offline: pages that fail must not fall back to the live proxy list
+    class NoProxies:
+        def get(self):
+            return None
+
+    cie.proxy_pool = NoProxies()
+    # The per-site limits main uses
+    budget = CrawlBudget(max_depth=5, max_pages=200, max_seconds=600, max_bytes=50 * 1024 * 1024)
+
+    start_time = time.perf_counter()
+    if driver == 'crawl_site':
+        session = create_session()
+        found = {url: cie.crawl_site(url, session, seed_urls=iter_sitemap_urls(url, session), budget=budget)[0] for url in urls}
+        session.close()
+    elif driver == 'crawl_website':
+        politeness = PolitenessScheduler(rate=1000, burst=1000)
+        found = {url: sorted(PageLinksExtractor.crawl_website(url, politeness=politeness)) for url in urls}
+    else:
+        input_file = os.path.join(directory, 'urls.xlsx')
+        output_file = os.path.join(directory, 'contacts.jsonl')
+        import pandas as pd
+        pd.DataFrame(urls).to_excel(input_file, header=False, index=False)
+        cie.main(input_file, output_file, budget=budget, host_rate=1000, metrics_file=os.path.join(directory, 'metrics.json'))
+        with open(output_file, encoding='utf-8') as f:
+            found = {record['url']: record['emails'] for record in map(json.loads, f)}
+    elapsed = time.perf_counter() - start_time
+
+    own, children = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        'found': found,
+        'seconds': elapsed,
+        # Parse workers are child processes; their CPU time counts once they have exited
+        'cpu_seconds': own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime,
+        'peak_rss_mib': max(own.ru_maxrss, children.ru_maxrss) / 1024,
+    }
+
+def recall(driver, web, found):
+    """
+    Returns the share of planted emails found, or for crawl_website the share of pages discovered.
+    """
+    if driver == 'crawl_website':
+        expected = {(site.base_url, path) for site in web.sites for path in site.page_paths if path != '/'}
+        hits = {(url, urlparse(link).path) for url, links in found.items() for link in links}
+    else:
+        expected = {(site.base_url, email) for site in web.sites for email in site.emails}
+        hits = {(url, email) for url, emails in found.items() for email in emails}
+    return len(expected & hits) / len(expected)
+
+def run_benchmark(scenario, driver, web):
+    """
+    Crawls the synthetic web with one driver in a fresh process, so CPU time and peak RSS belong to this run alone.
+    """
+    for server in web.servers:
+        server.pages_served = server.bytes_sent = 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        child = subprocess.run([sys.executable, __file__, '--child', driver, directory], input=json.dumps(web.urls),
+                               capture_output=True, text=True)
+    if child.returncode != 0:
+        raise RuntimeError(f"{scenario}/{driver} failed:\n{child.stderr}")
+    result = json.loads(child.stdout)
+
+    pages = sum(server.pages_served for server in web.servers)
+    return {
+        'scenario': scenario,
+        'driver': driver,
+        'pages': pages,
+        'megabytes': round(sum(server.bytes_sent for server in web.servers) / 1024 / 1024, 2),
+        'seconds': round(result['seconds'], 3),
+        'pages_per_second': round(pages / result['seconds'], 1),
+        'cpu_seconds': round(result['cpu_seconds'], 3),
+        'peak_rss_mib': round(result['peak_rss_mib'], 1),
+        'recall': round(recall(driver, web, result['found']), 3),
+    }
+
+def compare(results, baseline_file):
+    with open(baseline_file, encoding='utf-8') as f:
+        baseline = {(row['scenario'], row['driver']): row for row in json.load(f)}
+    print(f"\nChange against {baseline_file}:")
+    for row in results:
+        old = baseline.get((row['scenario'], row['driver']))
+        if old is None:
+            continue
+        changes = []
+        for name, higher_is_better in COMPARED.items():
+            if old[name]:
+                change = 100 * (row[name] / old[name] - 1)
+                better = change >= 0 if higher_is_better else change <= 0
+                changes.append(f"{name} {change:+6.1f}%{'' if better or abs(change) < 5 else ' (worse)'}")
+        print(f"{row['scenario']:>20} {row['driver']:>13}: {', '.join(changes)}")
+
+def main(report_file=None, baseline_file=None):
+    """
+    Runs every driver on every scenario and prints the results.
+
+    Args:
+        report_file (str, optional): JSON file to save the results to, e.g. one per release.
+        baseline_file (str, optional): Results of an earlier run to compare against.
+    """
+    results = []
+    print(f"{'scenario':>20} {'driver':>13} {'pages':>6} {'MiB':>7} {'seconds':>8} {'pages/s':>8} {'CPU s':>7} {'RSS MiB':>8} {'recall':>7}")
+    for scenario, options in SCENARIOS.items():
+        with SyntheticWeb(seed=SEED, **options) as web:
+            for driver in DRIVERS:
+                row = run_benchmark(scenario, driver, web)
+                results.append(row)
+                print(f"{scenario:>20} {driver:>13} {row['pages']:6d} {row['megabytes']:7.2f} {row['seconds']:8.2f} "
+                      f"{row['pages_per_second']:8.1f} {row['cpu_seconds']:7.2f} {row['peak_rss_mib']:8.1f} {row['recall']:7.3f}")
+
+    if report_file:
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {report_file}")
+    if baseline_file:
+        compare(results, baseline_file)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--child']:
+        driver, directory = sys.argv[2:4]
+        print(json.dumps(run_driver(driver, json.load(sys.stdin), directory)))
+    else:
+        # python crawlBenchmarkSuite.py [report.json [baseline.json]]
+        main(*sys.argv[1:3])
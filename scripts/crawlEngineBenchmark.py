@@ -0,0 +1,31 @@
+import time
+
+import ContactInfoExtractor as cie
+from syntheticWeb import SyntheticWeb
+
+SITES = 40
+PAGES_PER_SITE = 5
+LATENCY = 0.05  # Seconds added to every response
+WORKER_COUNTS = [1, 8, 32]
+
+def main():
+    cie.logger.disabled = True
+
+    with SyntheticWeb(sites=SITES, pages=PAGES_PER_SITE, latency=LATENCY) as web:
+        baseline = None
+        for max_workers in WORKER_COUNTS:
+            start_time = time.time()
+            data = cie.crawl_sites(web.urls, max_workers=max_workers, per_host_limit=2)
+            elapsed = time.time() - start_time
+
+            if baseline is None:
+                baseline = data
+            assert data == baseline, "Concurrent results differ from the single-worker run"
+            for site, record in zip(web.sites, data):
+                assert record['emails'] == [site.email] and record['phones'] == [site.phone], record
+
+            print(f"{max_workers:>3} workers: {len(data)} sites in {elapsed:6.2f} s "
+                  f"= {len(data) / elapsed * 60:8.1f} sites/min")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from CrawlLogging import LOG_FORMAT, crawl_logging
+
+THREADS = 8
+PAGES_PER_THREAD = 5000
+EMAILS = {f'team{i}@example.com' for i in range(20)}
+PHONES = {f'+1 555 010 {i:04d}' for i in range(10)}
+
+def crawl_like_logging(logger, lazy):
+    """
+    Logs what the crawl logs for every page: the fetch and the full email and phone sets.
+    """
+    for page in range(PAGES_PER_THREAD):
+        url = f'https://example.com/page-{page}.html'
+        if lazy:
+            logger.info("Fetched %s without proxy", url)
+            logger.info("Extracted emails: %s", EMAILS)
+            logger.info("Extracted phone numbers: %s", PHONES)
+        else:
+            logger.info(f"Fetched {url} without proxy")
+            logger.info(f"Extracted emails: {EMAILS.__str__()}")
+            logger.info(f"Extracted phone numbers: {PHONES}")
+
+def timed_threads(logger, lazy):
+    threads = [threading.Thread(target=crawl_like_logging, args=(logger, lazy)) for _ in range(THREADS)]
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start_time
+
+def main():
+    records = THREADS * PAGES_PER_THREAD * 3
+    logger = logging.getLogger('crawl')
+    root = logging.getLogger()
+    # Imported only for its side effects: importing the crawler must leave the root logger's handlers alone
+    handlers = list(root.handlers)
+    import ContactInfoExtractor  # noqa: F401
+    assert root.handlers == handlers
+
+    with tempfile.TemporaryDirectory() as directory:
+        # As before: f-strings and a synchronous file handler on the root logger
+        handler = logging.FileHandler(os.path.join(directory, 'sync.log'), mode='w')
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+        try:
+            sync_time = timed_threads(logger, lazy=False)
+        finally:
+            root.removeHandler(handler)
+            handler.close()
+        print(f"Synchronous file handler: {sync_time:6.2f} s for {records:,} records on {THREADS} threads")
+
+        with crawl_logging(log_dir=os.path.join(directory, 'logs'), summary_interval=0) as setup:
+            queued_time = timed_threads(logger, lazy=True)
+            log_file = setup.log_file
+        print(f"Queued and rate-limited:  {queued_time:6.2f} s on the crawl threads ({sync_time / queued_time:.1f}x faster)")
+
+        assert os.path.dirname(log_file) == os.path.join(directory, 'logs')
+        with open(log_file, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+    summary = json.loads(lines[-1].split('Log summary: ', 1)[1])
+    written = len(lines) - 1
+    print(f"Wrote {written} of {records:,} records; summary: {summary['suppressed']:,} suppressed")
+    assert summary['records']['INFO'] == records
+    assert summary['suppressed'] == records - written
+    assert set(summary['most_suppressed']) == {'crawl: Fetched %s without proxy', 'crawl: Extracted emails: %s',
+                                               'crawl: Extracted phone numbers: %s'}
+    # The sets are formatted on the listener thread, as they were when logged
+    email_line = next(line for line in lines if 'Extracted emails: ' in line)
+    assert all(email in email_line for email in EMAILS), email_line
+
+if __name__ == "__main__":
+    main()
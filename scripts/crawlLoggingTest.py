@@ -0,0 +1,44 @@
+import json
+import re
+import tempfile
+
+import ContactInfoExtractor as cie
+from CrawlLogging import crawl_logging
+from PageLinksExtractor import crawl_website
+from Politeness import PolitenessScheduler
+from syntheticWeb import SyntheticWeb
+
+SITES = 4
+PAGES_PER_SITE = 8
+LATENCY = 0.002
+BURST = 3
+
+def main():
+    with tempfile.TemporaryDirectory() as directory, SyntheticWeb(SITES, PAGES_PER_SITE, LATENCY) as web:
+        # A window longer than the run: every message gets BURST records, the rest are dropped
+        with crawl_logging(log_dir=directory, burst=BURST, interval=3600, summary_interval=0) as setup:
+            cie.crawl_sites(web.urls, max_workers=2)
+            for url in web.urls:
+                crawl_website(url, politeness=PolitenessScheduler(rate=1000))
+            log_file = setup.log_file
+        with open(log_file, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+    summary = json.loads(lines[-1].split('Log summary: ', 1)[1])
+    pages = sum(len(site.page_paths) for site in web.sites)
+    # The per-page and per-site messages of the crawler, the sitemap reader and the link extractor
+    repeated = {
+        'ContactInfoExtractor: Fetched %s without proxy': r'Fetched \S+ without proxy$',
+        'SitemapReader: Fetching sitemap from %s': r'Fetching sitemap from \S+$',
+        'PageLinksExtractor: Visiting %s': r'Visiting \S+$',
+    }
+    for key, pattern in repeated.items():
+        written = sum(re.search(pattern, line) is not None for line in lines)
+        print(f"{key}: {written} written, {summary['most_suppressed'].get(key, 0)} suppressed")
+        assert written == BURST, (key, written)
+        assert summary['most_suppressed'].get(key, 0) > 0, summary
+    assert summary['most_suppressed']['ContactInfoExtractor: Fetched %s without proxy'] == pages - BURST
+    print(f"{len(lines) - 1} lines written, {summary['suppressed']} records suppressed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import json
+import os
+import re
+import tempfile
+
+import ContactInfoExtractor as cie
+from AvailabilityProber import AvailabilityProber
+from CrawlMetrics import CrawlMetrics
+from HttpClient import create_session
+from syntheticWeb import SyntheticWeb
+
+SITES = 6
+PAGES_PER_SITE = 8
+LATENCY = 0.005
+SLOW_LATENCY = 0.2  # The one slow site the metrics should point at
+
+# name{labels} value, as in the Prometheus text exposition format
+SAMPLE_LINE = re.compile(r'^[a-z_]+(\{[^}]*\})? -?[0-9.e+]+$')
+
+def main():
+    cie.logger.disabled = True
+
+    with SyntheticWeb(SITES, PAGES_PER_SITE, LATENCY, page_bytes=20 * 1024) as web:
+        web.sites[0].latency = SLOW_LATENCY
+        metrics = CrawlMetrics(total_sites=SITES)
+        session = create_session()
+        prober = AvailabilityProber(create_session(retries=False, share_pools_with=session), metrics=metrics)
+        try:
+            records = cie.crawl_sites(web.urls, max_workers=4, prober=prober, session=session, metrics=metrics)
+        finally:
+            prober.close()
+            session.close()
+
+    for site, record in zip(web.sites, records):
+        assert record['emails'] == [site.email], record
+
+    snapshot = metrics.snapshot()
+    counters, stages = snapshot['counters'], snapshot['stages']
+    print(f"Progress: {metrics.progress_line()}")
+    print(f"Counters: {json.dumps(counters)}")
+    for stage, histogram in stages.items():
+        print(f"{stage:>9}: {histogram['count']:3d} x, {histogram['sum']:.3f} s")
+
+    host_means = {host: histogram['sum'] / histogram['count'] for host, histogram in snapshot['hosts'].items()}
+    slowest_host = max(host_means, key=host_means.get)
+    print(f"Slowest host: {slowest_host} ({host_means[slowest_host]:.3f} s per request)")
+
+    assert snapshot['sites_done'] == SITES and counters['sites'] == {'ok': SITES}
+    # Every homepage comes from the availability probe; every other page is fetched by the crawl
+    assert counters['pages'] == stages['parse']['count'] == counters['responses']['200'] + SITES
+    assert counters['pages'] >= SITES * PAGES_PER_SITE
+    assert counters['bytes'] > 0
+    assert {'dns', 'connect', 'response', 'download', 'parse', 'extract'} <= set(stages)
+    assert slowest_host == web.urls[0].split('/')[2]
+
+    with tempfile.TemporaryDirectory() as directory:
+        prometheus_file = os.path.join(directory, 'metrics.prom')
+        json_file = os.path.join(directory, 'metrics.json')
+        metrics.export(prometheus_file)
+        metrics.export(json_file)
+        with open(prometheus_file, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        with open(json_file, encoding='utf-8') as f:
+            assert json.load(f)['counters'] == counters
+
+    samples = [line for line in lines if not line.startswith('#')]
+    assert all(SAMPLE_LINE.match(line) for line in samples), [line for line in samples if not SAMPLE_LINE.match(line)]
+    assert f'leadscrapper_pages_total {counters["pages"]}' in samples
+    print(f"Prometheus export: {len(samples)} samples")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import os
+import tempfile
+
+from openpyxl import load_workbook
+
+import ContactInfoExtractor as cie
+import UrlNormalizer
+from CrawlPlan import plan_sites
+from ResultWriters import read_records
+from UrlCollectorFromSheet import save_urls
+from UrlNormalizer import registrable_domain
+from syntheticWeb import SyntheticWeb
+
+SITES = 3
+PAGES_PER_SITE = 4
+LATENCY = 0.005
+
+def check_plan():
+    rows = [
+        'https://acme.example.co.uk/team',
+        'http://www.example.com/about',
+        'not a url',
+        'https://example.com/',
+        'http://example.com',
+        'https://shop.example.com/',
+        'https://www.acme.co.uk',
+        'https://acme.co.uk/contact',
+        'https://other.org',
+        'https://EXAMPLE.com',
+        'example.com',
+    ]
+    with_suffix_list = UrlNormalizer._extract_domain is not None
+
+    plan = plan_sites(rows)
+    groups = {group.domain: group for group in plan}
+    example = groups['example.com']
+    assert example.url == 'https://example.com/'
+    assert groups['acme.co.uk'].url == 'https://www.acme.co.uk' and groups['acme.co.uk'].start_urls == ['https://acme.co.uk/contact']
+    # Without a scheme the row is invalid, not another row of example.com
+    assert [(group.url, group.positions) for group in plan if group.domain is None] == [('not a url', [2]), ('example.com', [10])]
+    if with_suffix_list:
+        # Subdomains join their company: the deep link and the shop are extra start pages of one crawl
+        assert registrable_domain(rows[0]) == 'example.co.uk' and registrable_domain(rows[5]) == 'example.com'
+        assert [group.domain for group in plan] == ['example.com', 'acme.co.uk', 'example.co.uk', None, 'other.org', None]
+        assert example.positions == [1, 3, 4, 5, 9]
+        assert example.start_urls == ['http://www.example.com/about', 'https://shop.example.com/']
+    else:
+        # Grouped by host, without the 'www.'; the shop is crawled on its own
+        assert registrable_domain(rows[0]) == 'acme.example.co.uk' and registrable_domain(rows[5]) == 'shop.example.com'
+        assert [group.domain for group in plan] == ['example.com', 'acme.co.uk', 'acme.example.co.uk', None,
+                                                    'shop.example.com', 'other.org', None]
+        assert example.positions == [1, 3, 4, 9]
+        assert example.start_urls == ['http://www.example.com/about']
+    assert sorted(position for group in plan for position in group.positions) == list(range(len(rows)))
+
+    # Blogs and shops on shared platforms belong to different businesses and are crawled separately
+    shared = ['https://alpha.wordpress.com/', 'https://beta.wordpress.com/contact', 'https://gamma.github.io',
+              'https://delta.github.io', 'https://one.blogspot.com', 'https://two.blogspot.com',
+              'https://store-a.myshopify.com', 'https://store-b.myshopify.com']
+    shared_plan = plan_sites(shared)
+    assert len(shared_plan) == len(shared), [group.domain for group in shared_plan]
+    assert all(len(group.positions) == 1 and not group.start_urls for group in shared_plan)
+    print(f"Planned {len(plan)} domains for {len(rows)} rows; {len(shared)} shared-platform sites kept apart")
+
+def check_crawl(directory):
+    input_file = os.path.join(directory, 'collected_urls.xlsx')
+    with SyntheticWeb(SITES, PAGES_PER_SITE, LATENCY) as web:
+        # Every site appears several times, as the collector may keep it: bare, deep link and homepage
+        rows = []
+        for url in web.urls:
+            rows += [url.rstrip('/'), url + 'contact.html', url]
+        save_urls(rows, input_file)
+
+        served = {}
+        for group_domains in (True, False):
+            before = sum(server.pages_served for server in web.servers)
+            output_file = os.path.join(directory, f'contacts-{group_domains}.xlsx')
+            cie.main(input_file, output_file, host_rate=1000, parse_workers=0, progress_interval=3600,
+                     group_domains=group_domains)
+            served[group_domains] = sum(server.pages_served for server in web.servers) - before
+
+            # Streamed in completion order; the Excel rows follow the input sheet
+            records = list(read_records(os.path.splitext(output_file)[0] + '.jsonl'))
+            assert sorted(record['url'] for record in records) == sorted(url.strip() for url in rows)
+            sheet = load_workbook(output_file, read_only=True).active
+            assert [row[0] for row in sheet.iter_rows(min_row=2, values_only=True)] == [url.strip() for url in rows]
+            for record in records:
+                site = next(site for site in web.sites if record['url'].startswith(site.base_url.rstrip('/')))
+                assert record['emails'] == [site.email], record
+
+    # Grouped, every page of every site is fetched once; row by row, each row crawls its site again
+    pages = sum(len(site.page_paths) for site in web.sites)
+    assert served[True] == pages, (served[True], pages)
+    assert served[False] > 2 * pages, served[False]
+    print(f"{len(rows)} rows of {SITES} sites: {served[True]} pages fetched when grouped by domain, {served[False]} row by row")
+
+def main():
+    cie.logger.disabled = True
+    check_plan()
+    with tempfile.TemporaryDirectory() as directory:
+        check_crawl(directory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import os
+import tempfile
+import threading
+import time
+
+import ContactInfoExtractor as cie
+import DistributedCrawl
+from ResultWriters import read_records
+from WorkQueue import RedisWorkQueue, SqliteWorkQueue, group_sites
+from localRedis import LocalPipeline, LocalRedis
+from syntheticWeb import SyntheticWeb
+
+SITES = 8
+WORKERS = 3
+LEASE_TTL = 2  # Seconds; the shard of the crashed worker is handed out again after this
+
+class RecordingQueue:
+    """
+    Wraps a work queue and logs which worker leased which shard.
+    """
+
+    def __init__(self, queue, log):
+        self.queue = queue
+        self.log = log
+
+    def lease(self, worker):
+        lease = self.queue.lease(worker)
+        if lease is not None:
+            self.log.append((lease.shard, worker))
+        return lease
+
+    def __getattr__(self, name):
+        return getattr(self.queue, name)
+
+class RacingRedis:
+    """
+    Wraps a LocalRedis so that `between` runs inside every transaction, after the lease token
+    was checked and before the writes are queued.
+    """
+
+    def __init__(self, redis, between):
+        self.redis = redis
+        self.between = between
+
+    def pipeline(self):
+        pipeline = LocalPipeline(self.redis)
+        multi = pipeline.multi
+        pipeline.multi = lambda: (self.between(), multi())
+        return pipeline
+
+    def __getattr__(self, name):
+        return getattr(self.redis, name)
+
+def check_lease_lost_mid_write():
+    redis = LocalRedis()
+    RedisWorkQueue(redis, lease_ttl=LEASE_TTL).submit({'example.com': [[0, 'https://example.com/']]})
+    new_holder = RedisWorkQueue(redis, lease_ttl=LEASE_TTL)
+    new_leases = []
+
+    def expire_and_take_over():
+        # The stale worker's lease runs out and another worker takes the shard
+        redis.expires['leadscrapper:lease:example.com'] = time.monotonic()
+        new_leases.append(new_holder.lease('new-holder'))
+
+    stale = RedisWorkQueue(RacingRedis(redis, expire_and_take_over), lease_ttl=LEASE_TTL)
+    stale_lease = RedisWorkQueue(redis, lease_ttl=LEASE_TTL).lease('stale')
+    record = {'url': 'https://example.com/', 'emails': [], 'phones': [], 'error': 'stale'}
+    assert stale.complete(stale_lease, {0: record}) is False
+    assert new_leases[-1] is not None and new_holder.heartbeat(new_leases[-1])
+    assert list(new_holder.results()) == [] and new_holder.progress() == (0, 1)
+
+    # A heartbeat racing the expiry does not extend the new holder's lease either
+    new_holder.release(new_leases[-1])
+    stale_lease = RedisWorkQueue(redis, lease_ttl=LEASE_TTL).lease('stale')
+    assert stale.heartbeat(stale_lease) is False
+    assert new_holder.complete(new_leases[-1], {0: dict(record, error=None)})
+    assert list(new_holder.results()) == [(0, dict(record, error=None))]
+    print("  redis: a lease lost between the token check and the writes stores nothing")
+
+def run(label, open_queue, urls, expected):
+    leases = []
+    coordinator = open_queue()
+    coordinator.submit(group_sites(urls))
+
+    # A worker that leases a shard and dies without a heartbeat
+    crashed = open_queue()
+    lost_lease = crashed.lease('crashed')
+    lost_shard = lost_lease.shard
+
+    start_time = time.time()
+    workers = []
+    for n in range(WORKERS):
+        queue = RecordingQueue(open_queue(), leases)
+        workers.append(threading.Thread(target=DistributedCrawl.run_worker, args=(queue, f'worker-{n}'),
+                                        kwargs=dict(max_workers=2, parse_workers=0, host_rate=1000, poll_interval=0.2)))
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.time() - start_time
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, 'contacts.jsonl')
+        DistributedCrawl.merge_results(coordinator, output_file)
+        merged = list(read_records(output_file))
+
+    shards = [shard for shard, _ in leases]
+    print(f"{label:>7}: {len(merged)} sites from {WORKERS} workers in {elapsed:.2f} s, "
+          f"leases per worker {[sum(worker == f'worker-{n}' for _, worker in leases) for n in range(WORKERS)]}, "
+          f"crashed worker's shard {lost_shard} picked up by {[worker for shard, worker in leases if shard == lost_shard]}")
+
+    # The crashed worker coming back with its expired lease cannot overwrite the results
+    stale = {position: {'url': url, 'emails': [], 'phones': [], 'error': 'stale'} for position, url in lost_lease.sites}
+    assert crashed.complete(lost_lease, stale) is False
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, 'contacts.jsonl')
+        DistributedCrawl.merge_results(coordinator, output_file)
+        assert list(read_records(output_file)) == merged
+
+    assert coordinator.progress() == (SITES, SITES)
+    assert sorted(shards) == sorted(set(shards)) and len(shards) == SITES, leases  # Every shard crawled by exactly one live worker
+    assert [(record['url'], sorted(record['emails'])) for record in merged] == expected
+
+def main():
+    cie.logger.disabled = True
+    check_lease_lost_mid_write()
+
+    with SyntheticWeb(sites=SITES, pages=3, latency=0.01) as web:
+        # Two input rows per site, which must land in the same shard
+        urls = [url for base_url in web.urls for url in (base_url, base_url + 'contact.html')]
+        expected = [(record['url'], sorted(record['emails'])) for record in cie.crawl_sites(urls, max_workers=4)]
+
+        redis = LocalRedis()
+        run('redis', lambda: RedisWorkQueue(redis, lease_ttl=LEASE_TTL), urls, expected)
+
+        with tempfile.TemporaryDirectory() as directory:
+            queue_file = os.path.join(directory, 'work_queue.db')
+            run('sqlite', lambda: SqliteWorkQueue(queue_file, lease_ttl=LEASE_TTL), urls, expected)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import time
+
+import ContactInfoExtractor as cie
+import ParsePool
+from AvailabilityProber import AvailabilityProber
+from HttpCache import HttpCache
+from HttpClient import HostLimiter, create_session
+from syntheticWeb import SyntheticWeb
+
+SITES = 20
+PAGES_PER_SITE = 10
+PAGE_BYTES = 100 * 1024
+LATENCY = 0.01  # Seconds added to every response
+
+class CountingParser:
+    """
+    Wraps the parser backend entry point and counts how many documents get parsed.
+    """
+
+    def __init__(self, extract_anchors):
+        self.extract_anchors = extract_anchors
+        self.parses = 0
+
+    def __call__(self, *args, **kwargs):
+        self.parses += 1
+        return self.extract_anchors(*args, **kwargs)
+
+def crawl(web, cache_file, parser):
+    """
+    Crawls every synthetic site once through an HttpCache, wired up the way main does it.
+    """
+    http_cache = HttpCache(cache_file)
+    host_limiter = HostLimiter(2)
+    session = create_session(host_limiter, pool_maxsize=2, cache=http_cache)
+    prober = AvailabilityProber(create_session(host_limiter, retries=False, share_pools_with=session, cache=http_cache))
+
+    bytes_before, parses_before = sum(server.bytes_sent for server in web.servers), parser.parses
+    start_time = time.time()
+    try:
+        records = cie.crawl_sites(web.urls, max_workers=8, prober=prober, session=session, http_cache=http_cache)
+    finally:
+        prober.close()
+        session.close()
+        http_cache.close()
+    elapsed = time.time() - start_time
+    return records, sum(server.bytes_sent for server in web.servers) - bytes_before, parser.parses - parses_before, elapsed
+
+def main():
+    cie.logger.disabled = True
+    parser = ParsePool.extract_anchors = CountingParser(ParsePool.extract_anchors)
+
+    with tempfile.TemporaryDirectory() as directory, SyntheticWeb(SITES, PAGES_PER_SITE, LATENCY, PAGE_BYTES) as web:
+        cache_file = os.path.join(directory, 'http_cache.db')
+        runs = []
+        for label in ('first run', 'second run'):
+            records, bytes_sent, parses, elapsed = crawl(web, cache_file, parser)
+            for site, record in zip(web.sites, records):
+                assert record['emails'] == [site.email] and record['phones'] == [site.phone], record
+            runs.append((bytes_sent, parses, elapsed))
+            print(f"{label:>10}: {bytes_sent / 1024 / 1024:7.2f} MiB downloaded, {parses:4d} pages parsed, {elapsed:5.2f} s")
+
+        # New extraction rules: the bodies are still reused, but every page is parsed again
+        version = ParsePool.EXTRACTOR_VERSION
+        ParsePool.EXTRACTOR_VERSION = version + '-changed'
+        try:
+            _, new_rules_bytes, new_rules_parses, _ = crawl(web, cache_file, parser)
+        finally:
+            ParsePool.EXTRACTOR_VERSION = version
+        print(f"new rules: {new_rules_bytes / 1024 / 1024:7.2f} MiB downloaded, {new_rules_parses:4d} pages parsed")
+
+    (first_bytes, first_parses, first_time), (second_bytes, second_parses, second_time) = runs
+    print(f"Second run used {100 * (1 - second_bytes / first_bytes):.1f}% less bandwidth "
+          f"and {100 * (1 - second_time / first_time):.1f}% less time")
+    assert second_bytes == 0 and second_parses == 0
+    assert new_rules_bytes == 0 and new_rules_parses == first_parses, new_rules_parses
+
+if __name__ == "__main__":
+    main()
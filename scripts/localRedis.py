@@ -0,0 +1,209 @@
+import threading
+import time
+
+from WorkQueue import WatchError
+
+class LocalRedis:
+    """
+    In-process stand-in for a redis.Redis client created with decode_responses=True.
+
+    Implements only the commands RedisWorkQueue uses, with Redis semantics including key expiry,
+    and is safe to share between threads. Lets the distributed mode be tested without a Redis server.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.versions = {}  # key -> number of changes, for WATCH; expiry counts as a change, as in Redis 7
+        self._lock = threading.RLock()
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def _version(self, key):
+        self._get(key)
+        return self.versions.get(key, 0)
+
+    def _get(self, key, default=None):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.data.pop(key, None)
+            del self.expires[key]
+            self._touch(key)
+        return self.data.get(key, default)
+
+    def _setdefault(self, key, factory):
+        value = self._get(key)
+        if value is None:
+            value = self.data[key] = factory()
+        return value
+
+    def pipeline(self):
+        return LocalPipeline(self)
+
+    # Strings
+
+    def set(self, key, value, nx=False, ex=None):
+        with self._lock:
+            if nx and self._get(key) is not None:
+                return None
+            self.data[key] = str(value)
+            self.expires.pop(key, None)
+            self._touch(key)
+            if ex is not None:
+                self.expires[key] = time.monotonic() + ex
+            return True
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key)
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if self._get(key) is None:
+                return False
+            self.expires[key] = time.monotonic() + seconds
+            self._touch(key)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            deleted = 0
+            for key in keys:
+                if self._get(key) is not None:
+                    del self.data[key]
+                    self.expires.pop(key, None)
+                    self._touch(key)
+                    deleted += 1
+            return deleted
+
+    # Lists
+
+    def rpush(self, key, *values):
+        with self._lock:
+            items = self._setdefault(key, list)
+            items.extend(str(value) for value in values)
+            self._touch(key)
+            return len(items)
+
+    def llen(self, key):
+        with self._lock:
+            return len(self._get(key, []))
+
+    def rpoplpush(self, source, destination):
+        with self._lock:
+            items = self._get(source, [])
+            if not items:
+                return None
+            value = items.pop()
+            self._setdefault(destination, list).insert(0, value)
+            self._touch(source)
+            self._touch(destination)
+            return value
+
+    def lrem(self, key, count, value):
+        with self._lock:
+            items = self._get(key, [])
+            kept = [item for item in items if item != value]
+            removed = len(items) - len(kept)
+            items[:] = kept
+            self._touch(key)
+            return removed
+
+    # Hashes
+
+    def hset(self, key, field, value):
+        with self._lock:
+            fields = self._setdefault(key, dict)
+            added = field not in fields
+            fields[field] = str(value)
+            self._touch(key)
+            return int(added)
+
+    def hsetnx(self, key, field, value):
+        with self._lock:
+            fields = self._setdefault(key, dict)
+            if field in fields:
+                return 0
+            fields[field] = str(value)
+            self._touch(key)
+            return 1
+
+    def hget(self, key, field):
+        with self._lock:
+            return self._get(key, {}).get(field)
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self._get(key, {}))
+
+    def hlen(self, key):
+        with self._lock:
+            return len(self._get(key, {}))
+
+    # Sets
+
+    def sadd(self, key, *members):
+        with self._lock:
+            members_set = self._setdefault(key, set)
+            added = len(set(members) - members_set)
+            members_set.update(members)
+            self._touch(key)
+            return added
+
+    def sismember(self, key, member):
+        with self._lock:
+            return member in self._get(key, set())
+
+    def scard(self, key):
+        with self._lock:
+            return len(self._get(key, set()))
+
+class LocalPipeline:
+    """
+    Stand-in for a redis-py transaction pipeline: commands run at once after watch(), are queued
+    after multi(), and execute() runs the queue atomically or raises WatchError if a watched key
+    changed since it was watched.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._watched = {}
+        self._commands = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.reset()
+
+    def reset(self):
+        self._watched = {}
+        self._commands = None
+
+    def watch(self, *keys):
+        with self.client._lock:
+            for key in keys:
+                self._watched[key] = self.client._version(key)
+
+    def multi(self):
+        self._commands = []
+
+    def execute(self):
+        commands = self._commands or []
+        try:
+            with self.client._lock:
+                if any(self.client._version(key) != version for key, version in self._watched.items()):
+                    raise WatchError("Watched variable changed.")
+                return [getattr(self.client, name)(*args) for name, args in commands]
+        finally:
+            self.reset()
+
+    def __getattr__(self, name):
+        if self._commands is None:
+            return getattr(self.client, name)
+
+        def queue(*args):
+            self._commands.append((name, args))
+            return self
+        return queue
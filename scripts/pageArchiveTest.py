@@ -0,0 +1,112 @@
+import os
+import tempfile
+import time
+
+import requests
+
+import ContactInfoExtractor as cie
+from AvailabilityProber import AvailabilityProber
+from HttpClient import create_session
+from PageArchive import PageArchive, read_index, reextract_archive
+from ResultWriters import read_records
+from syntheticWeb import SyntheticSite, SyntheticWeb
+
+SITES = 5
+PAGES_PER_SITE = 6
+LATENCY = 0.005
+
+# The offline re-extraction benchmark: an archive of generated pages, extrapolated to 100k pages
+BENCHMARK_SITES = 100
+BENCHMARK_PAGES_PER_SITE = 40
+BENCHMARK_PAGE_BYTES = 20 * 1024
+
+def crawl(rows, archive):
+    session = create_session()
+    prober = AvailabilityProber(create_session(retries=False, share_pools_with=session))
+    try:
+        return cie.crawl_sites(rows, max_workers=4, prober=prober, session=session, archive=archive)
+    finally:
+        prober.close()
+        session.close()
+
+def page_response(url, html):
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = 'OK'
+    response.url = url
+    response.headers['Content-Type'] = 'text/html; charset=utf-8'
+    response.encoding = 'utf-8'
+    response._content = html.encode('utf-8')
+    return response
+
+def write_benchmark_archive(path):
+    archive = PageArchive(path)
+    try:
+        for index in range(BENCHMARK_SITES):
+            site = SyntheticSite(index, BENCHMARK_PAGES_PER_SITE, page_bytes=BENCHMARK_PAGE_BYTES, contacts=3, seed=index)
+            site.base_url = f'https://site{index}.example/'
+            for path in site.page_paths:
+                url = site.base_url.rstrip('/') + path
+                archive.append(url, page_response(url, site.render(path)), site.base_url)
+    finally:
+        archive.close()
+
+def by_url(records):
+    return {record['url']: (sorted(record['emails']), sorted(record['phones'])) for record in records}
+
+def main():
+    cie.logger.disabled = True
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive_file = os.path.join(directory, 'pages.warc.gz')
+
+        with SyntheticWeb(SITES, PAGES_PER_SITE, LATENCY, contacts=2) as web:
+            # Each site is named by two rows, crawled as two sites that fetch the same pages
+            rows = [url for base_url in web.urls for url in (base_url, base_url + 'contact.html')]
+            archive = PageArchive(archive_file)
+            try:
+                records = crawl(rows, archive)
+                index_entries = len(read_index(archive_file))
+                archive_size = os.path.getsize(archive_file)
+                # Crawling the unchanged sites again adds nothing to the archive
+                crawl(rows, archive)
+            finally:
+                archive.close()
+
+        # Every page is stored once, and indexed for both sites that crawled it
+        archived_pages = len({offset for _, _, offset, _ in read_index(archive_file)})
+        assert archived_pages == sum(len(site.page_paths) for site in web.sites), archived_pages
+        assert index_entries == 2 * archived_pages, index_entries
+        assert os.path.getsize(archive_file) == archive_size and len(read_index(archive_file)) == index_entries
+        print(f"Archived {archived_pages} pages of {len(rows)} sites in {archive_size / 1024:.1f} KiB")
+
+        for workers in (0, None):
+            output_file = os.path.join(directory, f'reextracted-{workers}.jsonl')
+            assert reextract_archive(archive_file, output_file, workers=workers) == archived_pages
+            assert by_url(read_records(output_file)) == by_url(records)
+        print("Offline re-extraction matches the crawl, in this process and on worker processes")
+
+        # One record per input row in input order, as main writes them, also when the rows were grouped by domain
+        for group_domains in (False, True):
+            output_file = os.path.join(directory, f'reextracted-rows-{group_domains}.jsonl')
+            reextract_archive(archive_file, output_file, workers=0, urls=rows + ['https://not-crawled.example/'],
+                              group_domains=group_domains)
+            row_records = list(read_records(output_file))
+            assert [record['url'] for record in row_records] == rows + ['https://not-crawled.example/']
+            assert by_url(row_records[:-1]) == by_url(records) and row_records[-1]['error'] == 'No archived pages'
+        print("Re-extracted records fan out to every input row")
+
+        benchmark_file = os.path.join(directory, 'benchmark.warc.gz')
+        write_benchmark_archive(benchmark_file)
+        pages = len(read_index(benchmark_file))
+        print(f"Benchmark archive: {pages} pages, {os.path.getsize(benchmark_file) / 1024 ** 2:.1f} MiB compressed")
+        for workers in (0, None):
+            start_time = time.perf_counter()
+            reextract_archive(benchmark_file, os.path.join(directory, 'benchmark.jsonl'), workers=workers)
+            elapsed = time.perf_counter() - start_time
+            label = 'in process' if workers == 0 else f'{os.cpu_count()} worker(s)'
+            print(f"Re-extraction {label:>12}: {pages / elapsed:7.0f} pages/s, "
+                  f"~{100_000 / (pages / elapsed) / 60:.1f} min for 100k pages")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import os
+import time
+
+import requests
+
+from collections import deque
+from urllib.parse import urljoin, urlparse
+
+import ContactInfoExtractor as cie
+import ParsePool
+
+FIXTURES_DIR = '../resources/fixtures/html'
+BASE_URL = 'http://www.brightsmile.test'
+ROUNDS = 50
+
+class FixtureSession:
+    """
+    A stand-in for requests.Session that serves saved HTML fixtures, counts every fetch and
+    remembers which distinct pages were asked for.
+    """
+
+    def __init__(self, fixtures_dir):
+        self.pages = {}
+        for name in os.listdir(fixtures_dir):
+            with open(os.path.join(fixtures_dir, name), encoding='utf-8') as f:
+                self.pages[name] = f.read()
+        self.fetches = 0
+        self.paths = set()
+
+    def get(self, url, **kwargs):
+        self.fetches += 1
+        path = url.split(BASE_URL, 1)[-1].split('#', 1)[0].lstrip('/') or 'index.html'
+        self.paths.add(path)
+        response = requests.Response()
+        response.url = url
+        if path in self.pages:
+            response.status_code = 200
+            response._content = self.pages[path].encode('utf-8')
+        else:
+            response.status_code = 404
+            response._content = b''
+        response.encoding = 'utf-8'
+        return response
+
+class CountingParser:
+    """
+    Wraps the parser backend entry point and counts how many documents get parsed.
+    """
+
+    def __init__(self, extract_anchors):
+        self.extract_anchors = extract_anchors
+        self.parses = 0
+
+    def __call__(self, *args, **kwargs):
+        self.parses += 1
+        return self.extract_anchors(*args, **kwargs)
+
+def no_proxy(session, url):
+    raise requests.HTTPError(f"No fixture for {url}")
+
+def old_crawl_site(base_url, session):
+    """
+    The crawl loop before pages went through process_page: every page is fetched and parsed once
+    for its contacts, once more for the mailto links and fetched and parsed again for its links.
+    """
+    visited_urls = set()
+    urls_to_visit = deque([base_url])
+    all_emails = set()
+    all_phones = set()
+    while urls_to_visit:
+        current_url = urls_to_visit.popleft()
+        if current_url in visited_urls:
+            continue
+        visited_urls.add(current_url)
+
+        response = session.get(current_url, timeout=10)
+        if response.ok:
+            soup = cie.parse_page(response.text)
+            domain = urlparse(current_url).hostname
+            emails = cie.extract_emails_from_text(response.text, domain)
+            emails |= cie.find_mailto_emails((link['href'] for link in soup.find_all('a', href=True)), domain)
+            all_emails.update(emails)
+            all_phones.update(cie.extract_phone_numbers_from_text(response.text))
+
+        response = session.get(current_url, timeout=10)
+        if not response.ok:
+            continue
+        soup = cie.parse_page(response.text)
+        for link in soup.find_all('a', href=True):
+            link_url = urljoin(current_url, link['href'])
+            if urlparse(link_url).hostname == urlparse(base_url).hostname and link_url not in visited_urls:
+                urls_to_visit.append(link_url)
+    return list(all_emails), list(all_phones)
+
+def run(crawl, parses):
+    """
+    Crawls the fixture site ROUNDS times and returns the fetches and parses per distinct page,
+    the time per crawl and the contacts found.
+    """
+    session = FixtureSession(FIXTURES_DIR)
+    parses_before = parses()
+    start_time = time.time()
+    for _ in range(ROUNDS):
+        emails, phones = crawl(BASE_URL + '/', session)
+    elapsed = time.time() - start_time
+
+    # Counted apart from the fetches: the distinct pages the crawl asked for, a 404 included
+    pages = len(session.paths)
+    return (pages, session.fetches / (pages * ROUNDS), (parses() - parses_before) / (pages * ROUNDS),
+            elapsed / ROUNDS, sorted(emails), sorted(phones))
+
+def main():
+    cie.logger.disabled = True
+    parser = ParsePool.extract_anchors = CountingParser(ParsePool.extract_anchors)
+    soup_parser = cie.parse_page = CountingParser(cie.parse_page)
+    cie.fetch_with_proxy = no_proxy
+
+    def parses():
+        return parser.parses + soup_parser.parses
+
+    old = run(old_crawl_site, parses)
+    new = run(cie.crawl_site, parses)
+
+    # The linked price list PDF is skipped by its extension and never fetched
+    print(f"{'':24}{'before':>10}{'after':>10}")
+    for label, index, form in [('Distinct pages per run:', 0, '{:.0f}'), ('Fetches per page:', 1, '{:.2f}'),
+                               ('Parses per page:', 2, '{:.2f}')]:
+        print(f"{label:24}{form.format(old[index]):>10}{form.format(new[index]):>10}")
+    print(f"{'Time per crawl (ms):':24}{old[3] * 1000:>10.2f}{new[3] * 1000:>10.2f}")
+    print(f"Fetches cut by {100 * (1 - new[1] / old[1]):.0f}%, parses by {100 * (1 - new[2] / old[2]):.0f}%")
+    print(f"Emails found:            {new[4]}")
+    print(f"Phones found:            {new[5]}")
+    assert new[1] == 1 and new[2] == 1, new
+    assert set(old[4]) <= set(new[4]), (old[4], new[4])
+
+if __name__ == "__main__":
+    main()
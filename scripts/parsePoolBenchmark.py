@@ -0,0 +1,43 @@
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from ParsePool import ParsePool
+
+FIXTURES_DIR = '../resources/fixtures/html'
+BASE_URL = 'http://www.brightsmile.test/'
+COPIES = 100  # Each fixture is parsed this many times
+CRAWL_THREADS = 16
+
+def load_pages():
+    pages = []
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+            pages.append((f.read(), BASE_URL + name))
+    return pages * COPIES
+
+def run(parse_pool, pages):
+    """
+    Parses the pages from a pool of crawl threads, the way crawl workers hand pages to the parse stage.
+    """
+    with ThreadPoolExecutor(max_workers=CRAWL_THREADS) as executor:
+        return list(executor.map(lambda page: parse_pool.extract(*page), pages))
+
+def main():
+    pages = load_pages()
+    baseline = None
+    for workers in sorted({0, 1, 2, os.cpu_count()}):
+        with ParsePool(workers) as parse_pool:
+            start_time = time.time()
+            results = run(parse_pool, pages)
+            elapsed = time.time() - start_time
+
+        if baseline is None:
+            baseline = results
+        assert results == baseline, f"{workers} parse workers changed the extracted results"
+
+        label = 'crawl threads only' if workers == 0 else f'{workers} parse workers'
+        print(f"{label:>18}: {len(pages)} pages in {elapsed:6.2f} s = {len(pages) / elapsed:8.1f} pages/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import os
+import time
+
+from PageParsers import BACKENDS, lxml
+from ParsePool import extract_page
+
+FIXTURES_DIR = '../resources/fixtures/html'
+BASE_URL = 'http://www.brightsmile.test/'
+ROUNDS = 200
+
+def load_pages():
+    pages = []
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+            pages.append((f.read(), BASE_URL + name))
+    return pages
+
+def extract_all(pages, backend):
+    results = []
+    for html, page_url in pages:
+        page = extract_page(html, page_url, backend)
+        results.append((sorted(page.emails), sorted(page.phones), page.links))
+    return results
+
+def main():
+    pages = load_pages()
+    reference = extract_all(pages, 'bs4')
+
+    for backend in BACKENDS:
+        if backend == 'lxml' and lxml is None:
+            print(f"{backend:>6}: skipped, lxml is not installed")
+            continue
+
+        results = extract_all(pages, backend)
+        for (_, page_url), expected, actual in zip(pages, reference, results):
+            assert actual == expected, f"{backend} differs from bs4 on {page_url}:\n{actual}\n{expected}"
+
+        start_time = time.time()
+        for _ in range(ROUNDS):
+            extract_all(pages, backend)
+        elapsed = time.time() - start_time
+        print(f"{backend:>6}: identical results, {len(pages) * ROUNDS / elapsed:8.1f} pages/s")
+
+if __name__ == "__main__":
+    main()
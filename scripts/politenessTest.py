@@ -0,0 +1,149 @@
+import time
+
+import ContactInfoExtractor as cie
+import PageLinksExtractor
+from AvailabilityProber import AvailabilityProber
+from HttpClient import create_session
+from Politeness import PolitenessScheduler, RobotsCache
+from SitemapReader import iter_sitemap_urls
+from syntheticWeb import SyntheticSiteHandler, SyntheticWeb
+
+ROBOTS_TXT = 'User-agent: *\nDisallow: /page-1.html\nCrawl-delay: 1\n'
+THROTTLED_REQUESTS = 2  # Requests the rate-limited site answers with 429 before it recovers
+
+class PoliteSiteHandler(SyntheticSiteHandler):
+    """
+    Synthetic site handler that serves a robots.txt, can rate-limit its first requests and logs
+    the time of every request.
+    """
+
+    def do_GET(self):
+        server = self.server
+        with server.connections_lock:
+            server.request_log.append((time.monotonic(), self.path))
+            throttle = self.path != '/robots.txt' and server.throttled_requests > 0
+            if throttle:
+                server.throttled_requests -= 1
+
+        if self.path == '/robots.txt' and server.robots_status:
+            self._send_text(server.robots_status, 'Unavailable')
+        elif self.path == '/robots.txt' and server.robots_txt:
+            self._send_text(200, server.robots_txt)
+        elif throttle:
+            self._send_text(429, 'Slow down', {'Retry-After': '1'})
+        else:
+            super().do_GET()
+
+    def _send_text(self, status, text, headers=None):
+        payload = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+def start_web(**site_options):
+    web = SyntheticWeb(sites=2, pages=3, latency=0, **site_options).start()
+    for server in web.servers:
+        server.RequestHandlerClass = PoliteSiteHandler
+        server.request_log = []
+        server.robots_txt = None
+        server.robots_status = None
+        server.throttled_requests = 0
+    web.servers[0].robots_txt = ROBOTS_TXT
+    web.servers[1].throttled_requests = THROTTLED_REQUESTS
+    return web
+
+def page_requests(server):
+    return [(at, path) for at, path in server.request_log if path != '/robots.txt']
+
+def smallest_gap(requests):
+    # The first request is the availability probe, made before the crawl paces the host
+    requests = requests[1:]
+    return min(later[0] - earlier[0] for earlier, later in zip(requests, requests[1:]))
+
+def check_robots_statuses():
+    web = start_web()
+    robots_site = web.servers[0]
+    page_url = web.urls[0] + 'page-0.html'
+    allowed = {}
+    # As urllib.robotparser: 401 and 403 disallow the site, other 4xx allow it, 5xx is retried
+    for status in (401, 403, 404, 410, 500, 503):
+        robots_site.robots_status = status
+        allowed[status] = RobotsCache(create_session(retries=False)).allowed(page_url)
+
+    # A 5xx keeps the rules fetched before, and they are fetched again once error_ttl has passed
+    robots_site.robots_status = None
+    robots = RobotsCache(create_session(retries=False), ttl=0, error_ttl=0.2)
+    assert robots.allowed(page_url) and not robots.allowed(web.urls[0] + 'page-1.html')
+    robots_site.robots_status = 500
+    kept = not robots.allowed(web.urls[0] + 'page-1.html') and robots.crawl_delay(page_url) == 1
+    fetches = sum(path == '/robots.txt' for _, path in robots_site.request_log)
+    robots_site.robots_status = 404
+    time.sleep(0.25)
+    recovered = robots.allowed(web.urls[0] + 'page-1.html')
+    web.stop()
+
+    print(f"Page allowed by robots.txt status: {allowed}; rules kept over a 500: {kept}, allowed after a 404: {recovered}")
+    assert allowed == {401: False, 403: False, 404: True, 410: True, 500: False, 503: False}, allowed
+    assert kept and recovered
+    # The 500 is cached for error_ttl rather than fetched for every check
+    assert sum(path == '/robots.txt' for _, path in robots_site.request_log) == fetches + 1
+
+def main():
+    cie.logger.disabled = True
+    check_robots_statuses()
+
+    web = start_web()
+    robots_site, throttled_site = web.servers
+    start_time = time.time()
+    prober = AvailabilityProber(create_session(retries=False))
+    records = cie.crawl_sites(web.urls, max_workers=2, prober=prober, politeness=PolitenessScheduler(rate=20, backoff_base=1))
+    prober.close()
+    elapsed = time.time() - start_time
+    web.stop()
+
+    for site, record in zip(web.sites, records):
+        print(record)
+        assert record['emails'] == [site.email], record
+
+    robots_paths = [path for _, path in page_requests(robots_site)]
+    robots_fetches = sum(path == '/robots.txt' for _, path in robots_site.request_log)
+    print(f"robots.txt fetches on the robots site: {robots_fetches}")
+    print(f"Disallowed page requested: {'/page-1.html' in robots_paths}")
+    print(f"Smallest gap between requests with Crawl-delay 1: {smallest_gap(page_requests(robots_site)):.2f} s")
+    assert robots_fetches == 1
+    assert '/page-1.html' not in robots_paths
+    assert smallest_gap(page_requests(robots_site)) >= 0.95
+
+    throttled = page_requests(throttled_site)
+    recovery_gap = throttled[THROTTLED_REQUESTS][0] - throttled[THROTTLED_REQUESTS - 1][0]
+    print(f"Wait after the last 429 with Retry-After 1: {recovery_gap:.2f} s")
+    print(f"Both sites crawled in {elapsed:.2f} s")
+    assert recovery_gap >= 0.95
+
+    # The link crawler honours the same rules
+    web = start_web()
+    robots_site = web.servers[0]
+    links = PageLinksExtractor.crawl_website(web.urls[0], politeness=PolitenessScheduler(rate=20))
+    web.stop()
+    robots_paths = [path for _, path in page_requests(robots_site)]
+    print(f"crawl_website found {len(links)} links, disallowed page requested: {'/page-1.html' in robots_paths}")
+    assert '/page-1.html' not in robots_paths
+
+    # A sitemap answered with 429 backs the host off and is fetched again once Retry-After has passed
+    web = start_web(sitemap=True)
+    throttled_site = web.servers[1]
+    politeness = PolitenessScheduler(rate=20, backoff_base=1)
+    sitemap_urls = list(iter_sitemap_urls(web.urls[1], create_session(), politeness=politeness))
+    web.stop()
+    sitemap_requests = [at for at, path in page_requests(throttled_site) if path == '/sitemap.xml']
+    print(f"Sitemap requests on the rate-limited site: {len(sitemap_requests)}, "
+          f"wait after the last 429: {sitemap_requests[-1] - sitemap_requests[-2]:.2f} s")
+    assert len(sitemap_requests) == THROTTLED_REQUESTS + 1 and sitemap_requests[-1] - sitemap_requests[-2] >= 0.95
+    assert sorted(sitemap_urls) == sorted(web.urls[1].rstrip('/') + path for path in web.sites[1].page_paths), sitemap_urls
+
+if __name__ == "__main__":
+    main()
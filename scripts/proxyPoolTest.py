@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+import urllib.request
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ProxyPool import ProxyPool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class TargetHandler(BaseHTTPRequestHandler):
+    """
+    The site the proxies are tested against.
+    """
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeProxyHandler(BaseHTTPRequestHandler):
+    """
+    A forwarding HTTP proxy whose delay and failure mode are set on the server object.
+    """
+
+    def do_GET(self):
+        time.sleep(self.server.delay)
+        if self.server.broken:
+            self.send_response(502)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        with urllib.request.urlopen(self.path, timeout=5) as upstream:
+            body = upstream.read()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class ProxyListHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the ProxyScrape API: serves the newline-separated proxy list and counts requests.
+    """
+
+    def do_GET(self):
+        self.server.requests += 1
+        body = '\n'.join(self.server.proxies).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(handler, **attributes):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    for name, value in attributes.items():
+        setattr(server, name, value)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    target = serve(TargetHandler)
+    fast = serve(FakeProxyHandler, delay=0.0, broken=False)
+    also_fast = serve(FakeProxyHandler, delay=0.0, broken=False)
+    slow = serve(FakeProxyHandler, delay=0.3, broken=False)
+    broken = serve(FakeProxyHandler, delay=0.0, broken=True)
+
+    # Bind and close a socket to get a port nobody listens on
+    dead = ThreadingHTTPServer(('127.0.0.1', 0), TargetHandler)
+    dead_port = dead.server_port
+    dead.server_close()
+
+    proxies = [f'127.0.0.1:{server.server_port}' for server in (broken, slow, fast, also_fast)] + [f'127.0.0.1:{dead_port}']
+    fast_proxies = {f'127.0.0.1:{fast.server_port}', f'127.0.0.1:{also_fast.server_port}'}
+    proxy_list = serve(ProxyListHandler, proxies=proxies, requests=0)
+
+    pool = ProxyPool(f'http://127.0.0.1:{proxy_list.server_port}/', test_url=f'http://127.0.0.1:{target.server_port}/',
+                     ttl=1, check_interval=0.2, check_timeout=1, quarantine_after=2, quarantine_time=60)
+
+    first = pool.get()
+    time.sleep(1.5)
+    handed_out = Counter(pool.get() for _ in range(200))
+    pool.stop()
+
+    logger.info("First proxy handed out: %s", first)
+    logger.info("Proxies handed out after checks: %s (fast proxies are %s)", dict(handed_out), sorted(fast_proxies))
+    logger.info("Proxies in rotation: %s", pool.healthy_proxies())
+    logger.info("Proxy list requests made: %s", proxy_list.requests)
+
+    # Requests are spread over both fast proxies; the slow one is outside the latency band
+    assert set(handed_out) == fast_proxies and min(handed_out.values()) > 50, handed_out
+    assert set(pool.healthy_proxies()[:2]) == fast_proxies
+    assert pool.healthy_proxies()[2:] == [f'127.0.0.1:{slow.server_port}']
+    assert proxy_list.requests <= 3
+
+if __name__ == "__main__":
+    main()
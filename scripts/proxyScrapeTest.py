@@ -40,16 +40,16 @@ def test_proxies(proxies):
         try:
             response = requests.get(TEST_URL, proxies=proxies_dict, timeout=TIMEOUT)
             if response.status_code == 200:
-                logger.info(f"Proxy {proxy} is working")
+                logger.info("Proxy %s is working", proxy)
                 working_proxies.append(proxy)
             else:
-                logger.warning(f"Proxy {proxy} failed with status code {response.status_code}")
+                logger.warning("Proxy %s failed with status code %s", proxy, response.status_code)
         except requests.RequestException as e:
-            logger.warning(f"Proxy {proxy} failed: {e}")
+            logger.warning("Proxy %s failed: %s", proxy, e)
     return working_proxies
 
 if __name__ == "__main__":
     proxies = get_proxies()
-    logger.info(f"Fetched {len(proxies)} proxies")
+    logger.info("Fetched %d proxies", len(proxies))
     working_proxies = test_proxies(proxies)
-    logger.info(f"{len(working_proxies)} proxies are working")
\ No newline at end of file
+    logger.info("%d proxies are working", len(working_proxies))
\ No newline at end of file
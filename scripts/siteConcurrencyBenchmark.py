@@ -0,0 +1,62 @@
+import time
+
+import ContactInfoExtractor as cie
+from CrawlFrontier import CrawlBudget
+from HttpClient import HostLimiter, create_session
+from Politeness import PolitenessScheduler
+from syntheticWeb import SyntheticWeb
+
+PAGES = 300
+LATENCY = 0.015  # Seconds before the headers of every response
+BODY_LATENCY = 0.015  # Seconds spent sending every page body
+IN_FLIGHT_COUNTS = [1, 2, 4, 8, 16]
+CAPPED_HOST_LIMIT = 4  # The last run asks for 16 pages in flight but lets only this many reach the host
+
+def crawl(site, max_in_flight, per_host_limit, max_pages=None):
+    """
+    Crawls the one large site and returns the elapsed time, the crawl result and the number of pages the server served.
+    """
+    server_pages = site.server.pages_served
+    site.server.peak_active = 0
+    site.server.peak_sending = 0
+    session = create_session(HostLimiter(per_host_limit), pool_maxsize=per_host_limit)
+    politeness = PolitenessScheduler(session, rate=1000, burst=max_in_flight)
+    try:
+        start_time = time.perf_counter()
+        emails, phones = cie.crawl_site(site.base_url, session, budget=CrawlBudget(max_pages=max_pages, max_in_flight=max_in_flight),
+                                        politeness=politeness)
+        elapsed = time.perf_counter() - start_time
+    finally:
+        session.close()
+    return elapsed, sorted(emails), sorted(phones), site.server.pages_served - server_pages
+
+def main():
+    cie.logger.disabled = True
+
+    with SyntheticWeb(sites=1, pages=PAGES, latency=LATENCY, link_graph='tree', contacts=5, body_latency=BODY_LATENCY) as web:
+        site = web.sites[0]
+        site.server = web.servers[0]
+        runs = [(count, count) for count in IN_FLIGHT_COUNTS] + [(IN_FLIGHT_COUNTS[-1], CAPPED_HOST_LIMIT)]
+
+        serial_time = None
+        for max_in_flight, per_host_limit in runs:
+            elapsed, emails, phones, fetched = crawl(site, max_in_flight, per_host_limit)
+            serial_time = serial_time or elapsed
+
+            # Every page is fetched exactly once, and never more requests than the per-host cap reach the
+            # server: the cap holds while the headers are awaited and while the bodies are downloaded
+            assert fetched == len(site.page_paths), (fetched, len(site.page_paths))
+            assert emails == sorted(site.emails) and phones == [site.phone], emails
+            assert site.server.peak_active <= per_host_limit, site.server.peak_active
+            assert site.server.peak_sending <= per_host_limit, site.server.peak_sending
+
+            print(f"{max_in_flight:>3} in flight, host limit {per_host_limit:>2}: {fetched} pages in {elapsed:6.2f} s "
+                  f"= {fetched / elapsed:7.1f} pages/s ({serial_time / elapsed:4.1f}x), "
+                  f"peak {site.server.peak_active} concurrent requests, {site.server.peak_sending} concurrent bodies")
+
+        # Pages in flight count against the page budget, so a parallel crawl stops at the same page count
+        _, _, _, fetched = crawl(site, IN_FLIGHT_COUNTS[-1], IN_FLIGHT_COUNTS[-1], max_pages=50)
+        assert fetched == 50, fetched
+
+if __name__ == "__main__":
+    main()
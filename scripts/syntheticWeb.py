@@ -0,0 +1,231 @@
+import hashlib
+import random
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class SyntheticSiteHandler(BaseHTTPRequestHandler):
+    """
+    Serves the pages of one synthetic site. Site settings live on the server object.
+
+    Speaks HTTP/1.1 so clients can keep connections alive; `server.connections` counts the TCP
+    connections accepted, i.e. the handshakes clients had to make, `server.pages_served` the 200
+    responses, `server.bytes_sent` the body bytes served, `server.peak_active` the most requests
+    handled at once and `server.peak_sending` the most page bodies being sent at once. Pages carry an
+    ETag and are answered with 304 when the client already has them.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this, delayed ACKs stall kept-alive connections
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        with self.server.connections_lock:
+            self.server.connections += 1
+        super().setup()
+
+    def do_GET(self):
+        site = self.server.site
+        # Counted while the request is processed, before the client can see the response and send the next one
+        with self.server.connections_lock:
+            self.server.active += 1
+            self.server.peak_active = max(self.server.peak_active, self.server.active)
+        time.sleep(site.latency)
+        with self.server.connections_lock:
+            self.server.active -= 1
+
+        path = self.path.split('?', 1)[0]
+        body = site.render(path)
+        if body is None or site.fails(path):
+            self.send_response(404 if body is None else site.error_status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        payload = body.encode('utf-8')
+        etag = f'"{hashlib.md5(payload).hexdigest()}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/xml' if path.endswith('.xml') else 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.send_body(payload, site.body_latency)
+        with self.server.connections_lock:
+            self.server.pages_served += 1
+            self.server.bytes_sent += len(payload)
+
+    def send_body(self, payload, duration):
+        """
+        Writes the body in BODY_CHUNKS pieces spread over `duration` seconds, like a slow link would.
+        """
+        if not duration:
+            self.wfile.write(payload)
+            return
+        with self.server.connections_lock:
+            self.server.sending += 1
+            self.server.peak_sending = max(self.server.peak_sending, self.server.sending)
+        try:
+            chunk_size = -(-len(payload) // BODY_CHUNKS)
+            for start in range(0, len(payload), chunk_size):
+                time.sleep(duration / BODY_CHUNKS)
+                self.wfile.write(payload[start:start + chunk_size])
+                self.wfile.flush()
+        finally:
+            with self.server.connections_lock:
+                self.server.sending -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+BODY_CHUNKS = 4
+LINK_GRAPHS = ('nav', 'chain', 'tree', 'random')
+
+class SyntheticSite:
+    """
+    A small generated website: a home page, `pages` content pages and a contact page.
+
+    Content pages are padded with filler text to about `page_bytes` bytes and linked by `link_graph`:
+    'nav' puts every page in the navigation of every page, 'chain' links each page to the next one,
+    'tree' to two children and 'random' to `out_degree` random pages besides the next one. The
+    contact page holds `email` and `phone`; `contacts` - 1 further emails are spread over the content
+    pages. Page bodies take `body_latency` seconds to send, after the `latency` before the headers.
+    With `sitemap` set, /sitemap.xml lists every page. A share of `error_rate` content pages
+    answers with `error_status`. Everything random is derived from `seed`, so a site is the same
+    on every run.
+    """
+
+    def __init__(self, index, pages=5, latency=0.05, page_bytes=0, link_graph='nav', sitemap=False, error_rate=0.0,
+                 error_status=404, contacts=1, out_degree=3, seed=0, body_latency=0.0):
+        if link_graph not in LINK_GRAPHS:
+            raise ValueError(f"Unknown link graph {link_graph!r}, expected one of {', '.join(LINK_GRAPHS)}")
+        self.index = index
+        self.pages = pages
+        self.latency = latency
+        self.body_latency = body_latency
+        self.page_bytes = page_bytes
+        self.link_graph = link_graph
+        self.sitemap = sitemap
+        self.error_status = error_status
+        self.base_url = None  # Set once the site is served
+        self.email = f'site{index}.owner@gmail.com'
+        self.phone = f'+1 (555) 010-{index % 10000:04d}'
+
+        rng = random.Random(f'{seed}-{index}')
+        self.failing_pages = {n for n in range(pages) if rng.random() < error_rate}
+        self.page_emails = {}  # content page -> emails planted on it
+        for k in range(1, contacts if pages else 1):
+            self.page_emails.setdefault(rng.randrange(pages), []).append(f'site{index}.team{k}@gmail.com')
+        self.outlinks = {n: self._outlinks(n, rng, out_degree) for n in range(pages)}
+
+    def _outlinks(self, n, rng, out_degree):
+        if self.link_graph == 'chain':
+            return [n + 1] if n + 1 < self.pages else []
+        if self.link_graph == 'tree':
+            return [child for child in (2 * n + 1, 2 * n + 2) if child < self.pages]
+        if self.link_graph == 'random':
+            targets = {n + 1} if n + 1 < self.pages else set()
+            targets.update(rng.randrange(self.pages) for _ in range(out_degree))
+            return sorted(targets - {n})
+        return []
+
+    @property
+    def emails(self):
+        """
+        Every email planted on the site.
+        """
+        return [self.email] + [email for n in sorted(self.page_emails) for email in self.page_emails[n]]
+
+    @property
+    def page_paths(self):
+        """
+        Paths of every page the site serves, home and contact page included.
+        """
+        return ['/'] + [f'/page-{n}.html' for n in range(self.pages)] + ['/contact.html']
+
+    def fails(self, path):
+        return path.startswith('/page-') and path.endswith('.html') and path[6:-5].isdigit() and int(path[6:-5]) in self.failing_pages
+
+    def render(self, path):
+        if path == '/sitemap.xml':
+            if not self.sitemap:
+                return None
+            urls = ''.join(f'<url><loc>{self.base_url.rstrip("/")}{page_path}</loc></url>' for page_path in self.page_paths)
+            return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+
+        if self.link_graph == 'nav':
+            links = ''.join(f'<a href="/page-{n}.html">Page {n}</a>\n' for n in range(self.pages))
+        else:
+            links = '<a href="/page-0.html">Start</a>\n' if path in ('', '/') and self.pages else ''
+        nav = f'<nav><a href="/">Home</a>\n{links}<a href="/contact.html">Contact</a></nav>'
+
+        if path in ('', '/'):
+            content = f'<h1>Site {self.index}</h1><p>Welcome.</p>'
+        elif path == '/contact.html':
+            content = f'<p>Call {self.phone} or write to <a href="mailto:{self.email}">{self.email}</a>.</p>'
+        elif path.startswith('/page-') and path.endswith('.html') and path[6:-5].isdigit() and int(path[6:-5]) < self.pages:
+            n = int(path[6:-5])
+            filler = '<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>\n' * (self.page_bytes // 64)
+            related = ''.join(f'<a href="/page-{m}.html">Read more {m}</a>\n' for m in self.outlinks[n])
+            planted = ''.join(f'<p>Ask {email} about it.</p>' for email in self.page_emails.get(n, ()))
+            content = f'<h1>Page {n}</h1><p>Lorem ipsum dolor sit amet.</p>{planted}{filler}{related}'
+        else:
+            return None
+
+        return f'<!DOCTYPE html><html><head><title>Site {self.index}</title></head><body>{nav}{content}</body></html>'
+
+class SyntheticWeb:
+    """
+    Runs one local HTTP server per synthetic site, each on its own port.
+
+    Use as a context manager; `urls` holds the base URL of every site. Further keyword arguments
+    (link_graph, sitemap, error_rate, contacts, seed, ...) are passed on to every SyntheticSite.
+    """
+
+    def __init__(self, sites=20, pages=5, latency=0.05, page_bytes=0, **site_options):
+        self.sites = [SyntheticSite(i, pages, latency, page_bytes, **site_options) for i in range(sites)]
+        self.servers = []
+        self.urls = []
+
+    def start(self):
+        for site in self.sites:
+            server = ThreadingHTTPServer(('127.0.0.1', 0), SyntheticSiteHandler)
+            server.daemon_threads = True
+            server.site = site
+            server.connections = 0
+            server.pages_served = 0
+            server.bytes_sent = 0
+            server.active = 0
+            server.peak_active = 0
+            server.sending = 0
+            server.peak_sending = 0
+            server.connections_lock = threading.Lock()
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            site.base_url = f'http://127.0.0.1:{server.server_port}/'
+            self.servers.append(server)
+            self.urls.append(site.base_url)
+        return self
+
+    def connection_count(self):
+        """
+        Returns the number of TCP connections accepted by all sites so far.
+        """
+        return sum(server.connections for server in self.servers)
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.servers = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
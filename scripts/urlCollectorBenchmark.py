@@ -0,0 +1,107 @@
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from openpyxl import Workbook
+from UrlCollectorFromSheet import EXCEL_ENGINE, collect_urls, is_valid_url, read_sheets
+from UrlNormalizer import normalize_url
+
+ROWS = 50_000
+COLUMNS = 10
+SHEETS = 2  # ROWS x COLUMNS x SHEETS = 1M cells
+DOMAINS = 20_000
+
+def generate_cells(rng):
+    """
+    Yields the rows of one vendor sheet: names, numbers, emails, blanks and a share of URLs, many
+    of them repeated with a different scheme, a trailing slash or surrounding spaces.
+    """
+    for row in range(ROWS):
+        cells = []
+        for column in range(COLUMNS):
+            kind = rng.random()
+            domain = f'vendor{rng.randrange(DOMAINS)}.com'
+            if kind < 0.15:
+                cells.append(rng.choice([f'https://www.{domain}/', f'http://www.{domain}', f' https://www.{domain} ']))
+            elif kind < 0.3:
+                cells.append(f'sales@{domain}')
+            elif kind < 0.5:
+                cells.append(rng.randrange(10 ** 6))
+            elif kind < 0.6:
+                cells.append(None)
+            else:
+                cells.append(f'Vendor {row} item {column}')
+        yield cells
+
+def write_workbook(path, rng):
+    workbook = Workbook(write_only=True)
+    for sheet in range(SHEETS):
+        worksheet = workbook.create_sheet(f'Vendors {sheet + 1}')
+        for cells in generate_cells(rng):
+            worksheet.append(cells)
+    workbook.save(path)
+
+def legacy_collect(frames):
+    """
+    The collector as it was: a Python loop over every cell, then list(set(...)).
+    """
+    urls = []
+    for df in frames:
+        for column in df.columns:
+            for cell in df[column]:
+                if pd.notna(cell) and isinstance(cell, str) and is_valid_url(cell):
+                    urls.append(cell)
+    return list(set(urls))
+
+def expected_urls(frames):
+    """
+    Order-preserving dedupe by canonical URL, written as a plain loop to check collect_urls against.
+    """
+    seen = set()
+    urls = []
+    for frame in frames:
+        for column in frame.columns:
+            for cell in frame[column]:
+                if isinstance(cell, str) and is_valid_url(cell.strip()) and normalize_url(cell) not in seen:
+                    seen.add(normalize_url(cell))
+                    urls.append(cell.strip())
+    return urls
+
+def timed(function, *args):
+    start_time = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start_time
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        workbook_path = os.path.join(directory, 'vendors.xlsx')
+        csv_path = os.path.join(directory, 'vendors.csv')
+
+        _, elapsed = timed(write_workbook, workbook_path, random.Random(0))
+        print(f"Generated a {ROWS * COLUMNS * SHEETS:,}-cell workbook with {SHEETS} sheets in {elapsed:.1f} s")
+
+        frames, read_time = timed(read_sheets, workbook_path)
+        print(f"Read with {EXCEL_ENGINE}: {read_time:6.2f} s")
+        pd.concat(frames, ignore_index=True).to_csv(csv_path, header=False, index=False)
+        csv_frames, csv_read_time = timed(read_sheets, csv_path)
+        print(f"Read as CSV:   {csv_read_time:6.2f} s")
+
+        legacy, legacy_time = timed(legacy_collect, frames)
+        urls, collect_time = timed(collect_urls, frames)
+        csv_urls = collect_urls(csv_frames)
+        print(f"Cell-by-cell collector: {legacy_time:6.2f} s, {len(legacy):,} URLs in arbitrary order")
+        print(f"Column-wise collector:  {collect_time:6.2f} s, {len(urls):,} URLs in sheet order "
+              f"({legacy_time / collect_time:.1f}x faster)")
+
+    assert urls == expected_urls(frames)
+    # The CSV holds both sheets one below the other, so only the column order differs
+    assert csv_urls == expected_urls(csv_frames)
+    assert {normalize_url(url) for url in csv_urls} == {normalize_url(url) for url in urls}
+    # The old collector kept every spelling of a site and missed URLs with surrounding spaces
+    assert {normalize_url(url) for url in legacy} <= {normalize_url(url) for url in urls}
+
+if __name__ == "__main__":
+    main()
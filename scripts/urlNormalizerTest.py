@@ -0,0 +1,72 @@
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import ContactInfoExtractor as cie
+from CrawlPlan import plan_sites
+from UrlNormalizer import VisitedSet, normalize_url, registrable_domain
+
+EMAIL = 'owner.ports@gmail.com'
+BAD_LINKS = ['http://127.0.0.1:abc/x', 'http://127.0.0.1:99999999/y']
+
+class BadPortSiteHandler(BaseHTTPRequestHandler):
+    """
+    Serves a home page that links to URLs with ports that are not numbers, before the contact page.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requested.append(self.path)
+        links = ''.join(f'<a href="{url}">Broken</a>\n' for url in BAD_LINKS)
+        pages = {
+            '/': f'<!DOCTYPE html><html><body>{links}<a href="/contact.html">Contact</a></body></html>',
+            '/contact.html': f'<!DOCTYPE html><html><body><a href="mailto:{EMAIL}">{EMAIL}</a></body></html>',
+        }
+        payload = pages.get(self.path, '').encode('utf-8')
+        self.send_response(200 if self.path in pages else 404)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def check_keys():
+    assert normalize_url('HTTPS://Example.com:443/contact/?utm_source=x&b=2&a=1#top') == 'example.com/contact?a=1&b=2'
+    assert normalize_url('http://example.com:8080/') == 'example.com:8080/'
+    # URLs that cannot be parsed are their own key instead of raising
+    for url in BAD_LINKS + ['http://[::1/z']:
+        assert normalize_url(f' {url} ') == url, normalize_url(url)
+        assert registrable_domain(url) in ('127.0.0.1', url), registrable_domain(url)
+    visited = VisitedSet()
+    assert visited.add(BAD_LINKS[0]) and not visited.add(BAD_LINKS[0]) and visited.add(BAD_LINKS[1])
+    # An input row like this is planned like any other row
+    plan = plan_sites(BAD_LINKS + ['http://127.0.0.1/'])
+    assert sorted(position for group in plan for position in group.positions) == [0, 1, 2]
+    print(f"{len(BAD_LINKS) + 1} unparseable URLs keyed by their own text")
+
+def check_crawl():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), BadPortSiteHandler)
+    server.daemon_threads = True
+    server.requested = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}/'
+    try:
+        # The broken links fail to fetch and are skipped; the crawl goes on to the contact page
+        emails, _ = cie.crawl_site(base_url, cie.create_session())
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert set(emails) == {EMAIL}, emails
+    assert sorted(set(server.requested)) == ['/', '/contact.html'], server.requested
+    print(f"Crawled past {len(BAD_LINKS)} links with invalid ports, found {sorted(emails)}")
+
+def main():
+    cie.logger.disabled = True
+    check_keys()
+    check_crawl()
+
+if __name__ == "__main__":
+    main()